@@ -0,0 +1,344 @@
+"""ZigAlarm engine benchmarks under synthetic sensor storms.
+
+Runs ZigAlarmPanel inside a local Home Assistant test instance (no network,
+no devices) and writes machine-readable results as JSON:
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/bench_engine.py --sizes 10 100 1000 --events 5000 --output bench.json
+
+Compare two runs with:
+
+    python benchmarks/bench_engine.py --compare old.json new.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from homeassistant.components.alarm_control_panel import AlarmControlPanelState  # noqa: E402
+from homeassistant.const import EVENT_STATE_CHANGED  # noqa: E402
+from homeassistant.core import Event, HomeAssistant, State  # noqa: E402
+from homeassistant.helpers import restore_state  # noqa: E402
+from homeassistant.helpers.entity_component import EntityComponent  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.zigalarm.alarm_control_panel import ZigAlarmPanel  # noqa: E402
+from custom_components.zigalarm.const import DOMAIN  # noqa: E402
+from custom_components.zigalarm.metrics import LatencyMetrics  # noqa: E402
+
+_LOGGER = logging.getLogger("zigalarm.bench")
+
+SIRENS = 6
+LIGHTS = 20
+LATENCY_ROUNDS = 50
+
+
+def _options(n: int) -> dict[str, Any]:
+    # Verteilung: 50 % Perimeter, 40 % Bewegung, 10 % 24/7
+    n_always = max(1, n // 10)
+    n_motion = max(1, (n * 4) // 10)
+    n_perimeter = max(1, n - n_always - n_motion)
+    return {
+        "perimeter_sensors": [f"binary_sensor.door_{i}" for i in range(n_perimeter)],
+        "motion_sensors": [f"binary_sensor.pir_{i}" for i in range(n_motion)],
+        "always_sensors": [f"binary_sensor.smoke_{i}" for i in range(n_always)],
+        "siren_entities": [f"siren.siren_{i}" for i in range(SIRENS)],
+        "alarm_lights": [f"light.alarm_{i}" for i in range(LIGHTS)],
+        "exit_delay": 0,
+        "entry_delay": 0,
+        "trigger_time": 600,
+        # Flatter-Schutz aus: das Burst-Muster würde sonst je nach Größe
+        # unterschiedlich oft in die Quarantäne laufen (Größen nicht vergleichbar)
+        "flap_threshold": 0,
+        "sensor_debounce": 0,
+    }
+
+
+class ServiceRecorder:
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.calls: list[tuple[float, str, str, Any]] = []
+        for dom in ("siren", "switch", "light"):
+            for svc in ("turn_on", "turn_off"):
+                hass.services.async_register(dom, svc, self._handle)
+
+    async def _handle(self, call) -> None:
+        self.calls.append((time.perf_counter(), call.domain, call.service, call.data.get("entity_id")))
+
+    def first_after(self, t0: float) -> float | None:
+        ts = [c[0] for c in self.calls if c[0] >= t0]
+        return min(ts) if ts else None
+
+    def last_after(self, t0: float) -> float | None:
+        ts = [c[0] for c in self.calls if c[0] >= t0]
+        return max(ts) if ts else None
+
+
+def _pcts(values: list[float]) -> dict[str, float | None]:
+    if not values:
+        return {"n": 0, "mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+    return {
+        "n": len(ordered),
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": round(pct(50), 3),
+        "p95": round(pct(95), 3),
+        "p99": round(pct(99), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def _event(entity_id: str, old: str, new: str) -> Event:
+    return Event(
+        EVENT_STATE_CHANGED,
+        {
+            "entity_id": entity_id,
+            "old_state": State(entity_id, old),
+            "new_state": State(entity_id, new),
+        },
+    )
+
+
+async def _settle(hass: HomeAssistant) -> None:
+    await hass.async_block_till_done()
+    # Coalescing-Fenster der State-Writes abwarten
+    await asyncio.sleep(0.3)
+    await hass.async_block_till_done()
+
+
+async def _setup_panel(hass: HomeAssistant, n: int) -> tuple[ZigAlarmPanel, ServiceRecorder, list[str]]:
+    opts = _options(n)
+    sensors = opts["perimeter_sensors"] + opts["motion_sensors"]
+    for eid in sensors + opts["always_sensors"]:
+        hass.states.async_set(eid, "off")
+    for eid in opts["siren_entities"]:
+        hass.states.async_set(eid, "off")
+    for eid in opts["alarm_lights"]:
+        hass.states.async_set(eid, "off", {"brightness": 0})
+
+    entry = MockConfigEntry(domain=DOMAIN, title=f"bench-{n}", data={"name": f"bench {n}"}, options=opts)
+    entry.add_to_hass(hass)
+    hass.data.setdefault(DOMAIN, {}).setdefault("metrics", {})[entry.entry_id] = LatencyMetrics(
+        hass, entry.entry_id
+    )
+
+    recorder = ServiceRecorder(hass)
+    panel = ZigAlarmPanel(hass, entry, f"bench {n}")
+    component = hass.data.get("alarm_control_panel_bench")
+    if component is None:
+        component = EntityComponent(_LOGGER, "alarm_control_panel", hass)
+        hass.data["alarm_control_panel_bench"] = component
+    await component.async_add_entities([panel])
+    await _settle(hass)
+    return panel, recorder, sensors
+
+
+def _count_writes(panel: ZigAlarmPanel) -> list[int]:
+    counter = [0]
+    original = panel.async_write_ha_state
+
+    def _counting() -> None:
+        counter[0] += 1
+        original()
+
+    panel.async_write_ha_state = _counting  # type: ignore[method-assign]
+    return counter
+
+
+async def _burst(hass: HomeAssistant, panel: ZigAlarmPanel, sensors: list[str], events: int,
+                 seed: int) -> dict[str, Any]:
+    rnd = random.Random(seed)
+    state = {eid: "off" for eid in sensors}
+    writes = _count_writes(panel)
+
+    tracemalloc.start()
+    mem_before = tracemalloc.take_snapshot()
+
+    per_event_ns: list[float] = []
+    cpu_start = time.process_time()
+    for _ in range(events):
+        eid = rnd.choice(sensors)
+        old = state[eid]
+        new = "off" if old == "on" else "on"
+        state[eid] = new
+        ev = _event(eid, old, new)
+        t0 = time.perf_counter_ns()
+        panel._handle_state_change_event(ev)
+        per_event_ns.append((time.perf_counter_ns() - t0) / 1000.0)
+    cpu_total = time.process_time() - cpu_start
+
+    await _settle(hass)
+    mem_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    growth = sum(stat.size_diff for stat in mem_after.compare_to(mem_before, "filename"))
+
+    # Ausgangszustand wiederherstellen
+    for eid, st in state.items():
+        if st == "on":
+            panel._handle_state_change_event(_event(eid, "on", "off"))
+    await _settle(hass)
+
+    return {
+        "events": events,
+        "cpu_s_total": round(cpu_total, 6),
+        "cpu_us_per_event": round(cpu_total / events * 1e6, 3),
+        "handler_us": _pcts(per_event_ns),
+        "state_writes": writes[0],
+        "state_writes_per_event": round(writes[0] / events, 5),
+        "memory_growth_bytes": growth,
+    }
+
+
+async def _latencies(hass: HomeAssistant, panel: ZigAlarmPanel, recorder: ServiceRecorder) -> dict[str, Any]:
+    arm_ms: list[float] = []
+    trigger_first_ms: list[float] = []
+    trigger_last_ms: list[float] = []
+    disarm_ms: list[float] = []
+
+    for _ in range(LATENCY_ROUNDS):
+        t0 = time.perf_counter()
+        await panel.async_alarm_arm_away()
+        async with asyncio.timeout(5):
+            while panel.state != AlarmControlPanelState.ARMED_AWAY:
+                await asyncio.sleep(0)
+        arm_ms.append((time.perf_counter() - t0) * 1000.0)
+
+        t0 = time.perf_counter()
+        await panel.async_alarm_trigger()
+        await hass.async_block_till_done()
+        first, last = recorder.first_after(t0), recorder.last_after(t0)
+        if first is not None:
+            trigger_first_ms.append((first - t0) * 1000.0)
+        if last is not None:
+            trigger_last_ms.append((last - t0) * 1000.0)
+
+        t0 = time.perf_counter()
+        await panel.async_alarm_disarm()
+        await hass.async_block_till_done()
+        first = recorder.first_after(t0)
+        if first is not None:
+            disarm_ms.append((first - t0) * 1000.0)
+
+    await _settle(hass)
+    return {
+        "arm_to_armed_ms": _pcts(arm_ms),
+        "trigger_to_first_output_ms": _pcts(trigger_first_ms),
+        "trigger_to_last_output_ms": _pcts(trigger_last_ms),
+        "disarm_to_first_output_ms": _pcts(disarm_ms),
+    }
+
+
+async def _run_size(n: int, events: int, seed: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as config_dir:
+        async with async_test_home_assistant(config_dir=config_dir) as hass:
+            try:
+                await restore_state.async_load(hass)
+            except Exception:  # noqa: BLE001 - bereits geladen
+                pass
+
+            panel, recorder, sensors = await _setup_panel(hass, n)
+
+            disarmed = await _burst(hass, panel, sensors, events, seed)
+
+            await panel.async_alarm_arm_away()
+            await _settle(hass)
+            armed = await _burst(hass, panel, sensors, events, seed + 1)
+            await panel.async_alarm_disarm()
+            await _settle(hass)
+
+            latencies = await _latencies(hass, panel, recorder)
+
+            await hass.async_stop(force=True)
+
+    return {
+        "sensors": n,
+        "burst_disarmed": disarmed,
+        "burst_armed": armed,
+        "latency": latencies,
+    }
+
+
+def _manifest_version() -> str:
+    try:
+        return json.loads((ROOT / "custom_components/zigalarm/manifest.json").read_text())["version"]
+    except Exception:  # noqa: BLE001
+        return "unknown"
+
+
+async def _main(args: argparse.Namespace) -> dict[str, Any]:
+    results = []
+    for n in args.sizes:
+        _LOGGER.info("benchmark: %d sensors, %d events", n, args.events)
+        results.append(await _run_size(n, args.events, args.seed))
+    return {
+        "version": _manifest_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "events_per_burst": args.events,
+        "seed": args.seed,
+        "results": results,
+    }
+
+
+def _compare(old_path: str, new_path: str) -> int:
+    old = {r["sensors"]: r for r in json.loads(Path(old_path).read_text())["results"]}
+    new = {r["sensors"]: r for r in json.loads(Path(new_path).read_text())["results"]}
+    keys = (
+        ("burst_disarmed", "cpu_us_per_event"),
+        ("burst_disarmed", "state_writes_per_event"),
+        ("burst_armed", "cpu_us_per_event"),
+        ("burst_armed", "state_writes_per_event"),
+    )
+    for n in sorted(set(old) & set(new)):
+        for section, key in keys:
+            a, b = old[n][section][key], new[n][section][key]
+            change = ((b - a) / a * 100.0) if a else 0.0
+            print(f"{n:>5} sensors  {section}.{key:<24} {a:>12.3f} -> {b:>12.3f}  ({change:+.1f} %)")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="-", help="JSON output file ('-' for stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        return _compare(*args.compare)
+
+    logging.basicConfig(level=logging.INFO)
+    report = asyncio.run(_main(args))
+    out = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(out)
+    else:
+        Path(args.output).write_text(out + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,311 @@
+"""Replay a recorded ZigAlarm event trace on a virtual clock.
+
+Traces come from the zigalarm.start_trace / zigalarm.stop_trace services. The
+replay runs ZigAlarmPanel inside a local Home Assistant test instance (no
+network, no devices) on an event loop whose clock jumps straight to the next
+timer instead of sleeping, so hours of recorded traffic replay in seconds.
+Sirens and lights are answered by stand-in services that record each call and
+switch the target state like a device would.
+
+The produced state transitions, deadlines and output calls are compared with
+the recording; with --repeat the runs must also be identical to each other.
+The exit code is non-zero on any difference, so a trace doubles as a
+regression test:
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/replay.py trace.jsonl.gz
+    python benchmarks/replay.py trace.jsonl.gz --repeat 5 --output replay.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import heapq
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from homeassistant.components.alarm_control_panel import AlarmControlPanelState  # noqa: E402
+from homeassistant.const import EVENT_STATE_CHANGED  # noqa: E402
+from homeassistant.core import Event, HomeAssistant, ServiceCall, callback  # noqa: E402
+from homeassistant.helpers import restore_state  # noqa: E402
+from homeassistant.helpers.entity_component import EntityComponent  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.zigalarm.alarm_control_panel import ZigAlarmPanel  # noqa: E402
+from custom_components.zigalarm.const import DOMAIN, OPT_SUPERVISION_INTERVAL  # noqa: E402
+from custom_components.zigalarm.keypad import keypad_triage  # noqa: E402
+from custom_components.zigalarm.metrics import LatencyMetrics  # noqa: E402
+from custom_components.zigalarm.trace import (  # noqa: E402
+    TR_COMMAND,
+    TR_DEADLINE,
+    TR_END,
+    TR_EVENT,
+    TR_KEYPAD,
+    TR_OUTPUT,
+    TR_STATE,
+    TraceRecorder,
+    read_trace,
+)
+
+_LOGGER = logging.getLogger("zigalarm.replay")
+
+# verglichen werden nur die Reaktionen des Panels, nicht die Eingaben
+COMPARED = (TR_STATE, TR_DEADLINE, TR_OUTPUT)
+
+COMMANDS = {
+    "arm_home": "async_alarm_arm_home",
+    "arm_away": "async_alarm_arm_away",
+    "disarm": "async_alarm_disarm",
+    "trigger": "async_alarm_trigger",
+}
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    # Uhr steht, solange es etwas zu tun gibt; ist nur noch ein Timer offen,
+    # springt sie direkt dorthin. Laufende Executor-Jobs halten die Uhr an,
+    # damit Thread-Arbeit nicht von virtueller Zeit überholt wird.
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._virtual = time.monotonic()
+        self._executor_jobs = 0
+
+    def time(self) -> float:
+        return self._virtual
+
+    def run_in_executor(self, executor, func, *args):
+        fut = super().run_in_executor(executor, func, *args)
+        self._executor_jobs += 1
+        fut.add_done_callback(self._executor_done)
+        return fut
+
+    def _executor_done(self, _fut) -> None:
+        self._executor_jobs -= 1
+
+    def _run_once(self) -> None:
+        scheduled = self._scheduled
+        while scheduled and scheduled[0]._cancelled:
+            self._timer_cancelled_count -= 1
+            heapq.heappop(scheduled)._scheduled = False
+        if not self._ready and scheduled and not self._executor_jobs:
+            when = scheduled[0]._when
+            if when > self._virtual:
+                self._virtual = when
+        super()._run_once()
+
+
+class StandInDevices:
+    # Sirenen/Lichter/Schalter: Call aufzeichnen und State wie ein Gerät setzen
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.calls: list[tuple[float, str, str, list[str]]] = []
+        for dom in ("siren", "switch", "light"):
+            for svc in ("turn_on", "turn_off"):
+                hass.services.async_register(dom, svc, self._handle)
+
+    async def _handle(self, call: ServiceCall) -> None:
+        eids = call.data.get("entity_id") or []
+        eids = [eids] if isinstance(eids, str) else list(eids)
+        self.calls.append((self.hass.loop.time(), call.domain, call.service, sorted(eids)))
+        new = "on" if call.service == "turn_on" else "off"
+        for eid in eids:
+            st = self.hass.states.get(eid)
+            self.hass.states.async_set(eid, new, dict(st.attributes) if st else {})
+
+
+class RecordedPins:
+    # Ersatz für PinVerifier: liefert die aufgezeichneten Prüfergebnisse der Reihe nach
+    def __init__(self, outcomes: list[bool], required: bool) -> None:
+        self._outcomes = list(outcomes)
+        self.required = required
+
+    def configure(self, stored: str) -> None:
+        return None
+
+    def triage(self, action: str, code: str | None) -> str:
+        return keypad_triage(action, code, self.required)
+
+    async def async_verify(self, code: str | None) -> bool:
+        return self._outcomes.pop(0) if self._outcomes else True
+
+
+def _key(rec: dict[str, Any]) -> tuple:
+    t = rec["t"]
+    if t == TR_STATE:
+        return (t, rec["s"])
+    if t == TR_DEADLINE:
+        return (t, rec["k"])
+    return (t, rec["d"], rec["s"], tuple(rec["e"]), json.dumps(rec.get("data"), sort_keys=True))
+
+
+def _compare(expected: list[dict[str, Any]], actual: list[dict[str, Any]]) -> dict[str, Any]:
+    for i, (exp, act) in enumerate(zip(expected, actual)):
+        if _key(exp) != _key(act):
+            return {"match": False, "index": i, "expected": exp, "actual": act}
+    if len(expected) != len(actual):
+        i = min(len(expected), len(actual))
+        return {
+            "match": False,
+            "index": i,
+            "expected": expected[i] if i < len(expected) else None,
+            "actual": actual[i] if i < len(actual) else None,
+        }
+    drift = max((abs(e["at"] - a["at"]) for e, a in zip(expected, actual)), default=0.0)
+    return {"match": True, "records": len(expected), "max_time_drift_s": round(drift, 3)}
+
+
+async def _replay(header: dict[str, Any], records: list[dict[str, Any]]) -> dict[str, Any]:
+    end_at = next((r["at"] for r in reversed(records) if r["t"] == TR_END), None)
+    if end_at is None:
+        end_at = max((r.get("at", 0.0) for r in records), default=0.0)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        async with async_test_home_assistant(config_dir=config_dir) as hass:
+            try:
+                await restore_state.async_load(hass)
+            except Exception:  # noqa: BLE001 - bereits geladen
+                pass
+
+            options = dict(header.get("options") or {})
+            if options.get(OPT_SUPERVISION_INTERVAL):
+                # Stale-Prüfung vergleicht mit Wanduhr-Zeitstempeln der States
+                _LOGGER.warning("supervision_interval disabled for replay (wall-clock based)")
+                options[OPT_SUPERVISION_INTERVAL] = 0
+
+            for eid, st in (header.get("states") or {}).items():
+                hass.states.async_set(eid, st["s"], st.get("a") or {})
+            devices = StandInDevices(hass)
+
+            entry = MockConfigEntry(
+                domain=DOMAIN, title="replay", data={"name": header.get("name") or "replay"}, options=options
+            )
+            entry.add_to_hass(hass)
+            hass.data.setdefault(DOMAIN, {}).setdefault("metrics", {})[entry.entry_id] = LatencyMetrics(
+                hass, entry.entry_id
+            )
+
+            panel = ZigAlarmPanel(hass, entry, header.get("name") or "replay")
+            panel._pin = RecordedPins(
+                [r["ok"] for r in records if r["t"] == TR_KEYPAD], bool(header.get("master_pin_set"))
+            )
+            component = EntityComponent(_LOGGER, "alarm_control_panel", hass)
+            await component.async_add_entities([panel])
+            await hass.async_block_till_done()
+
+            # Ausgangszustand wie beim Start der Aufzeichnung
+            writes = [0]
+
+            @callback
+            def _count(event: Event) -> None:
+                if event.data.get("entity_id") == panel.entity_id:
+                    writes[0] += 1
+
+            unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _count)
+            trace = TraceRecorder(hass)
+            panel._state = AlarmControlPanelState(header.get("state") or AlarmControlPanelState.DISARMED)
+            panel._last_trigger_entity = header.get("last_trigger_entity")
+            for kind, item in (header.get("deadlines") or {}).items():
+                panel._timers.schedule(kind, item["in"], item.get("data"))
+            panel._trace = trace
+            loop = hass.loop
+            t0 = loop.time()
+
+            events = 0
+            wall0, cpu0 = time.perf_counter(), time.process_time()
+            for rec in records:
+                kind = rec["t"]
+                if kind not in (TR_EVENT, TR_COMMAND):
+                    continue
+                wait = t0 + rec["at"] - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                if kind == TR_EVENT:
+                    events += 1
+                    hass.states.async_set(rec["e"], rec["s"], rec.get("a") or {}, force_update=True)
+                else:
+                    await getattr(panel, COMMANDS[rec["c"]])()
+
+            wait = t0 + end_at - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await hass.async_block_till_done()
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+
+            panel._trace = None
+            unsub()
+            actual = [r for r in trace.records if r["t"] in COMPARED and r["at"] <= end_at]
+            await hass.async_stop(force=True)
+
+    return {
+        "records": actual,
+        "events": events,
+        "output_calls": len(devices.calls),
+        "state_writes": writes[0],
+        "virtual_s": round(end_at, 3),
+        "wall_s": round(wall, 6),
+        "cpu_s": round(cpu, 6),
+        "events_per_s": round(events / wall, 1) if wall else None,
+        "speedup": round(end_at / wall, 1) if wall else None,
+    }
+
+
+def _manifest_version() -> str:
+    try:
+        return json.loads((ROOT / "custom_components/zigalarm/manifest.json").read_text())["version"]
+    except Exception:  # noqa: BLE001
+        return "unknown"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="trace file (.jsonl.gz)")
+    parser.add_argument("--repeat", type=int, default=1, help="replay N times and require identical results")
+    parser.add_argument("--output", default="-", help="JSON output file ('-' for stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    header, records = read_trace(args.trace)
+    expected = [r for r in records if r["t"] in COMPARED]
+
+    runs = []
+    for i in range(max(1, args.repeat)):
+        _LOGGER.info("replay %d/%d: %d records", i + 1, args.repeat, len(records))
+        with asyncio.Runner(loop_factory=VirtualClockLoop) as runner:
+            runs.append(runner.run(_replay(header, records)))
+
+    comparison = _compare(expected, runs[0]["records"])
+    deterministic = all(r["records"] == runs[0]["records"] for r in runs[1:])
+    report = {
+        "version": _manifest_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "trace": str(args.trace),
+        "trace_version": header.get("v"),
+        "comparison": comparison,
+        "deterministic": deterministic,
+        "runs": [{k: v for k, v in run.items() if k != "records"} for run in runs],
+    }
+
+    out = json.dumps(report, indent=2, default=str)
+    if args.output == "-":
+        print(out)
+    else:
+        Path(args.output).write_text(out + "\n")
+    return 0 if comparison["match"] and deterministic else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,64 +1,74 @@
 from __future__ import annotations
 
+import time
 from pathlib import Path
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.components import panel_custom
-from homeassistant.components.http import StaticPathConfig
-
-from .const import (
-    DOMAIN,
-    PLATFORMS,
-    OPT_PERIMETER,
-    OPT_MOTION,
-    OPT_ALWAYS,
-    OPT_SIREN,
-    OPT_SIREN_ENTITIES,
-    OPT_LIGHTS,
-    OPT_LIGHT_COLOR,
-    OPT_LIGHT_BRIGHTNESS,
-    OPT_LIGHT_EFFECT,
-    OPT_LIGHT_RESTORE,
-    OPT_CAMERAS,
-    OPT_CAMERA_SHOW_ONLY_TRIGGERED,
-    OPT_EXIT_DELAY,
-    OPT_ENTRY_DELAY,
-    OPT_TRIGGER_TIME,
-    DEFAULT_EXIT_DELAY,
-    DEFAULT_ENTRY_DELAY,
-    DEFAULT_TRIGGER_TIME,
-    DEFAULT_LIGHT_COLOR,
-    DEFAULT_LIGHT_BRIGHTNESS,
-    DEFAULT_LIGHT_EFFECT,
-    DEFAULT_LIGHT_RESTORE,
-    DEFAULT_CAMERA_SHOW_ONLY_TRIGGERED,
+
+from .const import DOMAIN, PLATFORMS, OPT_MASTER_PIN
+from .assets import FrontendAssets, ZigAlarmAssetView
+from .journal import AlarmJournal
+from .keypad import hash_pin, is_pin_hash
+from .metrics import LatencyMetrics
+from .options import (
+    EXPORT_VERSION,
+    async_build_options,
+    diff_options,
+    export_options,
+    parse_document,
 )
+from .profiler import DEFAULT_PROFILE_DURATION_S, IntegrationProfiler
+from .router import get_router
+from .snapshots import SnapshotStore, ZigAlarmSnapshotView
+from .trace import DEFAULT_MAX_DURATION_S
+from .websocket import async_register_commands
 
 PANEL_URL_PATH = "zigalarm-panel"
-STATIC_URL = "/zigalarm_static"
 STATIC_DIR = Path(__file__).resolve().parent / "frontend"
 
 
-def _uniq_list(value: Any) -> list[str]:
-    out: list[str] = []
-    for x in (value or []):
-        s = str(x).strip()
-        if s and s not in out:
-            out.append(s)
-    return out
+def _entry_from_call(hass: HomeAssistant, data: dict) -> ConfigEntry:
+    entry_id = (data.get("config_entry_id") or "").strip()
+
+    if not entry_id:
+        alarm_entity = (data.get("alarm_entity") or "").strip()
+        if alarm_entity:
+            entry_id = hass.data.get(DOMAIN, {}).get("entity_to_entry", {}).get(alarm_entity, "")
+
+    if not entry_id:
+        raise ValueError("config_entry_id fehlt (Entity prüfen)")
+
+    entry: ConfigEntry | None = hass.config_entries.async_get_entry(entry_id)
+    if not entry or entry.domain != DOMAIN:
+        raise ValueError(f"ConfigEntry nicht gefunden: {entry_id}")
+    return entry
+
+
+def _panel_from_call(hass: HomeAssistant, data: dict):
+    entry = _entry_from_call(hass, data)
+    panel = hass.data.get(DOMAIN, {}).get("panels", {}).get(entry.entry_id)
+    if panel is None:
+        raise ValueError(f"ZigAlarm-Panel nicht geladen: {entry.entry_id}")
+    return panel
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN].setdefault("entity_to_entry", {})
+    get_router(hass)
+    async_register_commands(hass)
+    profiler = hass.data[DOMAIN]["profiler"] = IntegrationProfiler(hass)
 
-    # ✅ Static files MUST be awaited
+    # Frontend: einmal hashen + vorkomprimieren, dann immutable ausliefern
+    assets = FrontendAssets(STATIC_DIR)
     if STATIC_DIR.exists():
-        await hass.http.async_register_static_paths(
-            [StaticPathConfig(STATIC_URL, str(STATIC_DIR), cache_headers=False)]
-        )
+        await hass.async_add_executor_job(assets.load)
+    hass.http.register_view(ZigAlarmAssetView(assets))
+    hass.http.register_view(ZigAlarmSnapshotView(hass))
+    panel_module_url = assets.url("zigalarm-panel.js")
 
     # ✅ Panel register MUST be awaited
     #    (API unterscheidet sich je nach HA-Version)
@@ -67,7 +77,7 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
             hass,
             frontend_url_path=PANEL_URL_PATH,
             webcomponent_name="zigalarm-panel",
-            module_url=f"{STATIC_URL}/zigalarm-panel.js",
+            module_url=panel_module_url,
             sidebar_title="ZigAlarm Panel",
             sidebar_icon="mdi:shield-home",
             require_admin=False,
@@ -77,7 +87,7 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
             hass,
             url_path=PANEL_URL_PATH,
             webcomponent_name="zigalarm-panel",
-            module_url=f"{STATIC_URL}/zigalarm-panel.js",
+            module_url=panel_module_url,
             sidebar_title="ZigAlarm Panel",
             sidebar_icon="mdi:shield-home",
             require_admin=False,
@@ -85,63 +95,161 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
 
     async def handle_set_config(call: ServiceCall) -> None:
         data = dict(call.data or {})
+        entry = _entry_from_call(hass, data)
 
-        entry_id = (data.get("config_entry_id") or "").strip()
-
-        if not entry_id:
-            alarm_entity = (data.get("alarm_entity") or "").strip()
-            if alarm_entity:
-                entry_id = hass.data.get(DOMAIN, {}).get("entity_to_entry", {}).get(alarm_entity, "")
+        options = await async_build_options(hass, data, entry.options)
 
-        if not entry_id:
-            raise ValueError("config_entry_id fehlt (Entity prüfen)")
+        # Übernahme im laufenden Betrieb über den Update-Listener (kein Reload)
+        hass.config_entries.async_update_entry(entry, options=options)
 
-        entry: ConfigEntry | None = hass.config_entries.async_get_entry(entry_id)
-        if not entry:
-            raise ValueError(f"ConfigEntry nicht gefunden: {entry_id}")
+    hass.services.async_register(DOMAIN, "set_config", handle_set_config)
 
-        options = dict(entry.options or {})
+    def _alarm_entity(entry_id: str) -> str | None:
+        for eid, eid_entry in hass.data[DOMAIN].get("entity_to_entry", {}).items():
+            if eid_entry == entry_id:
+                return eid
+        return None
+
+    async def handle_export_config(call: ServiceCall) -> ServiceResponse:
+        wanted = call.data.get("alarm_entity") or []
+        wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+        if wanted:
+            entries = [_entry_from_call(hass, {"alarm_entity": eid}) for eid in wanted]
+        else:
+            entries = hass.config_entries.async_entries(DOMAIN)
+        return {
+            "version": EXPORT_VERSION,
+            "entries": [
+                {
+                    "config_entry_id": entry.entry_id,
+                    "alarm_entity": _alarm_entity(entry.entry_id),
+                    "title": entry.title,
+                    "options": export_options(entry.options),
+                }
+                for entry in entries
+            ],
+        }
+
+    async def handle_import_config(call: ServiceCall) -> ServiceResponse:
+        items = parse_document(call.data.get("document"))
+        dry_run = bool(call.data.get("dry_run"))
+
+        # erst alles prüfen, dann schreiben: ein Fehler -> nichts wird übernommen
+        planned: list[tuple[ConfigEntry, dict[str, Any], list[str]]] = []
+        seen: set[str] = set()
+        for i, item in enumerate(items):
+            # Entry-IDs anderer Installationen -> über die Alarm-Entity zuordnen
+            entry_id = str(item.get("config_entry_id") or "").strip()
+            if entry_id and item.get("alarm_entity") and not hass.config_entries.async_get_entry(entry_id):
+                item = {**item, "config_entry_id": None}
+            try:
+                entry = _entry_from_call(hass, item)
+            except ValueError as err:
+                raise ValueError(f"entries[{i}]: {err}") from err
+            if entry.entry_id in seen:
+                raise ValueError(f"entries[{i}]: {entry.entry_id} ist mehrfach enthalten")
+            seen.add(entry.entry_id)
+            data = {**export_options(entry.options), **item["options"]}
+            try:
+                options = await async_build_options(hass, data, entry.options)
+            except (TypeError, ValueError) as err:
+                raise ValueError(f"entries[{i}] ({entry.title}): {err}") from err
+            planned.append((entry, options, diff_options(entry.options, options, item["options"])))
+
+        changed = {entry.entry_id: keys for entry, _, keys in planned if keys}
+        if not dry_run:
+            # Übernahme wie bei set_config über den Update-Listener (kein Reload)
+            for entry, options, keys in planned:
+                if keys:
+                    hass.config_entries.async_update_entry(
+                        entry, options={**entry.options, **{key: options[key] for key in keys}}
+                    )
+        return {
+            "changed": changed,
+            "unchanged": [entry.entry_id for entry, _, keys in planned if not keys],
+            "dry_run": dry_run,
+        }
+
+    hass.services.async_register(
+        DOMAIN, "export_config", handle_export_config, supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN, "import_config", handle_import_config, supports_response=SupportsResponse.OPTIONAL
+    )
+
+    async def handle_start_trace(call: ServiceCall) -> None:
+        panel = _panel_from_call(hass, dict(call.data or {}))
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = Path(hass.config.path(DOMAIN, "traces", f"{panel.entry.entry_id}-{stamp}.jsonl.gz"))
+        await panel.async_start_trace(path, float(call.data.get("max_duration", DEFAULT_MAX_DURATION_S)))
+
+    async def handle_stop_trace(call: ServiceCall) -> ServiceResponse:
+        panel = _panel_from_call(hass, dict(call.data or {}))
+        summary = await panel.async_stop_trace()
+        return summary or {"path": None, "records": 0}
+
+    hass.services.async_register(DOMAIN, "start_trace", handle_start_trace)
+    hass.services.async_register(
+        DOMAIN, "stop_trace", handle_stop_trace, supports_response=SupportsResponse.OPTIONAL
+    )
+
+    async def handle_start_profiling(call: ServiceCall) -> None:
+        profiler.start(float(call.data.get("max_duration", DEFAULT_PROFILE_DURATION_S)))
+
+    async def handle_stop_profiling(call: ServiceCall) -> ServiceResponse:
+        summary = await profiler.async_stop()
+        return summary or {"path": None, "functions": 0}
+
+    hass.services.async_register(DOMAIN, "start_profiling", handle_start_profiling)
+    hass.services.async_register(
+        DOMAIN, "stop_profiling", handle_stop_profiling, supports_response=SupportsResponse.OPTIONAL
+    )
 
-        options[OPT_PERIMETER] = _uniq_list(data.get("perimeter_sensors"))
-        options[OPT_MOTION] = _uniq_list(data.get("motion_sensors"))
-        options[OPT_ALWAYS] = _uniq_list(data.get("always_sensors"))
+    return True
 
-        options[OPT_SIREN_ENTITIES] = _uniq_list(data.get("siren_entities"))
-        options[OPT_SIREN] = (str(data.get("siren_entity") or "").strip() or None)
 
-        options[OPT_LIGHTS] = _uniq_list(data.get("alarm_lights"))
-        options[OPT_LIGHT_COLOR] = str(data.get("alarm_light_color") or DEFAULT_LIGHT_COLOR)
-        options[OPT_LIGHT_BRIGHTNESS] = int(data.get("alarm_light_brightness") or DEFAULT_LIGHT_BRIGHTNESS)
-        options[OPT_LIGHT_EFFECT] = str(data.get("alarm_light_effect") or DEFAULT_LIGHT_EFFECT)
-        options[OPT_LIGHT_RESTORE] = bool(
-            data.get("alarm_light_restore")
-            if data.get("alarm_light_restore") is not None
-            else DEFAULT_LIGHT_RESTORE
-        )
-
-        options[OPT_CAMERAS] = _uniq_list(data.get("camera_entities"))
-        options[OPT_CAMERA_SHOW_ONLY_TRIGGERED] = bool(
-            data.get("camera_show_only_triggered")
-            if data.get("camera_show_only_triggered") is not None
-            else DEFAULT_CAMERA_SHOW_ONLY_TRIGGERED
-        )
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    data = hass.data.setdefault(DOMAIN, {})
+    data.setdefault("metrics", {})[entry.entry_id] = LatencyMetrics(hass, entry.entry_id)
 
-        options[OPT_EXIT_DELAY] = int(data.get("exit_delay") or DEFAULT_EXIT_DELAY)
-        options[OPT_ENTRY_DELAY] = int(data.get("entry_delay") or DEFAULT_ENTRY_DELAY)
-        options[OPT_TRIGGER_TIME] = int(data.get("trigger_time") or DEFAULT_TRIGGER_TIME)
+    # Klartext-PIN aus älteren Versionen einmalig in einen Hash migrieren
+    pin = entry.options.get(OPT_MASTER_PIN)
+    if pin and not is_pin_hash(pin):
+        hashed = await hass.async_add_executor_job(hash_pin, str(pin))
+        hass.config_entries.async_update_entry(entry, options={**entry.options, OPT_MASTER_PIN: hashed})
 
-        hass.config_entries.async_update_entry(entry, options=options)
-        await hass.config_entries.async_reload(entry.entry_id)
+    journal = AlarmJournal(hass, entry.entry_id)
+    await journal.async_load()
+    data.setdefault("journals", {})[entry.entry_id] = journal
 
-    hass.services.async_register(DOMAIN, "set_config", handle_set_config)
+    snapshots = SnapshotStore(hass, entry.entry_id)
+    await snapshots.async_load()
+    data.setdefault("snapshots", {})[entry.entry_id] = snapshots
 
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
     return True
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    return True
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    panel = hass.data.get(DOMAIN, {}).get("panels", {}).get(entry.entry_id)
+    if panel is None:
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    panel.async_apply_options()
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unloaded:
+        hass.data.get(DOMAIN, {}).get("metrics", {}).pop(entry.entry_id, None)
+        hass.data.get(DOMAIN, {}).get("snapshots", {}).pop(entry.entry_id, None)
+        journal = hass.data.get(DOMAIN, {}).get("journals", {}).pop(entry.entry_id, None)
+        if journal:
+            await journal.async_flush()
+    return unloaded
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await AlarmJournal(hass, entry.entry_id).async_remove()
+    await SnapshotStore(hass, entry.entry_id).async_remove()
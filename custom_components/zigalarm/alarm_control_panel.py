@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import time
 from dataclasses import dataclass
-from typing import Any, Iterable, Optional
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Optional
 
 from homeassistant.components.alarm_control_panel import (
     AlarmControlPanelEntity,
@@ -11,58 +15,61 @@ from homeassistant.components.alarm_control_panel import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback, Event
-from homeassistant.helpers.event import async_track_state_change_event
-from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoredExtraData, RestoreEntity
 
+from .compiled import CompiledConfig, compile_options
 from .const import (
     DOMAIN,
-    OPT_ALWAYS,
-    OPT_ENTRY_DELAY,
-    OPT_EXIT_DELAY,
-    OPT_MOTION,
-    OPT_PERIMETER,
-    OPT_SIREN,
-    OPT_SIREN_ENTITIES,
-    OPT_TRIGGER_TIME,
-    OPT_FORCE_ARM,
-    DEFAULT_ENTRY_DELAY,
-    DEFAULT_EXIT_DELAY,
-    DEFAULT_TRIGGER_TIME,
-    # lights
-    OPT_LIGHTS,
-    OPT_LIGHT_COLOR,
-    OPT_LIGHT_BRIGHTNESS,
-    OPT_LIGHT_EFFECT,
-    OPT_LIGHT_RESTORE,
-    DEFAULT_LIGHT_COLOR,
-    DEFAULT_LIGHT_BRIGHTNESS,
-    DEFAULT_LIGHT_EFFECT,
-    DEFAULT_LIGHT_RESTORE,
-    # cameras
-    OPT_CAMERAS,
-    OPT_CAMERA_SHOW_ONLY_TRIGGERED,
-    DEFAULT_CAMERA_SHOW_ONLY_TRIGGERED,
-    # keypad (optional)
-    OPT_KEYPAD_ENABLED,
-    OPT_KEYPAD_ENTITIES,
-    OPT_ARM_HOME_ACTION,
-    OPT_ARM_AWAY_ACTION,
-    OPT_DISARM_ACTION,
     OPT_MASTER_PIN,
+    SIGNAL_RUNTIME_UPDATED,
+    SUPERVISION_BLOCK,
+    ROLE_PERIMETER,
+    ROLE_MOTION,
+    ROLE_ALWAYS,
+    ROLE_KEYPAD,
 )
-
-
-def _uniq_clean(items: Any) -> list[str]:
-    out: list[str] = []
-    for x in (items or []):
-        s = str(x).strip()
-        if s and s not in out:
-            out.append(s)
-    return out
-
-
-def _domain(entity_id: str) -> str:
-    return entity_id.split(".", 1)[0] if entity_id and "." in entity_id else ""
+from . import journal as jr
+from .keypad import (
+    KEYPAD_ARM_AWAY,
+    KEYPAD_ARM_HOME,
+    KEYPAD_DISARM,
+    KEYPAD_NO_CODE,
+    KEYPAD_NO_PIN,
+    KEYPAD_VERIFY,
+    KeypadLockout,
+    KeypadPress,
+    PinVerifier,
+    parse_keypad_event,
+)
+from .correlator import AlarmCorrelator
+from .flap import DEBOUNCED, QUARANTINED, QUARANTINE_STARTED, FlapGuard
+from .metrics import STAGE_KEYPAD_TO_STATE, LatencyMetrics, TriggerTrace, event_fired_ts
+from .notifications import NotificationFanout
+from .outputs import OUTPUT_FAILED, OutputCall, OutputDispatcher, OutputSupervisor
+from .router import get_router
+from .supervision import SensorSupervisor
+from .scheduler import DL_ARMING, DL_AUTO_STOP, DL_PENDING, DeadlineScheduler
+from .trace import DEFAULT_MAX_DURATION_S, TraceRecorder, trace_attributes
+from .tracker import OpenSensorTracker
+
+_LOGGER = logging.getLogger(__name__)
+
+# Drift-Abgleich des inkrementellen Open-Sensor-Trackers
+RECONCILE_INTERVAL = timedelta(minutes=5)
+
+# Sensor-Änderungen innerhalb dieses Fensters -> ein einziger State-Write
+WRITE_COALESCE_S = 0.25
+
+# Konfiguration kommt über zigalarm/get_config; am State hängen nur Verweise darauf
+UNRECORDED_ATTRIBUTES = frozenset({
+    "config_entry_id",
+    "config_version",
+    "output_status",
+    "last_snapshots",
+    "trigger_cameras",
+})
 
 
 @dataclass
@@ -70,6 +77,10 @@ class ArmedProfile:
     perimeter: bool
     motion: bool
 
+    @property
+    def mask(self) -> int:
+        return (ROLE_PERIMETER if self.perimeter else 0) | (ROLE_MOTION if self.motion else 0)
+
 
 PROFILES = {
     AlarmControlPanelState.ARMED_HOME: ArmedProfile(perimeter=True, motion=False),
@@ -89,6 +100,7 @@ class ZigAlarmPanel(AlarmControlPanelEntity, RestoreEntity):
         | AlarmControlPanelEntityFeature.ARM_AWAY
         | AlarmControlPanelEntityFeature.TRIGGER
     )
+    _unrecorded_attributes = UNRECORDED_ATTRIBUTES
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry, name: str):
         self.hass = hass
@@ -97,20 +109,56 @@ class ZigAlarmPanel(AlarmControlPanelEntity, RestoreEntity):
         self._attr_unique_id = entry.entry_id
 
         self._state: AlarmControlPanelState = AlarmControlPanelState.DISARMED
+        self._cfg: CompiledConfig = compile_options(entry.options)
 
-        self._unsub = None
-        self._arming_task: Optional[asyncio.Task] = None
-        self._pending_task: Optional[asyncio.Task] = None
-        self._trigger_task: Optional[asyncio.Task] = None
+        self._unsub_reconcile = None
+        self._write_handle: Optional[asyncio.TimerHandle] = None
+        # Exit-/Entry-Delay und Sirenen-Auto-Stopp: absolute Deadlines, ein Timer
+        self._timers = DeadlineScheduler(hass, self._on_deadline)
 
         self._last_trigger_entity: Optional[str] = None
-        self._open_sensors: list[str] = []
-        self._ready_home: bool = True
-        self._ready_away: bool = True
+        # Messung der Auslösung, die die Eingangsverzögerung gestartet hat
+        self._pending_trace: Optional[TriggerTrace] = None
+        # alle seit Scharfschalten ausgelösten Sensoren (geordnet), für trigger_cameras
+        self._tripped: dict[str, None] = {}
+        self._tracker = OpenSensorTracker(self._cfg)
+        self._flap = FlapGuard(
+            self._cfg.flap_threshold, self._cfg.flap_window,
+            self._cfg.flap_quarantine, self._cfg.sensor_debounce,
+        )
+        self._flap_handle: Optional[asyncio.TimerHandle] = None
+        # Bestätigungsregeln: Sliding-Windows, O(1) pro Event
+        self._correlator = AlarmCorrelator(self._cfg.confirmation_rules)
+        # stale/unavailable: ein Heap + ein Timer für alle Sensoren
+        self._supervisor = SensorSupervisor(hass, self._on_supervision_change)
 
         # light restore cache (only for light.*)
         self._light_snapshot: dict[str, dict[str, Any]] = {}
 
+        # Keypad: PIN-Prüfung im Executor, Sperre pro Keypad
+        self._pin = PinVerifier(hass, self._cfg.master_pin)
+        self._lockout = KeypadLockout()
+        self._keypad_fired: Optional[float] = None
+
+        self._outputs = OutputDispatcher(hass)
+        # Zustellbestätigung + Retry der Ausgänge, läuft neben der State-Machine
+        self._delivery = OutputSupervisor(hass, self._outputs, self._on_output_change)
+        # Benachrichtigungen: eigene Stufe neben Sirenen/Lichtern, nichts wartet darauf
+        self._notify = NotificationFanout(hass, self._on_notify_failed)
+        self._notify.configure(self._cfg.notify_targets, self._cfg.notify_window, self._cfg.notify_rate)
+        self._journal = hass.data.get(DOMAIN, {}).get("journals", {}).get(entry.entry_id)
+        self._snapshots = hass.data.get(DOMAIN, {}).get("snapshots", {}).get(entry.entry_id)
+        # opt-in Aufzeichnung für Replay; aus = ein None-Check pro Hook
+        self._trace: Optional[TraceRecorder] = None
+        self._trace_stop: Optional[asyncio.TimerHandle] = None
+        self._last_snapshots: list[dict[str, Any]] = []
+        # höchstens eine Aufnahme pro Alarm, erneute Auslösungen hängen sich nicht an
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._metrics: LatencyMetrics = (
+            hass.data.get(DOMAIN, {}).get("metrics", {}).get(entry.entry_id)
+            or LatencyMetrics(hass, entry.entry_id)
+        )
+
     # ---------------------- NO PIN / NO CODE ----------------------
 
     @property
@@ -133,47 +181,45 @@ class ZigAlarmPanel(AlarmControlPanelEntity, RestoreEntity):
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
-        opts = self.entry.options or {}
         return {
             "config_entry_id": self.entry.entry_id,
+            "config_version": self._cfg.version,
+            **self._runtime_attributes(),
+        }
 
-            "perimeter_sensors": _uniq_clean(opts.get(OPT_PERIMETER, [])),
-            "motion_sensors": _uniq_clean(opts.get(OPT_MOTION, [])),
-            "always_sensors": _uniq_clean(opts.get(OPT_ALWAYS, [])),
-
-            "siren_entity": (opts.get(OPT_SIREN) or None),
-            "siren_entities": _uniq_clean(opts.get(OPT_SIREN_ENTITIES, [])),
-
-            "alarm_lights": _uniq_clean(opts.get(OPT_LIGHTS, [])),
-            "alarm_light_color": opts.get(OPT_LIGHT_COLOR, DEFAULT_LIGHT_COLOR),
-            "alarm_light_brightness": int(opts.get(OPT_LIGHT_BRIGHTNESS, DEFAULT_LIGHT_BRIGHTNESS)),
-            "alarm_light_effect": opts.get(OPT_LIGHT_EFFECT, DEFAULT_LIGHT_EFFECT),
-            "alarm_light_restore": bool(opts.get(OPT_LIGHT_RESTORE, DEFAULT_LIGHT_RESTORE)),
-
-            "camera_entities": _uniq_clean(opts.get(OPT_CAMERAS, [])),
-            "camera_show_only_triggered": bool(
-                opts.get(OPT_CAMERA_SHOW_ONLY_TRIGGERED, DEFAULT_CAMERA_SHOW_ONLY_TRIGGERED)
-            ),
+    @property
+    def compiled(self) -> CompiledConfig:
+        return self._cfg
 
-            "exit_delay": int(opts.get(OPT_EXIT_DELAY, DEFAULT_EXIT_DELAY)),
-            "entry_delay": int(opts.get(OPT_ENTRY_DELAY, DEFAULT_ENTRY_DELAY)),
-            "trigger_time": int(opts.get(OPT_TRIGGER_TIME, DEFAULT_TRIGGER_TIME)),
+    @property
+    def notifications(self) -> NotificationFanout:
+        return self._notify
 
+    def _runtime_attributes(self) -> dict[str, Any]:
+        return {
             "last_trigger_entity": self._last_trigger_entity,
-            "open_sensors": self._open_sensors,
-            "ready_to_arm_home": self._ready_home,
-            "ready_to_arm_away": self._ready_away,
-            "force_arm": bool(opts.get(OPT_FORCE_ARM, False)),
-
-
-            "keypad_enabled": bool(opts.get(OPT_KEYPAD_ENABLED, False)),
-            "keypad_entities": _uniq_clean(opts.get(OPT_KEYPAD_ENTITIES, [])),
-            "master_pin": str(opts.get(OPT_MASTER_PIN, "") or ""),
-            "arm_home_action": str(opts.get(OPT_ARM_HOME_ACTION, "arm_home") or "arm_home"),
-            "arm_away_action": str(opts.get(OPT_ARM_AWAY_ACTION, "arm_away") or "arm_away"),
-            "disarm_action": str(opts.get(OPT_DISARM_ACTION, "disarm") or "disarm"),
+            "open_sensors": self._tracker.open_sensors,
+            "ready_to_arm_home": self._ready(AlarmControlPanelState.ARMED_HOME),
+            "ready_to_arm_away": self._ready(AlarmControlPanelState.ARMED_AWAY),
+            "quarantined_sensors": self._flap.quarantined,
+            "faulted_sensors": self._supervisor.faulted,
+            "arming_until": self._timers.deadline(DL_ARMING),
+            "pending_until": self._timers.deadline(DL_PENDING),
+            "outputs_until": self._timers.deadline(DL_AUTO_STOP),
+            "output_status": self._delivery.status,
+            "last_snapshots": self._last_snapshots,
+            "trigger_cameras": self._trigger_cameras(),
+            "tracing": self._trace is not None,
         }
 
+    @property
+    def extra_restore_state_data(self) -> ExtraStoredData:
+        return RestoredExtraData({"deadlines": self._timers.as_dict()})
+
+    def runtime_snapshot(self) -> dict[str, Any]:
+        # nur Live-Felder; Grundlage für die Deltas von zigalarm/subscribe
+        return {"state": self._state, "config_version": self._cfg.version, **self._runtime_attributes()}
+
     async def async_added_to_hass(self) -> None:
         last = await self.async_get_last_state()
         if last and last.state:
@@ -181,97 +227,183 @@ class ZigAlarmPanel(AlarmControlPanelEntity, RestoreEntity):
                 self._state = AlarmControlPanelState(last.state)
             except Exception:
                 self._state = AlarmControlPanelState.DISARMED
+        extra = await self.async_get_last_extra_data()
+        deadlines = (extra.as_dict() if extra else {}).get("deadlines") or {}
 
         self.hass.data.setdefault(DOMAIN, {})
         self.hass.data[DOMAIN].setdefault("entity_to_entry", {})
         self.hass.data[DOMAIN]["entity_to_entry"][self.entity_id] = self.entry.entry_id
+        self.hass.data[DOMAIN].setdefault("panels", {})[self.entry.entry_id] = self
 
         self._install_listeners()
         self._compute_ready()
-        self.async_write_ha_state()
+        self._log_faults(self._supervisor.configure(self._cfg))
+        self._unsub_reconcile = async_track_time_interval(
+            self.hass, self._async_reconcile, RECONCILE_INTERVAL
+        )
+        self._restore_timers(deadlines)
+        self._write_now()
 
     async def async_will_remove_from_hass(self) -> None:
-        if self._unsub:
-            self._unsub()
-            self._unsub = None
-
-        for t in (self._arming_task, self._pending_task, self._trigger_task):
-            if t and not t.done():
-                t.cancel()
+        panels = self.hass.data.get(DOMAIN, {}).get("panels", {})
+        if panels.get(self.entry.entry_id) is self:
+            panels.pop(self.entry.entry_id, None)
+
+        get_router(self.hass).async_unregister(self.entry.entry_id)
+        if self._unsub_reconcile:
+            self._unsub_reconcile()
+            self._unsub_reconcile = None
+        await self.async_stop_trace()
+        if self._snapshot_task is not None and not self._snapshot_task.done():
+            self._snapshot_task.cancel()
+        self._snapshot_task = None
+        self._cancel_write()
+        self._delivery.stop()
+        self._notify.stop()
+        if self._flap_handle is not None:
+            self._flap_handle.cancel()
+            self._flap_handle = None
+
+        self._supervisor.stop()
+        # Deadlines bleiben in den Restore-Daten, nur der Timer stoppt
+        self._timers.stop()
 
     # ---------------------- Helpers ----------------------
 
-    def _install_listeners(self) -> None:
-        if self._unsub:
-            self._unsub()
-            self._unsub = None
-
-        opts = self.entry.options or {}
-        entities = set(self._configured_entities_all())
-
-        if opts.get(OPT_KEYPAD_ENABLED, False):
-            entities |= set(_uniq_clean(opts.get(OPT_KEYPAD_ENTITIES, [])))
+    def _install_listeners(self, cfg: CompiledConfig | None = None) -> None:
+        # gemeinsamer Router: eine Subscription für alle Instanzen
+        cfg = cfg or self._cfg
+        get_router(self.hass).async_register(
+            self.entry.entry_id, self._handle_state_change_event, cfg.roles
+        )
 
-        if not entities:
+    @callback
+    def async_apply_options(self) -> None:
+        # Options-Änderung ohne Reload: Zustand und laufende Timer bleiben erhalten
+        cfg = compile_options(self.entry.options)
+        if cfg == self._cfg:
             return
 
-        self._unsub = async_track_state_change_event(
-            self.hass, list(entities), self._handle_state_change_event
-        )
-
-    def _configured_entities_all(self) -> Iterable[str]:
-        opts = self.entry.options or {}
-        for key in (OPT_PERIMETER, OPT_MOTION, OPT_ALWAYS):
-            for e in _uniq_clean(opts.get(key, [])):
-                yield e
+        self._cfg = cfg
+        self._install_listeners(cfg)
+        self._flap.configure(cfg.flap_threshold, cfg.flap_window, cfg.flap_quarantine, cfg.sensor_debounce)
+        # Flatter-Zustand nur für verbliebene Sensoren; Dauer-Sensoren nie in Quarantäne
+        if self._flap.prune(eid for eid in cfg.watched if not cfg.role(eid) & ROLE_ALWAYS):
+            if self._flap_handle is not None:
+                self._flap_handle.cancel()
+                self._flap_handle = None
+            self._schedule_flap_release()
+        self._pin.configure(cfg.master_pin)
+        self._notify.configure(cfg.notify_targets, cfg.notify_window, cfg.notify_rate)
+        self._correlator.configure(cfg.confirmation_rules)
+        self._tracker.seed(cfg, self._sensor_is_open)
+        self._log_faults(self._supervisor.configure(cfg))
+        self._write_now()
+
+    def _sensor_is_open(self, entity_id: str) -> bool:
+        # Quarantäne = gebrückt: zählt nicht als offen
+        if self._flap.is_quarantined(entity_id):
+            return False
+        st = self.hass.states.get(entity_id)
+        return bool(st and self._cfg.predicate(entity_id)(st, None))
 
     def _compute_ready(self) -> None:
-        opts = self.entry.options or {}
-        perimeter = _uniq_clean(opts.get(OPT_PERIMETER, []))
-        motion = _uniq_clean(opts.get(OPT_MOTION, []))
+        # voller Scan: nur zum Seeden, alles weitere kommt aus den Event-Deltas
+        self._tracker.seed(self._cfg, self._sensor_is_open)
 
-        def is_on(eid: str) -> bool:
-            st = self.hass.states.get(eid)
-            return bool(st and st.state == "on")
+    @callback
+    def _async_reconcile(self, _now=None) -> None:
+        if self._tracker.reconcile(self._sensor_is_open):
+            self._schedule_write()
 
-        open_now = [eid for eid in set(perimeter + motion) if is_on(eid)]
-        self._open_sensors = sorted(open_now)
+    def _arm_mask(self, target: AlarmControlPanelState) -> int:
+        return PROFILES[target].mask | ROLE_ALWAYS
 
-        open_perimeter = [eid for eid in perimeter if is_on(eid)]
-        self._ready_home = len(open_perimeter) == 0
-        self._ready_away = len(self._open_sensors) == 0
+    def _ready(self, target: AlarmControlPanelState) -> bool:
+        ready = self._tracker.ready_home if target == AlarmControlPanelState.ARMED_HOME else self._tracker.ready_away
+        if ready and self._cfg.supervision_mode == SUPERVISION_BLOCK:
+            return not self._supervisor.faulted_in(self._arm_mask(target))
+        return ready
 
     def _is_relevant_trigger(self, entity_id: str) -> bool:
-        opts = self.entry.options or {}
-        always = set(_uniq_clean(opts.get(OPT_ALWAYS, [])))
+        role = self._cfg.role(entity_id)
 
-        if entity_id in always:
+        if role & ROLE_ALWAYS:
             return True
 
-        if self._state in (AlarmControlPanelState.ARMED_HOME, AlarmControlPanelState.ARMED_AWAY):
-            profile = PROFILES[self._state]
-            if profile.perimeter and entity_id in set(_uniq_clean(opts.get(OPT_PERIMETER, []))):
-                return True
-            if profile.motion and entity_id in set(_uniq_clean(opts.get(OPT_MOTION, []))):
-                return True
-
-        return False
+        profile = PROFILES.get(self._state)
+        return bool(profile and role & profile.mask)
 
-    def _cancel_tasks(self) -> None:
-        for attr in ("_arming_task", "_pending_task", "_trigger_task"):
-            t = getattr(self, attr)
-            if t and not t.done():
-                t.cancel()
-            setattr(self, attr, None)
+    def _note_tripped(self, entity_id: str) -> None:
+        if entity_id in self._tripped:
+            return
+        self._tripped[entity_id] = None
+        # neue Kameras fürs Popup nachreichen
+        if entity_id in self._cfg.camera_map:
+            self._schedule_write()
+
+    def _trigger_cameras(self) -> list[str]:
+        # Kameras des letzten Auslösers zuerst, dann die der übrigen ausgelösten Sensoren
+        if not self._tripped or not self._cfg.camera_map:
+            return []
+        first = [self._last_trigger_entity] if self._last_trigger_entity else []
+        return self._cfg.cameras_for([*first, *self._tripped])
+
+    def _cancel_timers(self) -> None:
+        self._timers.cancel_all()
+        self._pending_trace = None
+
+    def _log(self, kind: str, entities: list[str] | None = None, **data: Any) -> None:
+        if self._journal is None:
+            return
+        ctx = self._context
+        if ctx is not None and ctx.user_id and "user_id" not in data:
+            data["user_id"] = ctx.user_id
+        self._journal.add(kind, entities, **data)
 
     def _set_state(self, st: AlarmControlPanelState) -> None:
         self._state = st
+        if self._trace is not None:
+            self._trace.state(st)
+        self._write_now()
+        if self._keypad_fired is not None:
+            self._metrics.record_stage(STAGE_KEYPAD_TO_STATE, (time.time() - self._keypad_fired) * 1000.0)
+            self._keypad_fired = None
+
+    # ---------------------- State Writes ----------------------
+
+    def _schedule_write(self) -> None:
+        # open-Set/Readiness: Änderungen im Fenster zusammenfassen
+        if self._write_handle is None:
+            self._write_handle = self.hass.loop.call_later(WRITE_COALESCE_S, self._flush_write)
+
+    @callback
+    def _flush_write(self) -> None:
+        self._write_handle = None
         self.async_write_ha_state()
+        self._publish()
+
+    def _cancel_write(self) -> None:
+        if self._write_handle is not None:
+            self._write_handle.cancel()
+            self._write_handle = None
+
+    def _write_now(self) -> None:
+        # Alarm-Zustand: sofort schreiben (nimmt ausstehende Änderungen mit)
+        self._cancel_write()
+        self.async_write_ha_state()
+        self._publish()
+
+    def _publish(self) -> None:
+        async_dispatcher_send(
+            self.hass, SIGNAL_RUNTIME_UPDATED.format(self.entry.entry_id), self.runtime_snapshot()
+        )
 
     # ---------------------- Event Handling ----------------------
 
     @callback
-    def _handle_state_change_event(self, event: Event) -> None:
+    def _handle_state_change_event(self, event: Event, role: int | None = None) -> None:
+        t_handler = time.time()
         new_state = event.data.get("new_state")
         if not new_state:
             return
@@ -280,153 +412,412 @@ class ZigAlarmPanel(AlarmControlPanelEntity, RestoreEntity):
         if not entity_id:
             return
 
-        self._compute_ready()
-        self.async_write_ha_state()
+        if self._trace is not None:
+            self._trace.event(entity_id, new_state)
+
+        if role is None:
+            role = self._cfg.role(entity_id)
+        if role & ROLE_KEYPAD:
+            self._handle_keypad_event(event, entity_id, new_state)
+            if role == ROLE_KEYPAD:
+                return
 
-        # Only trigger on "on"
-        if new_state.state != "on":
+        change = self._supervisor.seen(entity_id, new_state.state)
+        if change:
+            # Tracker folgt unten mit diesem Event
+            self._log_faults([change])
+            self._schedule_write()
+
+        # eine Auswertung pro Event, genutzt von Flap-Guard, Tracker und Trigger
+        old_state = event.data.get("old_state")
+        predicate = self._cfg.predicate(entity_id)
+        is_on = predicate(new_state, old_state)
+        # echter Wechsel; bei reinen Attribut-Updates nur, wenn sich is_on ändert
+        changed = (
+            old_state is None
+            or old_state.state != new_state.state
+            or predicate(old_state, None) != is_on
+        )
+
+        # Flatter-Schutz: Sensoren in Quarantäne kosten nur diesen Check
+        verdict = self._flap.check(
+            entity_id, self.hass.loop.time(), is_on, changed, exempt=bool(role & ROLE_ALWAYS)
+        )
+        if verdict == QUARANTINED:
             return
+        if verdict == QUARANTINE_STARTED:
+            self._on_quarantine_started(entity_id)
+            return
+
+        if self._tracker.update(entity_id, is_on):
+            self._schedule_write()
 
-        opts = self.entry.options or {}
+        # nur auslösen, wenn die Trigger-Bedingung erfüllt ist
+        if not is_on or verdict == DEBOUNCED:
+            return
 
-        always = set(_uniq_clean(opts.get(OPT_ALWAYS, [])))
-        if entity_id in always:
+        if role & ROLE_ALWAYS:
             self._last_trigger_entity = entity_id
-            self.hass.async_create_task(self.async_alarm_trigger())
+            self._note_tripped(entity_id)
+            trace = self._metrics.begin(entity_id, event, t_handler)
+            self.hass.async_create_task(self._async_trigger(trace))
             return
 
         if self._state == AlarmControlPanelState.TRIGGERED:
+            # während des Alarms zählt jeder Sensor für die Kameraauswahl
+            self._note_tripped(entity_id)
             return
 
         if not self._is_relevant_trigger(entity_id):
             return
 
-        self._last_trigger_entity = entity_id
-
-        entry_delay = int(opts.get(OPT_ENTRY_DELAY, DEFAULT_ENTRY_DELAY))
         if self._state == AlarmControlPanelState.PENDING:
+            self._last_trigger_entity = entity_id
+            self._note_tripped(entity_id)
             return
 
+        # Rollen mit Bestätigungsregel lösen erst aus, wenn eine Regel greift
+        rule = None
+        active = PROFILES[self._state].mask
+        if self._correlator.requires_confirmation(role, active):
+            rule = self._correlator.observe(entity_id, role, self.hass.loop.time(), active)
+            if rule is None:
+                _LOGGER.debug("%s: trigger from %s awaiting confirmation", self.entity_id, entity_id)
+                return
+
+        self._last_trigger_entity = entity_id
+        self._note_tripped(entity_id)
+        trace = self._metrics.begin(entity_id, event, t_handler)
+        self._log(
+            jr.EV_PENDING, [entity_id], entry_delay=self._cfg.entry_delay, armed=self._state,
+            rule=rule.name if rule else None,
+        )
+        self._start_pending(self._cfg.entry_delay)
         self._set_state(AlarmControlPanelState.PENDING)
-        self._start_pending(entry_delay)
+        trace.mark_state(AlarmControlPanelState.PENDING)
+        self._metrics.record(trace)
+        self._pending_trace = trace
 
-    # ---------------------- Timers ----------------------
+    # ---------------------- Keypad ----------------------
 
-    def _start_pending(self, delay_s: int) -> None:
-        async def _pending():
-            try:
-                await asyncio.sleep(max(0, int(delay_s)))
-                await self.async_alarm_trigger()
-            except asyncio.CancelledError:
-                return
+    def _handle_keypad_event(self, event: Event, entity_id: str, new_state) -> None:
+        # erstes State-Objekt nach Start/Reload ist kein Tastendruck
+        if event.data.get("old_state") is None:
+            return
+        press = parse_keypad_event(entity_id, new_state, self._cfg)
+        if press is None:
+            return
+        fired = event_fired_ts(event) or time.time()
+        self.hass.async_create_task(self._async_keypad(press, fired))
+
+    async def _async_keypad(self, press: KeypadPress, fired: float) -> None:
+        eid = press.entity_id
+        until = self._lockout.locked_until(eid, self.hass.loop.time())
+        if until is not None:
+            _LOGGER.warning("%s: keypad %s locked, ignoring %s", self.entity_id, eid, press.action)
+            self._log(jr.EV_KEYPAD_LOCKED, [eid], action=press.action)
+            return
 
-        self._pending_task = asyncio.create_task(_pending())
+        check = self._pin.triage(press.action, press.code)
+        if check == KEYPAD_NO_PIN:
+            _LOGGER.warning("%s: keypad %s cannot %s without a master PIN", self.entity_id, eid, press.action)
+            self._log(jr.EV_KEYPAD_DENIED, [eid], action=press.action, reason=check)
+            return
+        if check == KEYPAD_NO_CODE:
+            # kein Code eingegeben: abgelehnt, aber kein Fehlversuch für die Sperre
+            _LOGGER.warning("%s: keypad %s sent %s without a code", self.entity_id, eid, press.action)
+            self._log(jr.EV_KEYPAD_DENIED, [eid], action=press.action, reason=check)
+            return
 
-    def _start_arming(self, target: AlarmControlPanelState, delay_s: int) -> None:
-        self._set_state(AlarmControlPanelState.ARMING)
+        ok = True
+        if check == KEYPAD_VERIFY:
+            ok = await self._pin.async_verify(press.code)
+            if self._trace is not None:
+                self._trace.keypad(eid, ok)
+        if not ok:
+            lock = self._lockout.failure(eid, self.hass.loop.time())
+            locked_for = round(lock - self.hass.loop.time()) if lock is not None else None
+            _LOGGER.warning("%s: wrong PIN on keypad %s (locked for %ss)", self.entity_id, eid, locked_for or 0)
+            self._log(jr.EV_KEYPAD_DENIED, [eid], action=press.action, locked_for=locked_for)
+            return
+        self._lockout.success(eid)
 
-        async def _arming():
-            try:
-                await asyncio.sleep(max(0, int(delay_s)))
-                self._set_state(target)
-            except asyncio.CancelledError:
-                return
+        self._log(jr.EV_KEYPAD, [eid], action=press.action)
+        self._keypad_fired = fired
+        try:
+            if press.action == KEYPAD_DISARM:
+                await self.async_alarm_disarm()
+            elif press.action == KEYPAD_ARM_HOME:
+                await self.async_alarm_arm_home()
+            elif press.action == KEYPAD_ARM_AWAY:
+                await self.async_alarm_arm_away()
+        finally:
+            self._keypad_fired = None
+
+    # ---------------------- Supervision ----------------------
+
+    @callback
+    def _on_supervision_change(self, changes: list[tuple[str, str | None]]) -> None:
+        # aus Heap/state_reported: ohne state_changed nur den betroffenen Sensor nachführen
+        self._log_faults(changes)
+        for eid, reason in changes:
+            if reason is None:
+                self._tracker.update(eid, self._sensor_is_open(eid))
+        self._schedule_write()
+
+    def _log_faults(self, changes: list[tuple[str, str | None]]) -> None:
+        for eid, reason in changes:
+            if reason is None:
+                _LOGGER.info("%s: sensor %s reports again", self.entity_id, eid)
+                self._log(jr.EV_SENSOR_RESTORED, [eid])
+            else:
+                _LOGGER.warning("%s: sensor %s is %s", self.entity_id, eid, reason)
+                self._log(jr.EV_SENSOR_FAULT, [eid], reason=reason)
+
+    # ---------------------- Flap Quarantine ----------------------
+
+    def _on_quarantine_started(self, entity_id: str) -> None:
+        _LOGGER.warning("%s: sensor %s is flapping, quarantined (bypassed)", self.entity_id, entity_id)
+        self._log(jr.EV_QUARANTINE, [entity_id])
+        self._tracker.update(entity_id, False)
+        self._schedule_flap_release()
+        self._schedule_write()
+
+    def _schedule_flap_release(self) -> None:
+        # ein einziger Timer für die nächste Freigabe
+        if self._flap_handle is not None:
+            return
+        nxt = self._flap.next_release()
+        if nxt is not None:
+            self._flap_handle = self.hass.loop.call_at(nxt, self._release_quarantine)
 
-        self._arming_task = asyncio.create_task(_arming())
+    @callback
+    def _release_quarantine(self) -> None:
+        self._flap_handle = None
+        released = self._flap.release_expired(self.hass.loop.time())
+        for eid in released:
+            _LOGGER.info("%s: sensor %s released from quarantine", self.entity_id, eid)
+            self._log(jr.EV_QUARANTINE_RELEASE, [eid])
+            self._tracker.update(eid, self._sensor_is_open(eid))
+        if released:
+            self._schedule_write()
+        self._schedule_flap_release()
+
+    # ---------------------- Timers ----------------------
+
+    def _start_pending(self, delay_s: int) -> None:
+        self._timers.schedule(DL_PENDING, max(0, int(delay_s)))
+
+    def _start_arming(self, target: AlarmControlPanelState, delay_s: int,
+                      faulted: list[str] | None = None) -> None:
+        self._log(jr.EV_ARMING, mode=target, exit_delay=delay_s, faulted=faulted)
+        self._correlator.reset()
+        self._tripped.clear()
+        self._timers.schedule(DL_ARMING, max(0, int(delay_s)), str(target))
+        self._set_state(AlarmControlPanelState.ARMING)
+
+    @callback
+    def _on_deadline(self, kind: str, data: Any) -> None:
+        if self._trace is not None:
+            self._trace.deadline(kind)
+        if kind == DL_ARMING:
+            target = AlarmControlPanelState(data)
+            self._log(jr.EV_ARMED, mode=target)
+            self._set_state(target)
+        elif kind == DL_PENDING:
+            trace, self._pending_trace = self._pending_trace, None
+            # Auslöser bleibt der zuletzt gemeldete Sensor (wie ohne Messung)
+            trace = trace.after_delay(self._last_trigger_entity) if trace else None
+            self.hass.async_create_task(self._async_trigger(trace))
+        elif kind == DL_AUTO_STOP:
+            self._log(jr.EV_AUTO_STOP, list(self._cfg.sirens), after_s=self._cfg.trigger_time)
+            self.hass.async_create_task(self._sirens_off())
+            self._write_now()
+
+    def _restore_timers(self, deadlines: dict[str, Any]) -> None:
+        # nach Neustart mit der Restzeit weiterlaufen (abgelaufene feuern sofort)
+        if self._state == AlarmControlPanelState.ARMING and DL_ARMING not in deadlines:
+            _LOGGER.warning("%s: restored 'arming' without exit deadline, disarming", self.entity_id)
+            self._state = AlarmControlPanelState.DISARMED
+        elif self._state == AlarmControlPanelState.PENDING and DL_PENDING not in deadlines:
+            deadlines = {**deadlines, DL_PENDING: {"deadline": self._timers.now() + self._cfg.entry_delay}}
+        self._timers.restore(deadlines)
 
     # ---------------------- Actions ----------------------
 
+    def _trace_command(self, name: str) -> None:
+        # Keypad-Befehle entstehen beim Replay aus den Keypad-Events selbst
+        if self._trace is not None and self._keypad_fired is None:
+            self._trace.command(name)
+
     async def async_alarm_disarm(self, code: str | None = None) -> None:
-        self._cancel_tasks()
+        self._trace_command("disarm")
+        self._cancel_timers()
+        self._log(jr.EV_DISARM, previous=self._state)
+        self._correlator.reset()
+        self._notify.reset()
+        self._tripped.clear()
         self._set_state(AlarmControlPanelState.DISARMED)
 
         # ✅ Wunsch: bei Unscharf alles aus
-        await self._sirens_off()
-        await self._alarm_lights_restore_or_off()
+        await self._outputs_off()
 
     async def async_alarm_arm_home(self, code: str | None = None) -> None:
-        self._cancel_tasks()
-        self._compute_ready()
-        
-        force = bool(self.entry.options.get(OPT_FORCE_ARM, False))
-        if not self._ready_home and not force:
-            return
-        exit_delay = int((self.entry.options or {}).get(OPT_EXIT_DELAY, DEFAULT_EXIT_DELAY))
-        self._start_arming(AlarmControlPanelState.ARMED_HOME, exit_delay)
+        self._trace_command("arm_home")
+        self._arm(AlarmControlPanelState.ARMED_HOME)
 
     async def async_alarm_arm_away(self, code: str | None = None) -> None:
-        self._cancel_tasks()
-        self._compute_ready()
-        
-        force = bool(self.entry.options.get(OPT_FORCE_ARM, False))
-        if not self._ready_away and not force:
+        self._trace_command("arm_away")
+        self._arm(AlarmControlPanelState.ARMED_AWAY)
+
+    def _arm(self, target: AlarmControlPanelState) -> None:
+        self._cancel_timers()
+        self._async_reconcile()
+
+        ready = self._tracker.ready_home if target == AlarmControlPanelState.ARMED_HOME else self._tracker.ready_away
+        if not ready and not self._cfg.force_arm:
+            self._log(jr.EV_ARM_BLOCKED, self._tracker.open_sensors, mode=target)
             return
-        exit_delay = int((self.entry.options or {}).get(OPT_EXIT_DELAY, DEFAULT_EXIT_DELAY))
-        self._start_arming(AlarmControlPanelState.ARMED_AWAY, exit_delay)
+
+        faulted = self._supervisor.faulted_in(self._arm_mask(target))
+        if faulted:
+            if self._cfg.supervision_mode == SUPERVISION_BLOCK:
+                _LOGGER.warning("%s: arming blocked, faulted sensors: %s", self.entity_id, ", ".join(faulted))
+                self._log(jr.EV_ARM_BLOCKED, faulted, mode=target, reason="faulted")
+                return
+            _LOGGER.warning("%s: arming with faulted sensors: %s", self.entity_id, ", ".join(faulted))
+        self._start_arming(target, self._cfg.exit_delay, faulted or None)
 
     async def async_alarm_trigger(self, code: str | None = None) -> None:
-        self._cancel_tasks()
+        self._trace_command("trigger")
+        await self._async_trigger()
+
+    async def _async_trigger(self, trace: TriggerTrace | None = None) -> None:
+        trace = trace or self._metrics.begin(self._last_trigger_entity)
+        new_alarm = self._state != AlarmControlPanelState.TRIGGERED
+        self._cancel_timers()
+        self._log(jr.EV_TRIGGER, [trace.entity_id] if trace.entity_id else None, previous=self._state)
+        if new_alarm:
+            self._last_snapshots = []
+        # vor dem Dispatch planen: ein Unscharf währenddessen hebt ihn wieder auf
+        self._timers.schedule(DL_AUTO_STOP, max(1, int(self._cfg.trigger_time)))
         self._set_state(AlarmControlPanelState.TRIGGERED)
+        trace.mark_state(AlarmControlPanelState.TRIGGERED)
+        # erneute Auslösungen landen in derselben Sammelnachricht
+        self._notify.trigger(trace.entity_id, self.name)
+        # Beweisbilder parallel zu den Ausgängen, nichts wartet darauf;
+        # nur beim Eintritt in TRIGGERED und nie parallel zu einer laufenden Aufnahme
+        if (
+            new_alarm
+            and self._snapshots is not None
+            and self._cfg.cameras
+            and (self._snapshot_task is None or self._snapshot_task.done())
+        ):
+            self._snapshot_task = self.hass.async_create_task(self._async_snapshots())
+
+        await self._outputs_on()
+        trace.mark_outputs()
+        self._metrics.record(trace)
+
+    async def _async_snapshots(self) -> None:
+        snaps, failed = await self._snapshots.async_capture(self._cfg.cameras)
+        if snaps:
+            self._last_snapshots = [self._snapshots.describe(s) for s in snaps]
+            self._schedule_write()
+        self._log(jr.EV_SNAPSHOTS, [s.camera for s in snaps], ids=[s.id for s in snaps] or None,
+                  failed=failed or None)
+
+    # ---------------------- Trace ----------------------
+
+    async def async_start_trace(self, path: Path | None,
+                                max_duration: float = DEFAULT_MAX_DURATION_S) -> None:
+        await self.async_stop_trace()
+        trace = TraceRecorder(self.hass, path)
+        options = dict(self.entry.options or {})
+        pin = options.pop(OPT_MASTER_PIN, None)
+        now = self._timers.now()
+        states = {}
+        for eid in sorted(self._cfg.watched):
+            st = self.hass.states.get(eid)
+            if st is not None:
+                states[eid] = {"s": st.state, "a": trace_attributes(st.attributes)}
+        trace.header(
+            entry_id=self.entry.entry_id,
+            name=self.name,
+            started=time.time(),
+            options=options,
+            master_pin_set=bool(pin),
+            state=self._state,
+            last_trigger_entity=self._last_trigger_entity,
+            deadlines={
+                kind: {"in": round(item["deadline"] - now, 3), "data": item["data"]}
+                for kind, item in self._timers.as_dict().items()
+            },
+            states=states,
+        )
+        self._trace = trace
+        if max_duration:
+            self._trace_stop = self.hass.loop.call_later(
+                max_duration, lambda: self.hass.async_create_task(self.async_stop_trace())
+            )
+        _LOGGER.info("%s: trace started (%s)", self.entity_id, path or "memory")
+        self._schedule_write()
+
+    async def async_stop_trace(self) -> dict[str, Any] | None:
+        if self._trace_stop is not None:
+            self._trace_stop.cancel()
+            self._trace_stop = None
+        trace, self._trace = self._trace, None
+        if trace is None:
+            return None
+        summary = await trace.async_close()
+        _LOGGER.info("%s: trace stopped, %d records in %s", self.entity_id, summary["records"], summary["path"])
+        self._schedule_write()
+        return summary
+
+    # ---------------------- Outputs ----------------------
+
+    async def _dispatch(self, *stages: list[OutputCall], kind: str | None = None) -> None:
+        self._delivery.watch(c for stage in stages for c in stage)
+        if self._trace is not None:
+            self._trace.outputs(stages)
+        result = await self._outputs.async_dispatch(*stages)
+        self._metrics.record_dispatch(result)
+        if kind and result.targets:
+            targets = [c.entity_id for stage in stages for c in stage]
+            self._log(kind, targets, duration_ms=result.duration_ms, errors=result.errors or None)
 
-        await self._alarm_lights_on()
-        await self._sirens_on()
+    @callback
+    def _on_output_change(self, changes: list[tuple[str, str]]) -> None:
+        failed = [eid for eid, state in changes if state == OUTPUT_FAILED]
+        if failed:
+            _LOGGER.warning("%s: outputs not confirmed: %s", self.entity_id, ", ".join(failed))
+            self._log(jr.EV_OUTPUT_FAILED, failed)
+        self._schedule_write()
 
-        trigger_time = int((self.entry.options or {}).get(OPT_TRIGGER_TIME, DEFAULT_TRIGGER_TIME))
+    @callback
+    def _on_notify_failed(self, targets: list[str]) -> None:
+        self._log(jr.EV_NOTIFY_FAILED, targets)
 
-        async def _auto_stop_outputs():
-            try:
-                await asyncio.sleep(max(1, int(trigger_time)))
-                await self._sirens_off()
-            except asyncio.CancelledError:
-                return
+    async def _outputs_on(self) -> None:
+        # Sirenen immer vor den Lichtern
+        await self._dispatch(self._siren_calls("turn_on"), self._alarm_light_on_calls(), kind=jr.EV_OUTPUTS_ON)
 
-        self._trigger_task = asyncio.create_task(_auto_stop_outputs())
+    async def _outputs_off(self) -> None:
+        await self._dispatch(
+            self._siren_calls("turn_off"), self._alarm_light_off_calls(), kind=jr.EV_OUTPUTS_OFF
+        )
 
-    # ---------------------- Outputs: Sirens ----------------------
+    async def _sirens_off(self) -> None:
+        await self._dispatch(self._siren_calls("turn_off"))
 
-    def _get_sirens(self) -> list[str]:
-        opts = self.entry.options or {}
-        sirens = _uniq_clean(opts.get(OPT_SIREN_ENTITIES, []))
-        legacy = str(opts.get(OPT_SIREN) or "").strip()
-        if legacy and legacy not in sirens:
-            sirens.append(legacy)
-        return sirens
-
-    async def _sirens_on(self) -> None:
-        for ent in self._get_sirens():
-            dom = _domain(ent)
-            if dom not in ("switch", "siren", "light"):
-                dom = "switch"
-            await self.hass.services.async_call(dom, "turn_on", {"entity_id": ent}, blocking=False)
+    # ---------------------- Outputs: Sirens ----------------------
 
-    async def _sirens_off(self) -> None:
-        for ent in self._get_sirens():
-            dom = _domain(ent)
-            if dom not in ("switch", "siren", "light"):
-                dom = "switch"
-            await self.hass.services.async_call(dom, "turn_off", {"entity_id": ent}, blocking=False)
+    def _siren_calls(self, service: str) -> list[OutputCall]:
+        return [OutputCall(dom, service, ent) for dom, ents in self._cfg.siren_groups for ent in ents]
 
     # ---------------------- Outputs: Alarm Lights ----------------------
 
-    def _parse_hex_color(self, hex_color: str) -> tuple[int, int, int] | None:
-        if not hex_color:
-            return None
-        s = str(hex_color).strip()
-        if not s.startswith("#"):
-            return None
-        s = s[1:]
-        if len(s) == 3:
-            s = "".join([c * 2 for c in s])
-        if len(s) != 6:
-            return None
-        try:
-            r = int(s[0:2], 16)
-            g = int(s[2:4], 16)
-            b = int(s[4:6], 16)
-            return (r, g, b)
-        except Exception:
-            return None
-
     def _snapshot_light(self, entity_id: str) -> None:
         st = self.hass.states.get(entity_id)
         if not st:
@@ -442,73 +833,44 @@ class ZigAlarmPanel(AlarmControlPanelEntity, RestoreEntity):
             "xy_color": attrs.get("xy_color"),
         }
 
-    async def _alarm_lights_on(self) -> None:
-        opts = self.entry.options or {}
-        entities = _uniq_clean(opts.get(OPT_LIGHTS, []))
-        if not entities:
-            return
+    def _alarm_light_on_calls(self) -> list[OutputCall]:
+        cfg = self._cfg
+        if not cfg.lights:
+            return []
 
         # Snapshot only for light.*
-        if bool(opts.get(OPT_LIGHT_RESTORE, DEFAULT_LIGHT_RESTORE)):
+        if cfg.light_restore:
             self._light_snapshot = {}
-            for eid in entities:
-                if _domain(eid) == "light":
-                    self._snapshot_light(eid)
-
-        light_entities = [e for e in entities if _domain(e) == "light"]
-        other_entities = [e for e in entities if _domain(e) in ("switch", "siren")]
-
-        # turn on non-light (z.B. Kamera-Spotlight als switch.*)
-        for eid in other_entities:
-            dom = _domain(eid)
-            await self.hass.services.async_call(dom, "turn_on", {"entity_id": eid}, blocking=False)
-
-        # turn on lights with settings
-        if light_entities:
-            rgb = self._parse_hex_color(str(opts.get(OPT_LIGHT_COLOR, DEFAULT_LIGHT_COLOR)))
-            brightness = int(opts.get(OPT_LIGHT_BRIGHTNESS, DEFAULT_LIGHT_BRIGHTNESS) or DEFAULT_LIGHT_BRIGHTNESS)
-            effect = str(opts.get(OPT_LIGHT_EFFECT, DEFAULT_LIGHT_EFFECT) or "").strip()
-
-            data: dict[str, Any] = {"entity_id": light_entities}
-            if rgb:
-                data["rgb_color"] = list(rgb)
-            if 1 <= brightness <= 255:
-                data["brightness"] = brightness
-            if effect:
-                data["effect"] = effect
-
-            await self.hass.services.async_call("light", "turn_on", data, blocking=False)
-
-    async def _alarm_lights_restore_or_off(self) -> None:
-        opts = self.entry.options or {}
-        entities = _uniq_clean(opts.get(OPT_LIGHTS, []))
-        if not entities:
-            return
+            for eid in cfg.light_entities:
+                self._snapshot_light(eid)
+
+        # non-light (z.B. Kamera-Spotlight als switch.*) + lights with settings
+        calls = [OutputCall(dom, "turn_on", eid) for dom, ents in cfg.light_other_groups for eid in ents]
+        calls += [OutputCall("light", "turn_on", eid, cfg.light_on_data) for eid in cfg.light_entities]
+        return calls
+
+    def _alarm_light_off_calls(self) -> list[OutputCall]:
+        cfg = self._cfg
+        if not cfg.lights:
+            return []
 
         # non-light immer aus
-        for eid in entities:
-            dom = _domain(eid)
-            if dom in ("switch", "siren"):
-                await self.hass.services.async_call(dom, "turn_off", {"entity_id": eid}, blocking=False)
+        calls = [OutputCall(dom, "turn_off", eid) for dom, ents in cfg.light_other_groups for eid in ents]
 
-        # lights restore or off
-        if bool(opts.get(OPT_LIGHT_RESTORE, DEFAULT_LIGHT_RESTORE)) and self._light_snapshot:
+        # lights restore or off (gleiche Snapshots landen im selben Call)
+        if cfg.light_restore and self._light_snapshot:
             for eid, snap in self._light_snapshot.items():
-                try:
-                    if snap.get("state") == "off":
-                        await self.hass.services.async_call("light", "turn_off", {"entity_id": eid}, blocking=False)
-                    else:
-                        data: dict[str, Any] = {"entity_id": eid}
-                        for k in ("brightness", "rgb_color", "effect", "color_temp", "hs_color", "xy_color"):
-                            v = snap.get(k)
-                            if v is not None:
-                                data[k] = v
-                        await self.hass.services.async_call("light", "turn_on", data, blocking=False)
-                except Exception:
+                if snap.get("state") == "off":
+                    calls.append(OutputCall("light", "turn_off", eid))
                     continue
+                data = {
+                    k: snap[k]
+                    for k in ("brightness", "rgb_color", "effect", "color_temp", "hs_color", "xy_color")
+                    if snap.get(k) is not None
+                }
+                calls.append(OutputCall("light", "turn_on", eid, data))
             self._light_snapshot = {}
         else:
             # restore aus -> lights einfach aus
-            light_entities = [e for e in entities if _domain(e) == "light"]
-            if light_entities:
-                await self.hass.services.async_call("light", "turn_off", {"entity_id": light_entities}, blocking=False)
+            calls += [OutputCall("light", "turn_off", eid) for eid in cfg.light_entities]
+        return calls
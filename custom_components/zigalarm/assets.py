@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+from aiohttp import hdrs, web
+
+from homeassistant.components.http import HomeAssistantView
+
+try:  # optional: HA bringt brotli meist mit, Pflicht ist es nicht
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+_LOGGER = logging.getLogger(__name__)
+
+ASSET_URL = "/zigalarm_static"
+
+# Inhalt unter gehashter URL ändert sich nie -> Browser darf dauerhaft cachen
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDATE = "no-cache"
+
+_CONTENT_TYPES = {
+    ".js": "application/javascript; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".json": "application/json",
+}
+
+
+@dataclass(frozen=True)
+class Asset:
+    name: str
+    digest: str
+    content_type: str
+    raw: bytes
+    gzip: bytes
+    br: bytes | None
+
+
+def _build_asset(path: Path) -> Asset:
+    raw = path.read_bytes()
+    return Asset(
+        name=path.name,
+        digest=hashlib.sha256(raw).hexdigest()[:12],
+        content_type=_CONTENT_TYPES[path.suffix],
+        raw=raw,
+        gzip=gzip.compress(raw, compresslevel=9, mtime=0),
+        br=brotli.compress(raw) if brotli is not None else None,
+    )
+
+
+# Wird einmal beim Start im Executor gebaut: Hash + vorkomprimierte Varianten
+# pro Datei, danach liefert die View nur noch Bytes aus dem Speicher.
+class FrontendAssets:
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._assets: dict[str, Asset] = {}
+
+    def load(self) -> None:
+        assets = {}
+        for path in sorted(self.directory.iterdir()):
+            if path.is_file() and path.suffix in _CONTENT_TYPES:
+                assets[path.name] = _build_asset(path)
+        self._assets = assets
+        _LOGGER.debug("Loaded %d frontend assets (brotli: %s)", len(assets), brotli is not None)
+
+    def get(self, name: str) -> Asset | None:
+        return self._assets.get(name)
+
+    def url(self, name: str) -> str:
+        asset = self._assets.get(name)
+        digest = asset.digest if asset else "0"
+        return f"{ASSET_URL}/{digest}/{name}"
+
+
+class ZigAlarmAssetView(HomeAssistantView):
+    url = ASSET_URL + "/{digest}/{filename}"
+    name = "zigalarm:assets"
+    requires_auth = False
+
+    def __init__(self, assets: FrontendAssets) -> None:
+        self._assets = assets
+
+    async def get(self, request: web.Request, digest: str, filename: str) -> web.Response:
+        asset = self._assets.get(filename)
+        if asset is None:
+            return web.Response(status=404)
+
+        etag = f'"{asset.digest}"'
+        # veralteter Hash (z. B. altes Panel-HTML): aktuelle Version, aber nicht dauerhaft cachen
+        cache = CACHE_IMMUTABLE if digest == asset.digest else CACHE_REVALIDATE
+        headers = {
+            hdrs.CACHE_CONTROL: cache,
+            hdrs.CONTENT_TYPE: asset.content_type,
+            hdrs.ETAG: etag,
+            hdrs.VARY: hdrs.ACCEPT_ENCODING,
+        }
+        if request.headers.get(hdrs.IF_NONE_MATCH) == etag:
+            return web.Response(status=304, headers=headers)
+
+        accept = request.headers.get(hdrs.ACCEPT_ENCODING, "")
+        if asset.br is not None and "br" in accept:
+            headers[hdrs.CONTENT_ENCODING] = "br"
+            body = asset.br
+        elif "gzip" in accept:
+            headers[hdrs.CONTENT_ENCODING] = "gzip"
+            body = asset.gzip
+        else:
+            body = asset.raw
+        return web.Response(body=body, headers=headers)
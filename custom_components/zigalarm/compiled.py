@@ -0,0 +1,420 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from .const import (
+    OPT_ALWAYS,
+    OPT_ENTRY_DELAY,
+    OPT_EXIT_DELAY,
+    OPT_MOTION,
+    OPT_PERIMETER,
+    OPT_SIREN,
+    OPT_SIREN_ENTITIES,
+    OPT_TRIGGER_TIME,
+    OPT_FORCE_ARM,
+    DEFAULT_ENTRY_DELAY,
+    DEFAULT_EXIT_DELAY,
+    DEFAULT_TRIGGER_TIME,
+    # notifications
+    OPT_NOTIFY_TARGETS,
+    OPT_NOTIFY_WINDOW,
+    OPT_NOTIFY_RATE,
+    DEFAULT_NOTIFY_WINDOW,
+    DEFAULT_NOTIFY_RATE,
+    # lights
+    OPT_LIGHTS,
+    OPT_LIGHT_COLOR,
+    OPT_LIGHT_BRIGHTNESS,
+    OPT_LIGHT_EFFECT,
+    OPT_LIGHT_RESTORE,
+    DEFAULT_LIGHT_COLOR,
+    DEFAULT_LIGHT_BRIGHTNESS,
+    DEFAULT_LIGHT_EFFECT,
+    DEFAULT_LIGHT_RESTORE,
+    # cameras
+    OPT_CAMERAS,
+    OPT_CAMERA_SHOW_ONLY_TRIGGERED,
+    OPT_CAMERA_MAP,
+    DEFAULT_CAMERA_SHOW_ONLY_TRIGGERED,
+    # keypad (optional)
+    OPT_KEYPAD_ENABLED,
+    OPT_KEYPAD_ENTITIES,
+    OPT_ARM_HOME_ACTION,
+    OPT_ARM_AWAY_ACTION,
+    OPT_DISARM_ACTION,
+    OPT_MASTER_PIN,
+    # flap suppression
+    OPT_FLAP_THRESHOLD,
+    OPT_FLAP_WINDOW,
+    OPT_FLAP_QUARANTINE,
+    OPT_SENSOR_DEBOUNCE,
+    DEFAULT_FLAP_THRESHOLD,
+    DEFAULT_FLAP_WINDOW,
+    DEFAULT_FLAP_QUARANTINE,
+    DEFAULT_SENSOR_DEBOUNCE,
+    # supervision
+    OPT_SUPERVISION_INTERVAL,
+    OPT_SUPERVISION_MODE,
+    DEFAULT_SUPERVISION_INTERVAL,
+    DEFAULT_SUPERVISION_MODE,
+    SUPERVISION_BLOCK,
+    SUPERVISION_WARN,
+    # confirmation
+    OPT_CONFIRMATION_RULES,
+    OPT_TRIGGER_PREDICATES,
+    # roles
+    ROLE_PERIMETER,
+    ROLE_MOTION,
+    ROLE_ALWAYS,
+    ROLE_KEYPAD,
+)
+from .correlator import ConfirmationRule, parse_rules
+from .notifications import notify_target
+from .predicates import Predicate, compile_predicates, state_on
+
+# Alles, was aus entry.options abgeleitet wird, wird hier EINMAL geparst
+# (beim Laden bzw. bei Options-Änderung). Der Event-Hot-Path macht danach
+# nur noch O(1)-Lookups auf frozensets / dicts.
+
+_SIREN_DOMAINS = ("switch", "siren", "light")
+_LIGHT_OTHER_DOMAINS = ("switch", "siren")
+
+
+def uniq_clean(items: Any) -> list[str]:
+    seen: set[str] = set()
+    out: list[str] = []
+    for x in (items or []):
+        s = str(x).strip()
+        if s and s not in seen:
+            seen.add(s)
+            out.append(s)
+    return out
+
+
+def entity_domain(entity_id: str) -> str:
+    return entity_id.split(".", 1)[0] if entity_id and "." in entity_id else ""
+
+
+def parse_hex_color(hex_color: Any) -> tuple[int, int, int] | None:
+    if not hex_color:
+        return None
+    s = str(hex_color).strip()
+    if not s.startswith("#"):
+        return None
+    s = s[1:]
+    if len(s) == 3:
+        s = "".join([c * 2 for c in s])
+    if len(s) != 6:
+        return None
+    try:
+        return (int(s[0:2], 16), int(s[2:4], 16), int(s[4:6], 16))
+    except ValueError:
+        return None
+
+
+def parse_camera_map(raw: Any) -> dict[str, list[str]]:
+    # {"binary_sensor.door": "camera.door" | ["camera.a", ...]}; ValueError bei Unsinn
+    if raw is None:
+        return {}
+    if not isinstance(raw, Mapping):
+        raise ValueError("camera_map muss ein Mapping entity_id -> Kamera(s) sein")
+    out: dict[str, list[str]] = {}
+    for sensor, cams in raw.items():
+        eid = str(sensor).strip()
+        cams = uniq_clean([cams] if isinstance(cams, str) else cams)
+        bad = [c for c in cams if entity_domain(c) != "camera"]
+        if not eid or bad:
+            raise ValueError(f"{eid or '?'}: keine camera.*-Entity: {', '.join(bad) or '-'}")
+        if cams:
+            out[eid] = cams
+    return out
+
+
+def _int(value: Any, default: int) -> int:
+    try:
+        return int(value if value is not None else default)
+    except (TypeError, ValueError):
+        return default
+
+
+def _float(value: Any, default: float) -> float:
+    try:
+        return float(value if value is not None else default)
+    except (TypeError, ValueError):
+        return default
+
+
+def _group_by_domain(entities: tuple[str, ...], fallback: str | None = None,
+                     allowed: tuple[str, ...] = ()) -> tuple[tuple[str, tuple[str, ...]], ...]:
+    groups: dict[str, list[str]] = {}
+    for eid in entities:
+        dom = entity_domain(eid)
+        if allowed and dom not in allowed:
+            if fallback is None:
+                continue
+            dom = fallback
+        groups.setdefault(dom, []).append(eid)
+    return tuple((dom, tuple(ents)) for dom, ents in groups.items())
+
+
+@dataclass(frozen=True)
+class CompiledConfig:
+    # sensors
+    perimeter: frozenset[str] = frozenset()
+    motion: frozenset[str] = frozenset()
+    always: frozenset[str] = frozenset()
+    keypads: frozenset[str] = frozenset()
+    roles: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    watched: frozenset[str] = frozenset()
+
+    # timers
+    exit_delay: int = DEFAULT_EXIT_DELAY
+    entry_delay: int = DEFAULT_ENTRY_DELAY
+    trigger_time: int = DEFAULT_TRIGGER_TIME
+    force_arm: bool = False
+
+    # flap suppression
+    flap_threshold: int = DEFAULT_FLAP_THRESHOLD
+    flap_window: int = DEFAULT_FLAP_WINDOW
+    flap_quarantine: int = DEFAULT_FLAP_QUARANTINE
+    sensor_debounce: float = DEFAULT_SENSOR_DEBOUNCE
+
+    # supervision
+    supervision_interval: int = DEFAULT_SUPERVISION_INTERVAL
+    supervision_mode: str = DEFAULT_SUPERVISION_MODE
+
+    # confirmation (leer = erste relevante Auslösung genügt)
+    confirmation_rules: tuple[ConfirmationRule, ...] = ()
+    # entity_id -> vorkompilierte Trigger-Bedingung (Default: state == "on");
+    # Vergleich läuft über die Regeln in `public`
+    predicates: Mapping[str, Predicate] = field(
+        default_factory=lambda: MappingProxyType({}), compare=False
+    )
+
+    # outputs
+    sirens: tuple[str, ...] = ()
+    siren_groups: tuple[tuple[str, tuple[str, ...]], ...] = ()
+    lights: tuple[str, ...] = ()
+    light_entities: tuple[str, ...] = ()
+    light_other_groups: tuple[tuple[str, tuple[str, ...]], ...] = ()
+    light_rgb: tuple[int, int, int] | None = None
+    light_brightness: int | None = DEFAULT_LIGHT_BRIGHTNESS
+    light_effect: str = ""
+    light_restore: bool = DEFAULT_LIGHT_RESTORE
+    light_on_data: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    # notifications (notify-Servicename ohne "notify.")
+    notify_targets: tuple[str, ...] = ()
+    notify_window: int = DEFAULT_NOTIFY_WINDOW
+    notify_rate: int = DEFAULT_NOTIFY_RATE
+
+    # cameras (Schnappschüsse beim Auslösen)
+    cameras: tuple[str, ...] = ()
+    camera_map: Mapping[str, tuple[str, ...]] = field(default_factory=lambda: MappingProxyType({}))
+
+    # keypad
+    keypad_enabled: bool = False
+    arm_home_action: str = "arm_home"
+    arm_away_action: str = "arm_away"
+    disarm_action: str = "disarm"
+    master_pin: str = ""
+
+    # öffentliche Konfiguration für zigalarm/get_config (ohne master_pin)
+    public: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    # Inhalts-Hash von `public`: Clients cachen die Konfiguration darüber
+    version: str = ""
+
+    def role(self, entity_id: str) -> int:
+        return self.roles.get(entity_id, 0)
+
+    def predicate(self, entity_id: str) -> Predicate:
+        return self.predicates.get(entity_id, state_on)
+
+    def cameras_for(self, entity_ids: Any) -> list[str]:
+        out: dict[str, None] = {}
+        for eid in entity_ids:
+            for cam in self.camera_map.get(eid, ()):
+                out[cam] = None
+        return list(out)
+
+
+def config_version(public: Mapping[str, Any]) -> str:
+    raw = json.dumps(public, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def compile_options(options: Mapping[str, Any] | None) -> CompiledConfig:
+    opts = options or {}
+
+    perimeter_l = uniq_clean(opts.get(OPT_PERIMETER, []))
+    motion_l = uniq_clean(opts.get(OPT_MOTION, []))
+    always_l = uniq_clean(opts.get(OPT_ALWAYS, []))
+
+    keypad_enabled = bool(opts.get(OPT_KEYPAD_ENABLED, False))
+    keypad_l = uniq_clean(opts.get(OPT_KEYPAD_ENTITIES, []))
+
+    roles: dict[str, int] = {}
+    for items, bit in (
+        (perimeter_l, ROLE_PERIMETER),
+        (motion_l, ROLE_MOTION),
+        (always_l, ROLE_ALWAYS),
+        (keypad_l if keypad_enabled else [], ROLE_KEYPAD),
+    ):
+        for eid in items:
+            roles[eid] = roles.get(eid, 0) | bit
+
+    # sirens (legacy single + multiple)
+    siren_entities_l = uniq_clean(opts.get(OPT_SIREN_ENTITIES, []))
+    sirens_l = list(siren_entities_l)
+    legacy = str(opts.get(OPT_SIREN) or "").strip()
+    if legacy and legacy not in sirens_l:
+        sirens_l.append(legacy)
+    sirens = tuple(sirens_l)
+
+    # notifications
+    notify_l = [t for t in uniq_clean(opts.get(OPT_NOTIFY_TARGETS, [])) if notify_target(t)]
+    notify_targets = tuple(dict.fromkeys(notify_target(t) for t in notify_l))
+    notify_window = max(0, _int(opts.get(OPT_NOTIFY_WINDOW), DEFAULT_NOTIFY_WINDOW))
+    notify_rate = max(0, _int(opts.get(OPT_NOTIFY_RATE), DEFAULT_NOTIFY_RATE))
+
+    # lights
+    lights = tuple(uniq_clean(opts.get(OPT_LIGHTS, [])))
+    light_entities = tuple(e for e in lights if entity_domain(e) == "light")
+    light_color = opts.get(OPT_LIGHT_COLOR, DEFAULT_LIGHT_COLOR)
+    light_rgb = parse_hex_color(str(light_color))
+    brightness = _int(opts.get(OPT_LIGHT_BRIGHTNESS, DEFAULT_LIGHT_BRIGHTNESS) or DEFAULT_LIGHT_BRIGHTNESS,
+                      DEFAULT_LIGHT_BRIGHTNESS)
+    light_brightness = brightness if 1 <= brightness <= 255 else None
+    light_effect = str(opts.get(OPT_LIGHT_EFFECT, DEFAULT_LIGHT_EFFECT) or "").strip()
+    light_restore = bool(opts.get(OPT_LIGHT_RESTORE, DEFAULT_LIGHT_RESTORE))
+
+    light_on_data: dict[str, Any] = {}
+    if light_rgb:
+        light_on_data["rgb_color"] = list(light_rgb)
+    if light_brightness is not None:
+        light_on_data["brightness"] = light_brightness
+    if light_effect:
+        light_on_data["effect"] = light_effect
+
+    exit_delay = _int(opts.get(OPT_EXIT_DELAY, DEFAULT_EXIT_DELAY), DEFAULT_EXIT_DELAY)
+    entry_delay = _int(opts.get(OPT_ENTRY_DELAY, DEFAULT_ENTRY_DELAY), DEFAULT_ENTRY_DELAY)
+    trigger_time = _int(opts.get(OPT_TRIGGER_TIME, DEFAULT_TRIGGER_TIME), DEFAULT_TRIGGER_TIME)
+    force_arm = bool(opts.get(OPT_FORCE_ARM, False))
+
+    flap_threshold = max(0, _int(opts.get(OPT_FLAP_THRESHOLD), DEFAULT_FLAP_THRESHOLD))
+    flap_window = max(1, _int(opts.get(OPT_FLAP_WINDOW), DEFAULT_FLAP_WINDOW))
+    flap_quarantine = max(1, _int(opts.get(OPT_FLAP_QUARANTINE), DEFAULT_FLAP_QUARANTINE))
+    sensor_debounce = max(0.0, _float(opts.get(OPT_SENSOR_DEBOUNCE), DEFAULT_SENSOR_DEBOUNCE))
+
+    supervision_interval = max(0, _int(opts.get(OPT_SUPERVISION_INTERVAL), DEFAULT_SUPERVISION_INTERVAL))
+    supervision_mode = str(opts.get(OPT_SUPERVISION_MODE) or DEFAULT_SUPERVISION_MODE)
+    if supervision_mode not in (SUPERVISION_WARN, SUPERVISION_BLOCK):
+        supervision_mode = DEFAULT_SUPERVISION_MODE
+
+    confirmation_rules = parse_rules(opts.get(OPT_CONFIRMATION_RULES))
+    predicate_specs, predicates = compile_predicates(opts.get(OPT_TRIGGER_PREDICATES))
+
+    arm_home_action = str(opts.get(OPT_ARM_HOME_ACTION, "arm_home") or "arm_home")
+    arm_away_action = str(opts.get(OPT_ARM_AWAY_ACTION, "arm_away") or "arm_away")
+    disarm_action = str(opts.get(OPT_DISARM_ACTION, "disarm") or "disarm")
+    master_pin = str(opts.get(OPT_MASTER_PIN, "") or "")
+    cameras = uniq_clean(opts.get(OPT_CAMERAS, []))
+    try:
+        camera_map = parse_camera_map(opts.get(OPT_CAMERA_MAP))
+    except (TypeError, ValueError):
+        camera_map = {}
+
+    public = {
+        "perimeter_sensors": perimeter_l,
+        "motion_sensors": motion_l,
+        "always_sensors": always_l,
+
+        "siren_entity": (opts.get(OPT_SIREN) or None),
+        "siren_entities": siren_entities_l,
+
+        "notify_targets": notify_l,
+        "notify_dedup_window": notify_window,
+        "notify_rate_limit": notify_rate,
+
+        "alarm_lights": list(lights),
+        "alarm_light_color": light_color,
+        "alarm_light_brightness": brightness,
+        "alarm_light_effect": opts.get(OPT_LIGHT_EFFECT, DEFAULT_LIGHT_EFFECT),
+        "alarm_light_restore": light_restore,
+
+        "camera_entities": cameras,
+        "camera_map": camera_map,
+        "camera_show_only_triggered": bool(
+            opts.get(OPT_CAMERA_SHOW_ONLY_TRIGGERED, DEFAULT_CAMERA_SHOW_ONLY_TRIGGERED)
+        ),
+
+        "exit_delay": exit_delay,
+        "entry_delay": entry_delay,
+        "trigger_time": trigger_time,
+        "force_arm": force_arm,
+
+        "flap_threshold": flap_threshold,
+        "flap_window": flap_window,
+        "flap_quarantine": flap_quarantine,
+        "sensor_debounce": sensor_debounce,
+
+        "supervision_interval": supervision_interval,
+        "supervision_mode": supervision_mode,
+
+        "confirmation_rules": [rule.as_dict() for rule in confirmation_rules],
+        "trigger_predicates": predicate_specs,
+
+        "keypad_enabled": keypad_enabled,
+        "keypad_entities": keypad_l,
+        "master_pin_set": bool(master_pin),
+        "arm_home_action": arm_home_action,
+        "arm_away_action": arm_away_action,
+        "disarm_action": disarm_action,
+    }
+
+    return CompiledConfig(
+        perimeter=frozenset(perimeter_l),
+        motion=frozenset(motion_l),
+        always=frozenset(always_l),
+        keypads=frozenset(keypad_l) if keypad_enabled else frozenset(),
+        roles=MappingProxyType(roles),
+        watched=frozenset(roles),
+        exit_delay=exit_delay,
+        entry_delay=entry_delay,
+        trigger_time=trigger_time,
+        force_arm=force_arm,
+        flap_threshold=flap_threshold,
+        flap_window=flap_window,
+        flap_quarantine=flap_quarantine,
+        sensor_debounce=sensor_debounce,
+        supervision_interval=supervision_interval,
+        supervision_mode=supervision_mode,
+        confirmation_rules=confirmation_rules,
+        predicates=MappingProxyType(predicates),
+        sirens=sirens,
+        siren_groups=_group_by_domain(sirens, fallback="switch", allowed=_SIREN_DOMAINS),
+        lights=lights,
+        light_entities=light_entities,
+        light_other_groups=_group_by_domain(lights, allowed=_LIGHT_OTHER_DOMAINS),
+        light_rgb=light_rgb,
+        light_brightness=light_brightness,
+        light_effect=light_effect,
+        light_restore=light_restore,
+        light_on_data=MappingProxyType(light_on_data),
+        notify_targets=notify_targets,
+        notify_window=notify_window,
+        notify_rate=notify_rate,
+        cameras=tuple(cameras),
+        camera_map=MappingProxyType({eid: tuple(cams) for eid, cams in camera_map.items()}),
+        keypad_enabled=keypad_enabled,
+        arm_home_action=arm_home_action,
+        arm_away_action=arm_away_action,
+        disarm_action=disarm_action,
+        master_pin=master_pin,
+        public=MappingProxyType(public),
+        version=config_version(public),
+    )
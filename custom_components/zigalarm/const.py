@@ -2,7 +2,10 @@ DOMAIN = "zigalarm"
 
 
 # Platforms
-PLATFORMS = ["alarm_control_panel"]
+PLATFORMS = ["alarm_control_panel", "sensor"]
+
+# Dispatcher-Signal mit dem Runtime-Snapshot eines Panels (pro Entry)
+SIGNAL_RUNTIME_UPDATED = f"{DOMAIN}_runtime_updated_{{}}"
 
 # option keys
 OPT_PERIMETER = "perimeter_sensors"
@@ -17,6 +20,11 @@ OPT_TRIGGER_TIME = "trigger_time"
 OPT_SIREN = "siren_entity"
 OPT_SIREN_ENTITIES = "siren_entities"
 
+# Benachrichtigung beim Auslösen (notify.*), Sammelfenster + Limit pro Ziel
+OPT_NOTIFY_TARGETS = "notify_targets"
+OPT_NOTIFY_WINDOW = "notify_dedup_window"
+OPT_NOTIFY_RATE = "notify_rate_limit"
+
 # lights (kann auch switch.* sein, z.B. Kamera-Spotlight)
 OPT_LIGHTS = "alarm_lights"
 OPT_LIGHT_COLOR = "alarm_light_color"
@@ -27,6 +35,8 @@ OPT_LIGHT_RESTORE = "alarm_light_restore"
 # cameras
 OPT_CAMERAS = "camera_entities"
 OPT_CAMERA_SHOW_ONLY_TRIGGERED = "camera_show_only_triggered"
+# Sensor -> Kamera(s) (entity_id -> Liste), Popup öffnet nur diese Streams
+OPT_CAMERA_MAP = "camera_map"
 OPT_FORCE_ARM = "force_arm"
 
 # keypad (optional)
@@ -37,14 +47,49 @@ OPT_ARM_AWAY_ACTION = "arm_away_action"
 OPT_DISARM_ACTION = "disarm_action"
 OPT_MASTER_PIN = "master_pin"
 
+# flap suppression / quarantine
+OPT_FLAP_THRESHOLD = "flap_threshold"
+OPT_FLAP_WINDOW = "flap_window"
+OPT_FLAP_QUARANTINE = "flap_quarantine"
+OPT_SENSOR_DEBOUNCE = "sensor_debounce"
+
+# sensor supervision (stale / unavailable)
+OPT_SUPERVISION_INTERVAL = "supervision_interval"
+OPT_SUPERVISION_MODE = "supervision_mode"
+SUPERVISION_WARN = "warn"
+SUPERVISION_BLOCK = "block"
+
+# Bestätigungsregeln (Liste von Dicts, siehe correlator.parse_rule)
+OPT_CONFIRMATION_RULES = "confirmation_rules"
+
+# Trigger-Bedingungen pro Sensor (entity_id -> Dict, siehe predicates.normalize_spec)
+OPT_TRIGGER_PREDICATES = "trigger_predicates"
+
 # defaults
 DEFAULT_EXIT_DELAY = 5
 DEFAULT_ENTRY_DELAY = 5
 DEFAULT_TRIGGER_TIME = 180
 
+DEFAULT_NOTIFY_WINDOW = 60
+DEFAULT_NOTIFY_RATE = 3  # Nachrichten pro Minute und Ziel
+
 DEFAULT_LIGHT_COLOR = "#ff0000"
 DEFAULT_LIGHT_BRIGHTNESS = 255
 DEFAULT_LIGHT_EFFECT = ""
 DEFAULT_LIGHT_RESTORE = True
 
 DEFAULT_CAMERA_SHOW_ONLY_TRIGGERED = False
+
+DEFAULT_FLAP_THRESHOLD = 20
+DEFAULT_FLAP_WINDOW = 60
+DEFAULT_FLAP_QUARANTINE = 600
+DEFAULT_SENSOR_DEBOUNCE = 0
+
+DEFAULT_SUPERVISION_INTERVAL = 0  # 0 = nur unavailable/unknown, kein Stale-Check
+DEFAULT_SUPERVISION_MODE = SUPERVISION_WARN
+
+# sensor roles (bitmask, see compiled.CompiledConfig.roles)
+ROLE_PERIMETER = 1
+ROLE_MOTION = 2
+ROLE_ALWAYS = 4
+ROLE_KEYPAD = 8
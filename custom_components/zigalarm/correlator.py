@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from .const import ROLE_MOTION, ROLE_PERIMETER
+
+_LOGGER = logging.getLogger(__name__)
+
+RULE_COUNT = "count"
+RULE_SEQUENCE = "sequence"
+
+ROLE_NAMES = {"perimeter": ROLE_PERIMETER, "motion": ROLE_MOTION}
+
+
+def _role_names(mask: int) -> list[str]:
+    return [name for name, bit in ROLE_NAMES.items() if mask & bit]
+
+
+def _mask(value: Any) -> int:
+    names = [value] if isinstance(value, str) else list(value or [])
+    mask = 0
+    for name in names:
+        bit = ROLE_NAMES.get(str(name).strip().lower())
+        if bit is None:
+            raise ValueError(f"unknown role: {name}")
+        mask |= bit
+    if not mask:
+        raise ValueError("no role given")
+    return mask
+
+
+@dataclass(frozen=True)
+class ConfirmationRule:
+    # count:    `count` verschiedene Sensoren aus `mask` innerhalb von `window` s
+    # sequence: ein Sensor aus `first`, danach einer aus `then` innerhalb von `window` s
+    kind: str
+    window: float
+    mask: int = 0
+    count: int = 0
+    first: int = 0
+    then: int = 0
+
+    @property
+    def roles(self) -> int:
+        return self.mask if self.kind == RULE_COUNT else self.first | self.then
+
+    @property
+    def name(self) -> str:
+        if self.kind == RULE_COUNT:
+            return f"{self.count}x {'/'.join(_role_names(self.mask))} in {self.window:g}s"
+        return f"{'/'.join(_role_names(self.first))} -> {'/'.join(_role_names(self.then))} in {self.window:g}s"
+
+    def as_dict(self) -> dict[str, Any]:
+        if self.kind == RULE_COUNT:
+            return {"type": RULE_COUNT, "roles": _role_names(self.mask), "count": self.count, "window": self.window}
+        return {
+            "type": RULE_SEQUENCE,
+            "first": _role_names(self.first),
+            "then": _role_names(self.then),
+            "window": self.window,
+        }
+
+
+def parse_rule(raw: Any) -> ConfirmationRule:
+    if not isinstance(raw, dict):
+        raise ValueError("rule must be a mapping")
+    kind = str(raw.get("type") or RULE_COUNT).strip().lower()
+    window = float(raw.get("window", 60))
+    if window <= 0:
+        raise ValueError("window must be > 0")
+    if kind == RULE_COUNT:
+        count = int(raw.get("count", 2))
+        if count < 1:
+            raise ValueError("count must be >= 1")
+        return ConfirmationRule(RULE_COUNT, window, mask=_mask(raw.get("roles", "motion")), count=count)
+    if kind == RULE_SEQUENCE:
+        return ConfirmationRule(
+            RULE_SEQUENCE, window, first=_mask(raw.get("first")), then=_mask(raw.get("then"))
+        )
+    raise ValueError(f"unknown rule type: {kind}")
+
+
+def parse_rules(raw: Any) -> tuple[ConfirmationRule, ...]:
+    rules = []
+    for item in raw or []:
+        try:
+            rules.append(parse_rule(item))
+        except (TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid confirmation rule %s: %s", item, err)
+    return tuple(rules)
+
+
+class _CountWindow:
+    # verschiedene Sensoren im Fenster; älteste vorne, höchstens `count` Einträge
+    __slots__ = ("rule", "seen")
+
+    def __init__(self, rule: ConfirmationRule) -> None:
+        self.rule = rule
+        self.seen: OrderedDict[str, float] = OrderedDict()
+
+    def observe(self, entity_id: str, role: int, now: float) -> bool:
+        if not role & self.rule.mask:
+            return False
+        seen = self.seen
+        horizon = now - self.rule.window
+        while seen and next(iter(seen.values())) < horizon:
+            seen.popitem(last=False)
+        seen[entity_id] = now
+        seen.move_to_end(entity_id)
+        if len(seen) > self.rule.count:
+            seen.popitem(last=False)
+        return len(seen) >= self.rule.count
+
+    def reset(self) -> None:
+        self.seen.clear()
+
+
+class _SequenceWindow:
+    __slots__ = ("rule", "first_at")
+
+    def __init__(self, rule: ConfirmationRule) -> None:
+        self.rule = rule
+        self.first_at: float | None = None
+
+    def observe(self, entity_id: str, role: int, now: float) -> bool:
+        confirmed = False
+        if role & self.rule.then and self.first_at is not None:
+            confirmed = now - self.first_at <= self.rule.window
+        if role & self.rule.first:
+            self.first_at = now
+        return confirmed
+
+    def reset(self) -> None:
+        self.first_at = None
+
+
+# Bestätigungsregeln für Perimeter-/Bewegungs-Auslösungen. Pro Event nur die
+# (wenigen) Regeln der Rolle, jede O(1) mit fest begrenztem Speicher -
+# unabhängig von der Anzahl der Sensoren. Eine Regel gilt nur, wenn alle ihre
+# Rollen im aktuellen Scharf-Profil aktiv sind (sonst könnte sie nie greifen
+# und würde die Auslösung schlucken).
+class AlarmCorrelator:
+    def __init__(self, rules: Iterable[ConfirmationRule] = ()) -> None:
+        self.configure(rules)
+
+    def configure(self, rules: Iterable[ConfirmationRule]) -> None:
+        rules = tuple(rules)
+        if rules == getattr(self, "rules", None):
+            return
+        self.rules = rules
+        self._windows = [
+            _CountWindow(rule) if rule.kind == RULE_COUNT else _SequenceWindow(rule) for rule in rules
+        ]
+        # aktive Rollenmaske -> (abgedeckte Rollen, anwendbare Fenster)
+        self._by_mask: dict[int, tuple[int, list]] = {}
+
+    def _applicable(self, active: int) -> tuple[int, list]:
+        entry = self._by_mask.get(active)
+        if entry is None:
+            windows = [w for w in self._windows if not w.rule.roles & ~active]
+            covered = 0
+            for window in windows:
+                covered |= window.rule.roles
+            entry = self._by_mask[active] = (covered, windows)
+        return entry
+
+    def requires_confirmation(self, role: int, active: int) -> bool:
+        return bool(role & self._applicable(active)[0])
+
+    def observe(self, entity_id: str, role: int, now: float, active: int) -> ConfirmationRule | None:
+        confirmed = None
+        for window in self._applicable(active)[1]:
+            if window.observe(entity_id, role, now) and confirmed is None:
+                confirmed = window.rule
+        return confirmed
+
+    def reset(self) -> None:
+        for window in self._windows:
+            window.reset()
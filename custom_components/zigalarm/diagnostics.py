@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, OPT_MASTER_PIN
+
+TO_REDACT = {OPT_MASTER_PIN}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    metrics = hass.data.get(DOMAIN, {}).get("metrics", {}).get(entry.entry_id)
+    panel = hass.data.get(DOMAIN, {}).get("panels", {}).get(entry.entry_id)
+    profiler = hass.data.get(DOMAIN, {}).get("profiler")
+    return {
+        "options": async_redact_data(dict(entry.options or {}), TO_REDACT),
+        "latency": metrics.summary() if metrics else None,
+        "outputs": panel.runtime_snapshot()["output_status"] if panel else None,
+        "notifications": panel.notifications.summary() if panel else None,
+        "profile": profiler.summary() if profiler else None,
+    }
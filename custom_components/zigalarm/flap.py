@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterable
+
+# Ergebnis von FlapGuard.check()
+ACCEPT = 0
+DEBOUNCED = 1
+QUARANTINED = 2
+QUARANTINE_STARTED = 3
+
+
+# Flatter-Schutz pro Sensor: mehr als `threshold` Zustandswechsel innerhalb von
+# `window` Sekunden -> Quarantäne (wie gebrückt). Jedes weitere Event während der
+# Quarantäne verlängert sie; freigegeben wird erst nach `quarantine` Sekunden Ruhe.
+# Es zählen nur echte Wechsel, reine Attribut-Updates (linkquality, battery) nicht.
+# Speicher pro Sensor ist durch `threshold` begrenzt, jeder Check ist O(1).
+class FlapGuard:
+    def __init__(self, threshold: int, window: float, quarantine: float, debounce: float) -> None:
+        self.threshold = max(0, int(threshold))
+        self.window = float(window)
+        self.quarantine = float(quarantine)
+        self.debounce = float(debounce)
+
+        self._hits: dict[str, deque[float]] = {}
+        self._last_on: dict[str, float] = {}
+        self._quarantined: dict[str, float] = {}
+        self._sorted: list[str] | None = []
+
+    def configure(self, threshold: int, window: float, quarantine: float, debounce: float) -> None:
+        if int(threshold) != self.threshold:
+            self._hits = {}
+        self.threshold = max(0, int(threshold))
+        self.window = float(window)
+        self.quarantine = float(quarantine)
+        self.debounce = float(debounce)
+
+    @property
+    def quarantined(self) -> list[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self._quarantined)
+        return self._sorted
+
+    def is_quarantined(self, entity_id: str) -> bool:
+        return entity_id in self._quarantined
+
+    def next_release(self) -> float | None:
+        return min(self._quarantined.values()) if self._quarantined else None
+
+    def check(self, entity_id: str, now: float, is_on: bool, changed: bool = True, exempt: bool = False) -> int:
+        # exempt (Rauch, Wasser, ...): nie Quarantäne, ein "on" wird nie verworfen
+        if exempt:
+            return ACCEPT
+
+        until = self._quarantined.get(entity_id)
+        if until is not None:
+            if changed:
+                self._quarantined[entity_id] = now + self.quarantine
+            return QUARANTINED
+
+        if not changed:
+            return ACCEPT
+
+        if self.threshold:
+            hits = self._hits.get(entity_id)
+            if hits is None:
+                hits = self._hits[entity_id] = deque(maxlen=self.threshold)
+            hits.append(now)
+            if len(hits) == self.threshold and now - hits[0] <= self.window:
+                self._quarantined[entity_id] = now + self.quarantine
+                self._hits.pop(entity_id, None)
+                self._last_on.pop(entity_id, None)
+                self._sorted = None
+                return QUARANTINE_STARTED
+
+        if is_on and self.debounce > 0:
+            last = self._last_on.get(entity_id)
+            self._last_on[entity_id] = now
+            if last is not None and now - last < self.debounce:
+                return DEBOUNCED
+
+        return ACCEPT
+
+    def release_expired(self, now: float) -> list[str]:
+        released = [eid for eid, until in self._quarantined.items() if until <= now]
+        for eid in released:
+            del self._quarantined[eid]
+        if released:
+            self._sorted = None
+        return released
+
+    def prune(self, keep: Iterable[str]) -> list[str]:
+        # Options-Änderung: Zustand entfernter (oder ausgenommener) Sensoren verwerfen
+        keep = set(keep)
+        self._hits = {eid: hits for eid, hits in self._hits.items() if eid in keep}
+        self._last_on = {eid: t for eid, t in self._last_on.items() if eid in keep}
+        dropped = [eid for eid in self._quarantined if eid not in keep]
+        for eid in dropped:
+            del self._quarantined[eid]
+        if dropped:
+            self._sorted = None
+        return dropped
@@ -44,12 +44,134 @@ class ZigAlarmPanel extends HTMLElement {
   set hass(hass) {
     this._hass = hass;
     if (!this._root) this._render();
-    this._update();
+    // Live-Modus: gerendert wird nur bei Deltas aus zigalarm/subscribe
+    if (this._liveMode === undefined) this._startLive();
+    else if (this._liveMode === false) this._update();
+    if (this._camEl) this._camEl.hass = hass;
   }
 
   connectedCallback() {
     if (!this._root) this._render();
     this._setHint("Lade System…");
+    if (this._hass && this._liveMode === undefined) this._startLive();
+  }
+
+  disconnectedCallback() {
+    this._stopLive();
+    this._stopCountdown();
+    this._liveMode = undefined;
+  }
+
+  // ---------------- Live-Subscription ----------------
+
+  async _startLive() {
+    this._liveMode = null; // wird gerade aufgebaut
+    try {
+      const panels = await this._hass.callWS({ type: "zigalarm/panels" });
+      this._alarmList = (panels || []).map((p) => p.entity_id);
+    } catch (e) {
+      // Backend ohne WebSocket-API: alter Pfad über hass-Updates
+      this._liveMode = false;
+      this._alarmList = null;
+      this._update();
+      return;
+    }
+    this._liveMode = true;
+    this._updateAlarmSelect();
+    await this._resubscribe();
+  }
+
+  async _resubscribe() {
+    this._stopLive();
+    this._live = {};
+    const selected = this._getSelectedAlarmEntity();
+    const token = (this._liveToken = (this._liveToken || 0) + 1);
+    if (!selected) {
+      this._update();
+      return;
+    }
+    try {
+      const unsub = await this._hass.connection.subscribeMessage(
+        (delta) => this._onLive(delta),
+        { type: "zigalarm/subscribe", entity_id: selected }
+      );
+      if (token !== this._liveToken) unsub();
+      else this._unsubLive = unsub;
+    } catch (e) {
+      // eslint-disable-next-line no-console
+      console.error("zigalarm/subscribe failed", e);
+      this._update();
+    }
+  }
+
+  _stopLive() {
+    if (this._unsubLive) {
+      this._unsubLive();
+      this._unsubLive = null;
+    }
+  }
+
+  _onLive(delta) {
+    this._live = { ...this._live, ...delta };
+    this._update();
+  }
+
+  // ---------------- Konfiguration (zigalarm/get_config) ----------------
+
+  _configFor(entityId, version) {
+    // Cache pro Entität, neu geladen wird nur bei geänderter config_version
+    const c = this._configCache?.[entityId];
+    if (c && (version == null || c.version === version || c.requested === version)) return c.config;
+    this._fetchConfig(entityId, version);
+    return c ? c.config : null;
+  }
+
+  async _fetchConfig(entityId, version) {
+    if (!this._hass) return;
+    this._configCache = this._configCache || {};
+    const key = `${entityId}|${version}`;
+    if (this._configFetching === key) return;
+    this._configFetching = key;
+    const cached = this._configCache[entityId];
+    try {
+      const req = { type: "zigalarm/get_config", entity_id: entityId };
+      if (cached?.config) req.version = cached.version;
+      const res = await this._hass.callWS(req);
+      const config = res.unchanged ? cached.config : res.config;
+      this._configCache[entityId] = { version: res.version, requested: version, config };
+    } catch (e) {
+      // ältere Backends liefern die Konfiguration noch als Attribute
+      this._configCache[entityId] = { version, requested: version, config: null };
+    } finally {
+      this._configFetching = null;
+    }
+    this._update();
+  }
+
+  _stopCountdown() {
+    if (this._countdownTimer) {
+      clearInterval(this._countdownTimer);
+      this._countdownTimer = null;
+    }
+  }
+
+  _renderCountdown(a, state) {
+    const el = this._$("countdownLine");
+    if (!el) return;
+    const until = state === "pending" ? a.pending_until : state === "arming" ? a.arming_until : null;
+    const label = state === "pending" ? "Eingangsverzögerung" : "Ausgangsverzögerung";
+    const tick = () => {
+      const left = Math.max(0, Math.ceil(until - Date.now() / 1000));
+      el.textContent = `${label}: ${left} s`;
+      if (left <= 0) this._stopCountdown();
+    };
+    this._stopCountdown();
+    if (!until) {
+      el.textContent = "";
+      return;
+    }
+    tick();
+    this._countdownTimer = setInterval(tick, 1000);
   }
 
   _$(id) {
@@ -73,16 +195,13 @@ class ZigAlarmPanel extends HTMLElement {
   }
 
   _findZigAlarmPanels() {
+    if (Array.isArray(this._alarmList)) return this._alarmList;
     const states = this._hass?.states || {};
     return Object.keys(states)
       .filter((eid) => eid.startsWith("alarm_control_panel."))
       .filter((eid) => {
         const a = states[eid]?.attributes || {};
-        return (
-          Array.isArray(a.perimeter_sensors) &&
-          Array.isArray(a.motion_sensors) &&
-          Array.isArray(a.always_sensors)
-        );
+        return !!a.config_version || Array.isArray(a.perimeter_sensors);
       })
       .sort();
   }
@@ -435,6 +554,7 @@ class ZigAlarmPanel extends HTMLElement {
           <div class="nav-tabs">
             <button class="nav-item active" data-tab="dashboard">Übersicht</button>
             <button class="nav-item" data-tab="settings">Geräte & Config</button>
+            <button class="nav-item" data-tab="journal">Logbuch</button>
             <button class="nav-item" data-tab="info">Info / Hilfe</button>
           </div>
         </div>
@@ -476,6 +596,7 @@ class ZigAlarmPanel extends HTMLElement {
                 <div class="scanner-overlay" id="scannerOverlay"><div class="scanner-bar"></div></div>
                 <div class="secTitle">Status</div>
                 <div class="muted" id="statusLine"></div>
+                <div id="countdownLine" style="margin-top:8px; color:var(--za-warning); font-weight:700;"></div>
                 <div class="muted" id="openSensorsText" style="margin-top:12px;"></div>
               </div>
               <!-- Placeholder for camera preview or quick stats -->
@@ -553,6 +674,21 @@ class ZigAlarmPanel extends HTMLElement {
              </div>
           </div>
 
+          <!-- TAB: Journal -->
+          <div id="tab-journal" class="tab-view">
+            <div style="display:flex; justify-content:space-between; align-items:center; margin-bottom:32px;">
+              <h1 style="margin:0;">Logbuch</h1>
+              <button class="btn" id="journalReload">Aktualisieren</button>
+            </div>
+            <div class="card">
+              <div class="secTitle">Ereignisse</div>
+              <div class="list" id="journalList"><div class="muted">Keine Einträge.</div></div>
+              <div style="margin-top:16px; text-align:center;">
+                <button class="btn" id="journalMore" style="display:none;">Mehr laden</button>
+              </div>
+            </div>
+          </div>
+
           <!-- TAB: Info -->
           <div id="tab-info" class="tab-view">
             <div class="card" style="text-align:center; padding:40px;">
@@ -678,16 +814,21 @@ class ZigAlarmPanel extends HTMLElement {
           if (view.id === `tab-${tabId}`) view.classList.add("active");
         });
         this._activeTab = tabId;
+        if (tabId === "journal") this._loadJournal(true);
       });
     });
 
+    this._$("journalReload").addEventListener("click", () => this._loadJournal(true));
+    this._$("journalMore").addEventListener("click", () => this._loadJournal(false));
+
     // Re-attach existing event listeners for generic elements...
-    this._$("reload").addEventListener("click", () => this._update());
+    this._$("reload").addEventListener("click", () => (this._liveMode ? this._startLive() : this._update()));
     this._$("save").addEventListener("click", () => this._save());
 
     this._$("alarmEntitySel").addEventListener("change", () => {
       this._panelSelections = {};
-      this._update();
+      if (this._liveMode) this._resubscribe();
+      else this._update();
     });
 
     // Alarm action buttons
@@ -939,10 +1080,12 @@ class ZigAlarmPanel extends HTMLElement {
     const sel = this._$("alarmEntitySel");
     if (!sel || !this._hass) return;
 
-    // Filter all alarm control panels
-    const alarmList = Object.keys(this._hass.states)
-      .filter(eid => eid.startsWith("alarm_control_panel."))
-      .sort();
+    // Live-Modus: Liste vom Backend, sonst alle Alarm-Panels
+    const alarmList = Array.isArray(this._alarmList)
+      ? this._alarmList
+      : Object.keys(this._hass.states)
+        .filter(eid => eid.startsWith("alarm_control_panel."))
+        .sort();
 
     const listStr = JSON.stringify(alarmList);
     if (this._lastAlarmList === listStr && sel.options.length > 0) {
@@ -1015,6 +1158,81 @@ class ZigAlarmPanel extends HTMLElement {
     }
   }
 
+  // ---------------- Journal ----------------
+
+  async _loadJournal(reset) {
+    const selected = this._getSelectedAlarmEntity();
+    if (!this._hass || !selected) return;
+    if (reset) {
+      this._journal = [];
+      this._journalNext = undefined;
+    } else if (this._journalNext == null) {
+      return;
+    }
+    const req = { type: "zigalarm/journal", entity_id: selected, limit: 50 };
+    if (!reset) req.before = this._journalNext;
+    try {
+      const res = await this._hass.callWS(req);
+      this._journal = (this._journal || []).concat(res.events || []);
+      this._journalNext = res.next;
+    } catch (e) {
+      // eslint-disable-next-line no-console
+      console.error("journal failed", e);
+    }
+    this._renderJournal();
+  }
+
+  _renderJournal() {
+    const list = this._$("journalList");
+    const more = this._$("journalMore");
+    if (!list) return;
+    const labels = {
+      arming: "Scharfschalten gestartet",
+      armed: "Scharf geschaltet",
+      arm_blocked: "Scharfschalten blockiert",
+      disarm: "Unscharf geschaltet",
+      pending: "Eingangsverzögerung",
+      trigger: "ALARM ausgelöst",
+      outputs_on: "Ausgänge eingeschaltet",
+      outputs_off: "Ausgänge ausgeschaltet",
+      auto_stop: "Sirene automatisch gestoppt",
+      quarantine: "Sensor in Quarantäne",
+      quarantine_release: "Quarantäne aufgehoben",
+      keypad: "Keypad",
+      sensor_fault: "Sensor gestört",
+      sensor_restored: "Sensor meldet sich wieder",
+      keypad_denied: "Keypad: falscher PIN",
+      keypad_locked: "Keypad gesperrt",
+      output_failed: "Ausgang nicht bestätigt",
+      snapshots: "Schnappschüsse gespeichert",
+      notify_failed: "Benachrichtigung fehlgeschlagen",
+    };
+    const events = this._journal || [];
+    list.innerHTML = "";
+    if (!events.length) {
+      list.innerHTML = `<div class="muted">Keine Einträge.</div>`;
+    }
+    for (const ev of events) {
+      const row = document.createElement("div");
+      row.className = "item";
+      row.style.cursor = "default";
+      const when = new Date(ev.ts * 1000).toLocaleString();
+      const who = (ev.entities || []).map((e) => this._friendlyName(e)).join(", ");
+      const extra = [];
+      if (ev.mode) extra.push(stateToDE(ev.mode));
+      if (ev.action) extra.push(ev.action);
+      if (ev.reason) extra.push(ev.reason);
+      if (ev.locked_for) extra.push(`gesperrt ${ev.locked_for} s`);
+      if (ev.duration_ms != null) extra.push(`${ev.duration_ms} ms`);
+      row.innerHTML = `<b></b> <span class="muted"></span><div class="muted" style="font-size:0.85rem;"></div>`;
+      row.children[0].textContent = labels[ev.type] || ev.type;
+      row.children[1].textContent = extra.length ? `(${extra.join(", ")})` : "";
+      row.children[2].textContent = who ? `${when} • ${who}` : when;
+      list.appendChild(row);
+    }
+    if (more) more.style.display = this._journalNext != null ? "inline-block" : "none";
+  }
+
   _update() {
     if (!this._root) return;
     if (!this._hass) {
@@ -1023,12 +1241,8 @@ class ZigAlarmPanel extends HTMLElement {
     }
     this._updateAlarmSelect();
 
-
     if (!this._panelSelections) this._panelSelections = {};
 
-    const alarmList = this._findZigAlarmPanels();
-    this._updateAlarmSelect(alarmList);
-
     const selected = this._getSelectedAlarmEntity();
     const st = selected ? this._hass.states[selected] : null;
 
@@ -1044,10 +1258,18 @@ class ZigAlarmPanel extends HTMLElement {
       return;
     }
 
-    const a = st.attributes || {};
+    // Runtime-Felder aus der Subscription haben Vorrang vor hass.states
+    const live = this._liveMode ? this._live || {} : {};
+    const cfg = this._configFor(selected, live.config_version ?? st.attributes?.config_version) || {};
+    const a = { ...(st.attributes || {}), ...cfg, ...live };
+    const state = live.state ?? st.state;
+    if (this._journalState !== state) {
+      this._journalState = state;
+      if (this._activeTab === "journal") this._loadJournal(true);
+    }
     if (pill) {
-      pill.textContent = stateToDE(st.state);
-      pill.setAttribute("data-state", st.state);
+      pill.textContent = stateToDE(state);
+      pill.setAttribute("data-state", state);
     }
 
     // Ready indicator (de)
@@ -1124,25 +1346,40 @@ class ZigAlarmPanel extends HTMLElement {
       } else {
         openText.innerHTML = `<span style="color:var(--za-success)">ALLE SENSOREN GESCHLOSSEN</span>`;
       }
+      const quarantined = a.quarantined_sensors || [];
+      if (quarantined.length > 0) {
+        openText.innerHTML += `<br/><span style="color:var(--za-danger)">QUARANTÄNE (FLATTERN, GEBRÜCKT):</span> <br/>${quarantined.join(", ")}`;
+      }
+      const faulted = Object.entries(a.faulted_sensors || {});
+      if (faulted.length > 0) {
+        const why = { unavailable: "nicht erreichbar", stale: "meldet sich nicht" };
+        openText.innerHTML += `<br/><span style="color:var(--za-danger)">GESTÖRTE SENSOREN:</span> <br/>${faulted.map(([eid, r]) => `${eid} (${why[r] || r})`).join(", ")}`;
+      }
+      const outputs = Object.entries(a.output_status || {}).filter(([, o]) => o.state !== "confirmed");
+      if (outputs.length > 0) {
+        const how = { pending: "wird bestätigt", failed: "nicht bestätigt" };
+        openText.innerHTML += `<br/><span style="color:var(--za-danger)">AUSGÄNGE:</span> <br/>${outputs.map(([eid, o]) => `${eid} (${how[o.state] || o.state}, ${o.attempts}x)`).join(", ")}`;
+      }
     }
 
     if (status) status.textContent = `Verbunden mit ${selected} `;
+    this._renderCountdown(a, state);
 
     // Update Camera Preview
     this._updateCamPreview(a.camera_entities || []);
 
     // Check for state change to trigger specific sounds
-    if (this._lastState !== st.state) {
-      if (st.state === "triggered") this._playSound("alarm");
-      else if (st.state === "disarmed" && (this._lastState === "armed_home" || this._lastState === "armed_away" || this._lastState === "triggered")) this._playSound("disarm");
-      else if (st.state === "armed_home" || st.state === "armed_away") this._playSound("arm");
-      this._lastState = st.state;
+    if (this._lastState !== state) {
+      if (state === "triggered") this._playSound("alarm");
+      else if (state === "disarmed" && (this._lastState === "armed_home" || this._lastState === "armed_away" || this._lastState === "triggered")) this._playSound("disarm");
+      else if (state === "armed_home" || state === "armed_away") this._playSound("arm");
+      this._lastState = state;
     }
 
     // Scanner Activation
     const scanner = this._$("scannerOverlay");
     if (scanner) {
-      if (st.state === "armed_home" || st.state === "armed_away") scanner.classList.add("active");
+      if (state === "armed_home" || state === "armed_away") scanner.classList.add("active");
       else scanner.classList.remove("active");
     }
   }
@@ -1180,6 +1417,7 @@ class ZigAlarmPanel extends HTMLElement {
     const camStr = JSON.stringify(cams.sort());
     if (this._lastCamStr === camStr && card.children.length > 0) return;
     this._lastCamStr = camStr;
+    this._camEl = null;
 
     if (!cams || cams.length === 0) {
       card.innerHTML = `< div class="muted" > Keine Kameras ausgewählt</div > `;
@@ -1209,6 +1447,7 @@ class ZigAlarmPanel extends HTMLElement {
     const el = helpers.createCardElement(config);
     el.hass = this._hass;
     card.appendChild(el);
+    this._camEl = el;
   }
 
   async _save() {
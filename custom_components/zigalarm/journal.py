@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Iterable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+JOURNAL_SIZE = 1000
+# Events sammeln und gebündelt speichern statt ein Write pro Event
+SAVE_DELAY = 15
+
+# Event-Typen
+EV_ARMING = "arming"
+EV_ARMED = "armed"
+EV_ARM_BLOCKED = "arm_blocked"
+EV_DISARM = "disarm"
+EV_PENDING = "pending"
+EV_TRIGGER = "trigger"
+EV_OUTPUTS_ON = "outputs_on"
+EV_OUTPUTS_OFF = "outputs_off"
+EV_AUTO_STOP = "auto_stop"
+EV_QUARANTINE = "quarantine"
+EV_QUARANTINE_RELEASE = "quarantine_release"
+EV_KEYPAD = "keypad"
+EV_SENSOR_FAULT = "sensor_fault"
+EV_SENSOR_RESTORED = "sensor_restored"
+EV_KEYPAD_DENIED = "keypad_denied"
+EV_KEYPAD_LOCKED = "keypad_locked"
+EV_OUTPUT_FAILED = "output_failed"
+EV_SNAPSHOTS = "snapshots"
+EV_NOTIFY_FAILED = "notify_failed"
+
+
+def journal_storage_key(entry_id: str) -> str:
+    return f"{DOMAIN}.journal.{entry_id}"
+
+
+# Append-only Ring-Puffer (begrenzt auf JOURNAL_SIZE), persistiert über den
+# Storage-Helper mit verzögertem, gebündeltem Speichern. IDs sind fortlaufend,
+# dadurch ergibt sich die Position eines Cursors (before=<id>) direkt aus der
+# ID, ohne den Puffer zu durchsuchen.
+class AlarmJournal:
+    def __init__(self, hass: HomeAssistant, entry_id: str, size: int = JOURNAL_SIZE) -> None:
+        self.hass = hass
+        self._store: Store = Store(hass, STORAGE_VERSION, journal_storage_key(entry_id))
+        self._events: deque[dict[str, Any]] = deque(maxlen=size)
+        self._seq = 0
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+        if not data:
+            return
+        self._events.extend(data.get("events", []))
+        self._seq = int(data.get("seq", self._events[-1]["id"] if self._events else 0))
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"seq": self._seq, "events": list(self._events)}
+
+    async def async_flush(self) -> None:
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+    @callback
+    def add(self, kind: str, entities: Iterable[str] | None = None, **data: Any) -> dict[str, Any]:
+        self._seq += 1
+        record: dict[str, Any] = {"id": self._seq, "ts": round(time.time(), 3), "type": kind}
+        if entities:
+            record["entities"] = list(entities)
+        record.update({k: v for k, v in data.items() if v is not None})
+        self._events.append(record)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return record
+
+    def page(self, before: int | None = None, limit: int = 50) -> dict[str, Any]:
+        # neueste zuerst; "next" ist der Cursor für die nächste (ältere) Seite
+        if not self._events:
+            return {"events": [], "next": None}
+        first_id = self._events[0]["id"]
+        end = len(self._events) if before is None else max(0, min(len(self._events), before - first_id))
+        start = max(0, end - max(1, int(limit)))
+        items = [self._events[i] for i in range(end - 1, start - 1, -1)]
+        nxt = self._events[start]["id"] if start > 0 else None
+        return {"events": items, "next": nxt}
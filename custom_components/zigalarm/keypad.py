@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import secrets
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.core import HomeAssistant, State
+
+from .compiled import CompiledConfig, entity_domain
+
+_LOGGER = logging.getLogger(__name__)
+
+# gespeichertes Format: pbkdf2_sha256$<iterationen>$<salt hex>$<hash hex>
+PIN_SCHEME = "pbkdf2_sha256"
+PIN_ITERATIONS = 200_000
+PIN_SALT_BYTES = 16
+PIN_CACHE_SIZE = 16
+
+# Sperre pro Keypad: ab LOCKOUT_THRESHOLD Fehlversuchen base * 2^n, gedeckelt
+LOCKOUT_THRESHOLD = 3
+LOCKOUT_BASE = 30.0
+LOCKOUT_MAX = 900.0
+
+# normalisierte Keypad-Aktionen
+KEYPAD_ARM_HOME = "arm_home"
+KEYPAD_ARM_AWAY = "arm_away"
+KEYPAD_DISARM = "disarm"
+
+# Vorprüfung eines Tastendrucks; nur ein eingegebener, falscher Code ist ein Fehlversuch
+KEYPAD_ALLOW = "allow"
+KEYPAD_VERIFY = "verify"
+KEYPAD_NO_PIN = "no_pin"
+KEYPAD_NO_CODE = "no_code"
+
+
+def hash_pin(pin: str, iterations: int = PIN_ITERATIONS, salt: bytes | None = None) -> str:
+    # blockiert (PBKDF2) -> nur im Executor aufrufen
+    salt = salt or secrets.token_bytes(PIN_SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", pin.encode("utf-8"), salt, iterations)
+    return f"{PIN_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def is_pin_hash(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(PIN_SCHEME + "$") and value.count("$") == 3
+
+
+def verify_pin_hash(pin: str, stored: str) -> bool:
+    # blockiert (PBKDF2) -> nur im Executor aufrufen
+    if not is_pin_hash(stored):
+        # noch nicht migrierter Klartext
+        return hmac.compare_digest(pin.encode("utf-8"), str(stored).encode("utf-8"))
+    _, iterations, salt_hex, digest_hex = stored.split("$")
+    try:
+        digest = hashlib.pbkdf2_hmac("sha256", pin.encode("utf-8"), bytes.fromhex(salt_hex), int(iterations))
+        return hmac.compare_digest(digest, bytes.fromhex(digest_hex))
+    except ValueError:
+        _LOGGER.error("Stored master PIN hash is malformed")
+        return False
+
+
+def keypad_triage(action: str, code: str | None, pin_required: bool) -> str:
+    if action == KEYPAD_DISARM:
+        # ohne Master-PIN würde jeder Code passen
+        if not pin_required:
+            return KEYPAD_NO_PIN
+        return KEYPAD_VERIFY if code else KEYPAD_NO_CODE
+    # Scharfschalten braucht keinen Code (code_arm_required = False);
+    # wird trotzdem einer eingegeben, muss er stimmen
+    return KEYPAD_VERIFY if code and pin_required else KEYPAD_ALLOW
+
+
+@dataclass(frozen=True)
+class KeypadPress:
+    entity_id: str
+    action: str
+    raw: str
+    code: str | None
+
+
+def parse_keypad_event(entity_id: str, new_state: State, cfg: CompiledConfig) -> KeypadPress | None:
+    attrs = new_state.attributes
+    if entity_domain(entity_id) == "event":
+        raw = attrs.get("event_type")
+    else:
+        # Z2M-Action-Sensoren: Aktion als State, teils zusätzlich als Attribut
+        raw = attrs.get("action") or new_state.state
+    raw = str(raw or "").strip()
+    if not raw:
+        return None
+
+    key = raw.casefold()
+    if key == cfg.disarm_action.casefold():
+        action = KEYPAD_DISARM
+    elif key == cfg.arm_home_action.casefold():
+        action = KEYPAD_ARM_HOME
+    elif key == cfg.arm_away_action.casefold():
+        action = KEYPAD_ARM_AWAY
+    else:
+        return None
+
+    code = attrs.get("action_code", attrs.get("code"))
+    return KeypadPress(entity_id, action, raw, str(code) if code not in (None, "") else None)
+
+
+# Prüft Codes gegen den gespeicherten Hash im Executor. Ergebnisse werden pro
+# Hash in einem kleinen LRU gehalten (Schlüssel ist ein Digest, nie der Code).
+class PinVerifier:
+    def __init__(self, hass: HomeAssistant, stored: str = "") -> None:
+        self.hass = hass
+        self._stored = stored
+        self._cache: OrderedDict[str, bool] = OrderedDict()
+
+    @property
+    def required(self) -> bool:
+        return bool(self._stored)
+
+    def configure(self, stored: str) -> None:
+        if stored != self._stored:
+            self._stored = stored
+            self._cache.clear()
+
+    def triage(self, action: str, code: str | None) -> str:
+        return keypad_triage(action, code, bool(self._stored))
+
+    async def async_verify(self, code: str | None) -> bool:
+        if not self._stored:
+            return True
+        if not code:
+            return False
+
+        stored = self._stored
+        key = hashlib.sha256(f"{stored}\0{code}".encode("utf-8")).hexdigest()
+        hit = self._cache.get(key)
+        if hit is not None:
+            self._cache.move_to_end(key)
+            return hit
+
+        ok = await self.hass.async_add_executor_job(verify_pin_hash, code, stored)
+        if stored == self._stored:
+            self._cache[key] = ok
+            while len(self._cache) > PIN_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return ok
+
+
+class KeypadLockout:
+    def __init__(self, threshold: int = LOCKOUT_THRESHOLD, base: float = LOCKOUT_BASE,
+                 maximum: float = LOCKOUT_MAX) -> None:
+        self.threshold = threshold
+        self.base = base
+        self.maximum = maximum
+        self._failures: dict[str, int] = {}
+        self._until: dict[str, float] = {}
+
+    def locked_until(self, entity_id: str, now: float) -> float | None:
+        until = self._until.get(entity_id)
+        if until is None:
+            return None
+        if until <= now:
+            del self._until[entity_id]
+            return None
+        return until
+
+    def failure(self, entity_id: str, now: float) -> float | None:
+        count = self._failures.get(entity_id, 0) + 1
+        self._failures[entity_id] = count
+        if count < self.threshold:
+            return None
+        until = now + min(self.maximum, self.base * (2 ** (count - self.threshold)))
+        self._until[entity_id] = until
+        return until
+
+    def success(self, entity_id: str) -> None:
+        self._failures.pop(entity_id, None)
+        self._until.pop(entity_id, None)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .const import DOMAIN
+
+# Messpunkte pro Auslösung:
+#   Sensor-Event time_fired -> Handler -> PENDING/TRIGGERED -> Output-Fan-out fertig
+STAGE_EVENT_TO_HANDLER = "event_to_handler"
+STAGE_HANDLER_TO_STATE = "handler_to_state"
+STAGE_STATE_TO_OUTPUTS = "state_to_outputs"
+STAGE_EVENT_TO_OUTPUTS = "event_to_outputs"
+# Keypad: Event time_fired -> neuer Alarm-Zustand (inkl. PIN-Prüfung)
+STAGE_KEYPAD_TO_STATE = "keypad_to_state"
+
+STAGES = (
+    STAGE_EVENT_TO_HANDLER,
+    STAGE_HANDLER_TO_STATE,
+    STAGE_STATE_TO_OUTPUTS,
+    STAGE_EVENT_TO_OUTPUTS,
+    STAGE_KEYPAD_TO_STATE,
+)
+
+HISTOGRAM_SIZE = 512
+RECENT_TRACES = 25
+
+SIGNAL_METRICS_UPDATED = f"{DOMAIN}_metrics_updated_{{}}"
+
+
+def event_fired_ts(event: Event) -> float | None:
+    ts = getattr(event, "time_fired_timestamp", None)
+    if ts is not None:
+        return float(ts)
+    fired = getattr(event, "time_fired", None)
+    return fired.timestamp() if fired else None
+
+
+class RollingHistogram:
+    def __init__(self, size: int = HISTOGRAM_SIZE) -> None:
+        self._values: deque[float] = deque(maxlen=size)
+        self.total = 0
+
+    def add(self, value_ms: float) -> None:
+        self._values.append(value_ms)
+        self.total += 1
+
+    def _pct(self, ordered: list[float], p: float) -> float:
+        idx = min(len(ordered) - 1, max(0, int(round(p / 100.0 * (len(ordered) - 1)))))
+        return round(ordered[idx], 3)
+
+    def summary(self) -> dict[str, Any]:
+        if not self._values:
+            return {"count": 0, "total": self.total, "p50": None, "p95": None, "p99": None, "max": None}
+        ordered = sorted(self._values)
+        return {
+            "count": len(ordered),
+            "total": self.total,
+            "p50": self._pct(ordered, 50),
+            "p95": self._pct(ordered, 95),
+            "p99": self._pct(ordered, 99),
+            "max": round(ordered[-1], 3),
+        }
+
+
+@dataclass
+class TriggerTrace:
+    entity_id: Optional[str] = None
+    fired: Optional[float] = None
+    handler: Optional[float] = None
+    state: Optional[str] = None
+    state_at: Optional[float] = None
+    outputs_at: Optional[float] = None
+    stages: dict[str, float] = field(default_factory=dict)
+
+    def mark_state(self, state: str) -> None:
+        self.state = state
+        self.state_at = time.time()
+
+    def mark_outputs(self) -> None:
+        self.outputs_at = time.time()
+
+    def after_delay(self, entity_id: str | None = None) -> TriggerTrace:
+        # Auslösung nach der Eingangsverzögerung: Event-Stufen sind mit PENDING
+        # schon erfasst, hier zählt nur noch TRIGGERED -> Ausgänge
+        return TriggerTrace(entity_id=entity_id or self.entity_id)
+
+    def compute(self) -> dict[str, float]:
+        def ms(a: Optional[float], b: Optional[float]) -> Optional[float]:
+            if a is None or b is None:
+                return None
+            return round(max(0.0, b - a) * 1000.0, 3)
+
+        stages = {
+            STAGE_EVENT_TO_HANDLER: ms(self.fired, self.handler),
+            STAGE_HANDLER_TO_STATE: ms(self.handler, self.state_at),
+            STAGE_STATE_TO_OUTPUTS: ms(self.state_at, self.outputs_at),
+            STAGE_EVENT_TO_OUTPUTS: ms(self.fired, self.outputs_at),
+        }
+        self.stages = {k: v for k, v in stages.items() if v is not None}
+        return self.stages
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "entity_id": self.entity_id,
+            "state": self.state,
+            "fired": self.fired,
+            "stages_ms": dict(self.stages),
+        }
+
+
+class LatencyMetrics:
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self.entry_id = entry_id
+        self.histograms: dict[str, RollingHistogram] = {s: RollingHistogram() for s in STAGES}
+        self.recent: deque[dict[str, Any]] = deque(maxlen=RECENT_TRACES)
+        self.last_dispatch: dict[str, Any] | None = None
+
+    def begin(self, entity_id: str | None = None, event: Event | None = None,
+              handler: float | None = None) -> TriggerTrace:
+        return TriggerTrace(
+            entity_id=entity_id,
+            fired=event_fired_ts(event) if event is not None else None,
+            handler=handler,
+        )
+
+    @callback
+    def record(self, trace: TriggerTrace) -> None:
+        for stage, value in trace.compute().items():
+            self.histograms[stage].add(value)
+        self.recent.append(trace.as_dict())
+        async_dispatcher_send(self.hass, SIGNAL_METRICS_UPDATED.format(self.entry_id))
+
+    @callback
+    def record_stage(self, stage: str, value_ms: float) -> None:
+        self.histograms[stage].add(round(max(0.0, value_ms), 3))
+        async_dispatcher_send(self.hass, SIGNAL_METRICS_UPDATED.format(self.entry_id))
+
+    @callback
+    def record_dispatch(self, result: Any) -> None:
+        self.last_dispatch = {
+            "duration_ms": result.duration_ms,
+            "calls": result.calls,
+            "targets": result.targets,
+            "errors": result.errors,
+        }
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "stages": {s: h.summary() for s, h in self.histograms.items()},
+            "recent_triggers": list(self.recent),
+            "last_dispatch": self.last_dispatch,
+        }
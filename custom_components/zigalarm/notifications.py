@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Callable, Iterable
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+NOTIFY_DOMAIN = "notify"
+NOTIFY_TIMEOUT_S = 10.0
+
+
+def notify_target(value: Any) -> str | None:
+    # "notify.mobile_app_x" oder "mobile_app_x" -> "mobile_app_x"; andere Domains -> None
+    s = str(value or "").strip()
+    if s.startswith(f"{NOTIFY_DOMAIN}."):
+        s = s[len(NOTIFY_DOMAIN) + 1:]
+    if not s or "." in s:
+        return None
+    return s
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_s: float, now: float) -> None:
+        self.capacity = capacity
+        self.per_s = per_s
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.per_s)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+# Benachrichtigung beim Auslösen an mehrere notify-Ziele gleichzeitig.
+# Die erste Auslösung geht sofort raus und öffnet ein Fenster; kommen darin
+# weitere Sensoren hinzu, folgt am Fensterende EINE Sammelnachricht mit allen
+# ausgelösten Sensoren. Zusätzlich begrenzt ein Token-Bucket pro Ziel die
+# Anzahl der Calls, egal wie viele Events ankommen. Gesendet wird als Task,
+# die State-Machine wartet nie darauf.
+class NotificationFanout:
+    def __init__(self, hass: HomeAssistant, on_failed: Callable[[list[str]], None]) -> None:
+        self.hass = hass
+        self._on_failed = on_failed
+        self._targets: tuple[str, ...] = ()
+        self._window = 0.0
+        self._rate = 0
+        self._buckets: dict[str, TokenBucket] = {}
+        self._incident: dict[str, None] = {}
+        self._title = ""
+        self._dirty = False
+        self._handle: asyncio.TimerHandle | None = None
+        self.sent = 0
+        self.failed = 0
+        self.suppressed = 0
+
+    def configure(self, targets: Iterable[str], window: float, rate: int) -> None:
+        targets = tuple(targets)
+        if rate != self._rate:
+            self._buckets.clear()
+        self._targets, self._window, self._rate = targets, float(window), int(rate)
+        for target in set(self._buckets) - set(targets):
+            del self._buckets[target]
+
+    @callback
+    def trigger(self, entity_id: str | None, title: str) -> None:
+        if not self._targets:
+            return
+        self._title = title
+        new = entity_id is not None and entity_id not in self._incident
+        if new:
+            self._incident[entity_id] = None
+        if self._handle is None:
+            self._dirty = True
+            self._flush()
+        elif new:
+            self._dirty = True
+
+    @callback
+    def reset(self) -> None:
+        # Unscharf: Vorfall abgeschlossen, nächste Auslösung meldet sofort
+        self.stop()
+        self._incident.clear()
+        self._dirty = False
+
+    @callback
+    def stop(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def summary(self) -> dict[str, Any]:
+        return {"sent": self.sent, "failed": self.failed, "suppressed": self.suppressed}
+
+    # ---------------------- Intern ----------------------
+
+    @callback
+    def _flush(self) -> None:
+        self._handle = None
+        if not self._dirty:
+            return
+        self._dirty = False
+        now = self.hass.loop.time()
+        if self._window > 0:
+            self._handle = self.hass.loop.call_later(self._window, self._flush)
+
+        allowed = [t for t in self._targets if self._bucket(t, now).take(now)]
+        limited = len(self._targets) - len(allowed)
+        if limited:
+            self.suppressed += limited
+            _LOGGER.debug("Notification rate limit reached for %d target(s)", limited)
+        if allowed:
+            self.hass.async_create_task(self._async_send(allowed, self._title, self._message()))
+
+    def _bucket(self, target: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(target)
+        if bucket is None:
+            # rate = Nachrichten pro Minute und Ziel (0 = unbegrenzt)
+            capacity = float(self._rate) if self._rate > 0 else float("inf")
+            bucket = self._buckets[target] = TokenBucket(capacity, self._rate / 60.0, now)
+        return bucket
+
+    def _message(self) -> str:
+        if not self._incident:
+            return "Alarm ausgelöst"
+        names = []
+        for eid in self._incident:
+            st = self.hass.states.get(eid)
+            names.append(str(st.attributes.get("friendly_name") or eid) if st else eid)
+        return f"Alarm ausgelöst: {', '.join(names)}"
+
+    async def _async_send(self, targets: list[str], title: str, message: str) -> None:
+        oks = await asyncio.gather(*(self._send(t, title, message) for t in targets))
+        failed = [t for t, ok in zip(targets, oks) if not ok]
+        self.sent += len(targets) - len(failed)
+        self.failed += len(failed)
+        if failed:
+            self._on_failed([f"{NOTIFY_DOMAIN}.{t}" for t in failed])
+
+    async def _send(self, target: str, title: str, message: str) -> bool:
+        if self.hass.services.has_service(NOTIFY_DOMAIN, target):
+            service, data = target, {"title": title, "message": message}
+        else:
+            # notify-Entity (neue API) statt Legacy-Service
+            service = "send_message"
+            data = {"entity_id": f"{NOTIFY_DOMAIN}.{target}", "title": title, "message": message}
+        try:
+            async with asyncio.timeout(NOTIFY_TIMEOUT_S):
+                await self.hass.services.async_call(NOTIFY_DOMAIN, service, data, blocking=True)
+            return True
+        except TimeoutError:
+            _LOGGER.warning("Notification to %s timed out after %.0f s", target, NOTIFY_TIMEOUT_S)
+        except Exception:  # noqa: BLE001 - ein defektes Ziel darf die anderen nicht blockieren
+            _LOGGER.exception("Notification to %s failed", target)
+        return False
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Mapping
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util.yaml import parse_yaml
+
+from .const import (
+    OPT_PERIMETER,
+    OPT_MOTION,
+    OPT_ALWAYS,
+    OPT_SIREN,
+    OPT_SIREN_ENTITIES,
+    OPT_NOTIFY_TARGETS,
+    OPT_NOTIFY_WINDOW,
+    OPT_NOTIFY_RATE,
+    DEFAULT_NOTIFY_WINDOW,
+    DEFAULT_NOTIFY_RATE,
+    OPT_LIGHTS,
+    OPT_LIGHT_COLOR,
+    OPT_LIGHT_BRIGHTNESS,
+    OPT_LIGHT_EFFECT,
+    OPT_LIGHT_RESTORE,
+    OPT_CAMERAS,
+    OPT_CAMERA_SHOW_ONLY_TRIGGERED,
+    OPT_CAMERA_MAP,
+    OPT_EXIT_DELAY,
+    OPT_ENTRY_DELAY,
+    OPT_TRIGGER_TIME,
+    DEFAULT_EXIT_DELAY,
+    DEFAULT_ENTRY_DELAY,
+    DEFAULT_TRIGGER_TIME,
+    DEFAULT_LIGHT_COLOR,
+    DEFAULT_LIGHT_BRIGHTNESS,
+    DEFAULT_LIGHT_EFFECT,
+    DEFAULT_LIGHT_RESTORE,
+    DEFAULT_CAMERA_SHOW_ONLY_TRIGGERED,
+    OPT_FLAP_THRESHOLD,
+    OPT_FLAP_WINDOW,
+    OPT_FLAP_QUARANTINE,
+    OPT_SENSOR_DEBOUNCE,
+    DEFAULT_FLAP_THRESHOLD,
+    DEFAULT_FLAP_WINDOW,
+    DEFAULT_FLAP_QUARANTINE,
+    DEFAULT_SENSOR_DEBOUNCE,
+    OPT_KEYPAD_ENABLED,
+    OPT_KEYPAD_ENTITIES,
+    OPT_ARM_HOME_ACTION,
+    OPT_ARM_AWAY_ACTION,
+    OPT_DISARM_ACTION,
+    OPT_MASTER_PIN,
+    OPT_SUPERVISION_INTERVAL,
+    OPT_SUPERVISION_MODE,
+    DEFAULT_SUPERVISION_INTERVAL,
+    DEFAULT_SUPERVISION_MODE,
+    OPT_CONFIRMATION_RULES,
+    OPT_TRIGGER_PREDICATES,
+)
+from .compiled import parse_camera_map, uniq_clean
+from .correlator import parse_rule
+from .keypad import hash_pin, is_pin_hash, verify_pin_hash
+from .notifications import notify_target
+from .predicates import normalize_spec
+
+EXPORT_VERSION = 1
+
+# Options, die build_options schreibt (Schlüssel = Feldname in set_config);
+# nur diese werden exportiert und beim Import akzeptiert
+CONFIG_FIELDS = (
+    OPT_PERIMETER,
+    OPT_MOTION,
+    OPT_ALWAYS,
+    OPT_SIREN_ENTITIES,
+    OPT_SIREN,
+    OPT_NOTIFY_TARGETS,
+    OPT_NOTIFY_WINDOW,
+    OPT_NOTIFY_RATE,
+    OPT_LIGHTS,
+    OPT_LIGHT_COLOR,
+    OPT_LIGHT_BRIGHTNESS,
+    OPT_LIGHT_EFFECT,
+    OPT_LIGHT_RESTORE,
+    OPT_CAMERAS,
+    OPT_CAMERA_SHOW_ONLY_TRIGGERED,
+    OPT_CAMERA_MAP,
+    OPT_EXIT_DELAY,
+    OPT_ENTRY_DELAY,
+    OPT_TRIGGER_TIME,
+    OPT_FLAP_THRESHOLD,
+    OPT_FLAP_WINDOW,
+    OPT_FLAP_QUARANTINE,
+    OPT_SENSOR_DEBOUNCE,
+    OPT_SUPERVISION_INTERVAL,
+    OPT_SUPERVISION_MODE,
+    OPT_CONFIRMATION_RULES,
+    OPT_TRIGGER_PREDICATES,
+    OPT_KEYPAD_ENABLED,
+    OPT_KEYPAD_ENTITIES,
+    OPT_ARM_HOME_ACTION,
+    OPT_ARM_AWAY_ACTION,
+    OPT_DISARM_ACTION,
+    OPT_MASTER_PIN,
+)
+
+
+def keep(data: Mapping[str, Any], key: str, options: Mapping[str, Any], opt: str, default: Any) -> Any:
+    # Feld nicht übergeben -> bisherigen Wert behalten (Panel schickt nicht alles mit)
+    value = data.get(key)
+    if value is None:
+        return options.get(opt, default)
+    return value
+
+
+def _pin_option(pin: str, stored: str) -> str:
+    # blockiert (PBKDF2) -> nur im Executor; gleiche PIN behält den alten Hash,
+    # sonst wäre jeder Import wegen des neuen Salts eine Änderung
+    if not pin:
+        return ""
+    if is_pin_hash(pin):
+        return pin
+    if stored and verify_pin_hash(pin, stored):
+        return stored
+    return hash_pin(pin)
+
+
+async def async_build_options(hass: HomeAssistant, data: Mapping[str, Any],
+                              current: Mapping[str, Any]) -> dict[str, Any]:
+    # set_config-Felder prüfen und in Options übersetzen; ValueError bei Unsinn
+    options = dict(current or {})
+
+    options[OPT_PERIMETER] = uniq_clean(data.get("perimeter_sensors"))
+    options[OPT_MOTION] = uniq_clean(data.get("motion_sensors"))
+    options[OPT_ALWAYS] = uniq_clean(data.get("always_sensors"))
+
+    options[OPT_SIREN_ENTITIES] = uniq_clean(data.get("siren_entities"))
+    options[OPT_SIREN] = (str(data.get("siren_entity") or "").strip() or None)
+
+    targets = uniq_clean(keep(data, "notify_targets", options, OPT_NOTIFY_TARGETS, []))
+    bad = [t for t in targets if notify_target(t) is None]
+    if bad:
+        raise ValueError(f"Ungültiges Benachrichtigungsziel (notify.*): {', '.join(bad)}")
+    options[OPT_NOTIFY_TARGETS] = targets
+    options[OPT_NOTIFY_WINDOW] = int(
+        keep(data, "notify_dedup_window", options, OPT_NOTIFY_WINDOW, DEFAULT_NOTIFY_WINDOW)
+    )
+    options[OPT_NOTIFY_RATE] = int(keep(data, "notify_rate_limit", options, OPT_NOTIFY_RATE, DEFAULT_NOTIFY_RATE))
+
+    options[OPT_LIGHTS] = uniq_clean(data.get("alarm_lights"))
+    options[OPT_LIGHT_COLOR] = str(data.get("alarm_light_color") or DEFAULT_LIGHT_COLOR)
+    options[OPT_LIGHT_BRIGHTNESS] = int(data.get("alarm_light_brightness") or DEFAULT_LIGHT_BRIGHTNESS)
+    options[OPT_LIGHT_EFFECT] = str(data.get("alarm_light_effect") or DEFAULT_LIGHT_EFFECT)
+    options[OPT_LIGHT_RESTORE] = bool(
+        data.get("alarm_light_restore")
+        if data.get("alarm_light_restore") is not None
+        else DEFAULT_LIGHT_RESTORE
+    )
+
+    options[OPT_CAMERAS] = uniq_clean(data.get("camera_entities"))
+    options[OPT_CAMERA_SHOW_ONLY_TRIGGERED] = bool(
+        data.get("camera_show_only_triggered")
+        if data.get("camera_show_only_triggered") is not None
+        else DEFAULT_CAMERA_SHOW_ONLY_TRIGGERED
+    )
+    try:
+        options[OPT_CAMERA_MAP] = parse_camera_map(keep(data, "camera_map", options, OPT_CAMERA_MAP, {}))
+    except (TypeError, ValueError) as err:
+        raise ValueError(f"Ungültige Kamera-Zuordnung: {err}") from err
+
+    options[OPT_EXIT_DELAY] = int(data.get("exit_delay") or DEFAULT_EXIT_DELAY)
+    options[OPT_ENTRY_DELAY] = int(data.get("entry_delay") or DEFAULT_ENTRY_DELAY)
+    options[OPT_TRIGGER_TIME] = int(data.get("trigger_time") or DEFAULT_TRIGGER_TIME)
+
+    options[OPT_FLAP_THRESHOLD] = int(
+        keep(data, "flap_threshold", options, OPT_FLAP_THRESHOLD, DEFAULT_FLAP_THRESHOLD)
+    )
+    options[OPT_FLAP_WINDOW] = int(keep(data, "flap_window", options, OPT_FLAP_WINDOW, DEFAULT_FLAP_WINDOW))
+    options[OPT_FLAP_QUARANTINE] = int(
+        keep(data, "flap_quarantine", options, OPT_FLAP_QUARANTINE, DEFAULT_FLAP_QUARANTINE)
+    )
+    options[OPT_SENSOR_DEBOUNCE] = float(
+        keep(data, "sensor_debounce", options, OPT_SENSOR_DEBOUNCE, DEFAULT_SENSOR_DEBOUNCE)
+    )
+
+    options[OPT_SUPERVISION_INTERVAL] = int(
+        keep(data, "supervision_interval", options, OPT_SUPERVISION_INTERVAL, DEFAULT_SUPERVISION_INTERVAL)
+    )
+    options[OPT_SUPERVISION_MODE] = str(
+        keep(data, "supervision_mode", options, OPT_SUPERVISION_MODE, DEFAULT_SUPERVISION_MODE)
+    )
+
+    # Regeln vorab prüfen: ungültige Regel -> Fehler statt stillem Verwerfen
+    rules = keep(data, "confirmation_rules", options, OPT_CONFIRMATION_RULES, [])
+    if not isinstance(rules, list):
+        raise ValueError("confirmation_rules muss eine Liste sein")
+    try:
+        options[OPT_CONFIRMATION_RULES] = [parse_rule(rule).as_dict() for rule in rules]
+    except (TypeError, ValueError) as err:
+        raise ValueError(f"Ungültige Bestätigungsregel: {err}") from err
+
+    predicates = keep(data, "trigger_predicates", options, OPT_TRIGGER_PREDICATES, {})
+    if not isinstance(predicates, dict):
+        raise ValueError("trigger_predicates muss ein Mapping entity_id -> Bedingung sein")
+    try:
+        options[OPT_TRIGGER_PREDICATES] = {
+            str(eid).strip(): normalize_spec(spec) for eid, spec in predicates.items()
+        }
+    except (TypeError, ValueError) as err:
+        raise ValueError(f"Ungültige Trigger-Bedingung: {err}") from err
+
+    options[OPT_KEYPAD_ENABLED] = bool(keep(data, "keypad_enabled", options, OPT_KEYPAD_ENABLED, False))
+    options[OPT_KEYPAD_ENTITIES] = uniq_clean(
+        keep(data, "keypad_entities", options, OPT_KEYPAD_ENTITIES, [])
+    )
+    options[OPT_ARM_HOME_ACTION] = str(keep(data, "arm_home_action", options, OPT_ARM_HOME_ACTION, "arm_home"))
+    options[OPT_ARM_AWAY_ACTION] = str(keep(data, "arm_away_action", options, OPT_ARM_AWAY_ACTION, "arm_away"))
+    options[OPT_DISARM_ACTION] = str(keep(data, "disarm_action", options, OPT_DISARM_ACTION, "disarm"))
+
+    # PIN nur gehasht speichern; "" entfernt sie
+    if data.get("master_pin") is not None:
+        pin = str(data["master_pin"]).strip()
+        options[OPT_MASTER_PIN] = await hass.async_add_executor_job(
+            _pin_option, pin, str(options.get(OPT_MASTER_PIN) or "")
+        )
+
+    return options
+
+
+# ---------------------- Export / Import ----------------------
+
+def export_options(options: Mapping[str, Any]) -> dict[str, Any]:
+    # ohne PIN-Hash (wie in den Diagnosedaten); der Import lässt die PIN dann unverändert
+    return {key: options[key] for key in CONFIG_FIELDS if key in options and key != OPT_MASTER_PIN}
+
+
+def parse_document(raw: Any) -> list[dict[str, Any]]:
+    # JSON/YAML-Text oder bereits geparstes Objekt -> Liste der Entry-Blöcke
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            try:
+                raw = parse_yaml(raw)
+            except HomeAssistantError as err:
+                raise ValueError(f"Dokument ist weder JSON noch YAML: {err}") from err
+    if isinstance(raw, Mapping):
+        version = raw.get("version", EXPORT_VERSION)
+        if version != EXPORT_VERSION:
+            raise ValueError(f"Nicht unterstützte Export-Version: {version}")
+        raw = raw.get("entries")
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("Dokument enthält keine entries")
+
+    items = []
+    for i, item in enumerate(raw):
+        if not isinstance(item, Mapping) or not isinstance(item.get("options"), Mapping):
+            raise ValueError(f"entries[{i}]: options fehlen")
+        unknown = set(item["options"]) - set(CONFIG_FIELDS)
+        if unknown:
+            raise ValueError(f"entries[{i}]: unbekannte Felder: {', '.join(sorted(unknown))}")
+        items.append(dict(item))
+    return items
+
+
+def diff_options(current: Mapping[str, Any], new: Mapping[str, Any], keys: Any) -> list[str]:
+    # nur die im Dokument genannten Felder vergleichen: fehlende Defaults in
+    # älteren Entries sollen nicht als Änderung zählen
+    return sorted(key for key in keys if new.get(key) != current.get(key))
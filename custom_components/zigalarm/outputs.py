@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Mapping
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+_LOGGER = logging.getLogger(__name__)
+
+# Zustellbestätigung: erwarteter State je Service
+_EXPECTED_STATE = {"turn_on": "on", "turn_off": "off"}
+
+OUTPUT_PENDING = "pending"
+OUTPUT_CONFIRMED = "confirmed"
+OUTPUT_FAILED = "failed"
+
+# Wiederholung unbestätigter Ausgänge: 2 s, 4 s, 8 s, ... bis zur Deadline
+RETRY_BASE_S = 2.0
+RETRY_MAX_S = 8.0
+CONFIRM_DEADLINE_S = 30.0
+# call_at darf minimal zu früh feuern
+_EPS = 0.01
+
+
+@dataclass(frozen=True)
+class OutputCall:
+    domain: str
+    service: str
+    entity_id: str
+    data: Mapping[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class DispatchResult:
+    started: float = 0.0
+    finished: float = 0.0
+    calls: int = 0
+    targets: int = 0
+    errors: int = 0
+
+    @property
+    def duration_ms(self) -> float:
+        return round((self.finished - self.started) * 1000.0, 3)
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, Mapping):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def group_calls(calls: Iterable[OutputCall]) -> list[tuple[str, str, dict[str, Any]]]:
+    # gleiche Domain + Service + Payload -> EIN Service-Call mit Entity-Liste
+    groups: dict[tuple, tuple[str, str, dict[str, Any], list[str]]] = {}
+    for c in calls:
+        key = (c.domain, c.service, _freeze(c.data))
+        grp = groups.get(key)
+        if grp is None:
+            grp = groups[key] = (c.domain, c.service, dict(c.data), [])
+        if c.entity_id not in grp[3]:
+            grp[3].append(c.entity_id)
+    return [(dom, svc, {**data, "entity_id": ents}) for dom, svc, data, ents in groups.values()]
+
+
+class OutputDispatcher:
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.last_result: DispatchResult | None = None
+
+    async def _call(self, domain: str, service: str, data: dict[str, Any]) -> bool:
+        try:
+            await self.hass.services.async_call(domain, service, data, blocking=False)
+            return True
+        except Exception:  # noqa: BLE001 - ein defekter Ausgang darf die anderen nicht blockieren
+            _LOGGER.exception("Output call %s.%s failed for %s", domain, service, data.get("entity_id"))
+            return False
+
+    async def async_dispatch(self, *stages: Iterable[OutputCall], record: bool = True) -> DispatchResult:
+        # Stufen nacheinander (z.B. erst Sirenen, dann Lichter),
+        # Gruppen innerhalb einer Stufe gleichzeitig. record=False (Retries)
+        # lässt last_result stehen: Diagnose zeigt den letzten Alarm-Dispatch.
+        loop = self.hass.loop
+        result = DispatchResult(started=loop.time())
+
+        for stage in stages:
+            grouped = group_calls(stage)
+            if not grouped:
+                continue
+            result.calls += len(grouped)
+            result.targets += sum(len(d["entity_id"]) for _, _, d in grouped)
+            oks = await asyncio.gather(*(self._call(dom, svc, data) for dom, svc, data in grouped))
+            result.errors += oks.count(False)
+
+        result.finished = loop.time()
+        if record:
+            self.last_result = result
+        _LOGGER.debug(
+            "Output fan-out: %d calls / %d targets in %.1f ms (%d errors)",
+            result.calls, result.targets, result.duration_ms, result.errors,
+        )
+        return result
+
+
+@dataclass
+class _Expectation:
+    call: OutputCall
+    expected: str
+    sent: float
+    next_at: float
+    backoff: float = RETRY_BASE_S
+    attempts: int = 1
+
+
+# Prüft nach jedem Dispatch, ob Sirenen/Lichter den erwarteten State melden.
+# Bestätigung kommt über state_changed der betroffenen Entities; unbestätigte
+# Ausgänge werden über genau einen Loop-Timer mit Backoff erneut gesendet
+# (gebündelt, als Task), bis die Deadline abläuft. Nichts davon wartet im
+# Dispatch-Pfad oder in der State-Machine.
+class OutputSupervisor:
+    def __init__(self, hass: HomeAssistant, dispatcher: OutputDispatcher,
+                 on_change: Callable[[list[tuple[str, str]]], None]) -> None:
+        self.hass = hass
+        self._dispatcher = dispatcher
+        self._on_change = on_change
+        self._pending: dict[str, _Expectation] = {}
+        self._status: dict[str, dict[str, Any]] = {}
+        self._view: dict[str, dict[str, Any]] | None = {}
+        self._handle: asyncio.TimerHandle | None = None
+        self._unsub: Callable[[], None] | None = None
+
+    @property
+    def status(self) -> dict[str, dict[str, Any]]:
+        # neues Objekt pro Änderung, damit HA die Attribut-Änderung erkennt
+        if self._view is None:
+            self._view = dict(sorted(self._status.items()))
+        return self._view
+
+    @callback
+    def watch(self, calls: Iterable[OutputCall]) -> None:
+        # vor dem Senden aufrufen: eine neue Erwartung ersetzt die alte pro Entity
+        now = self.hass.loop.time()
+        changes: list[tuple[str, str]] = []
+        for call in calls:
+            expected = _EXPECTED_STATE.get(call.service)
+            if expected is None:
+                continue
+            eid = call.entity_id
+            exp = _Expectation(call, expected, now, now + RETRY_BASE_S)
+            st = self.hass.states.get(eid)
+            if st is not None and st.state == expected:
+                self._pending.pop(eid, None)
+                self._set(eid, exp, OUTPUT_CONFIRMED, 0.0)
+            else:
+                self._pending[eid] = exp
+                self._set(eid, exp, OUTPUT_PENDING)
+            changes.append((eid, self._status[eid]["state"]))
+        self._resubscribe()
+        self._rearm()
+        if changes:
+            self._on_change(changes)
+
+    @callback
+    def stop(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    # ---------------------- Intern ----------------------
+
+    def _set(self, eid: str, exp: _Expectation, state: str, latency_s: float | None = None) -> None:
+        self._status[eid] = {
+            "state": state,
+            "expected": exp.expected,
+            "attempts": exp.attempts,
+            "latency_ms": round(latency_s * 1000.0, 1) if latency_s is not None else None,
+        }
+        self._view = None
+
+    def _resubscribe(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        if self._pending:
+            self._unsub = async_track_state_change_event(self.hass, list(self._pending), self._on_state)
+
+    @callback
+    def _on_state(self, event: Event) -> None:
+        eid = event.data.get("entity_id")
+        exp = self._pending.get(eid)
+        new_state = event.data.get("new_state")
+        if exp is None or new_state is None or new_state.state != exp.expected:
+            return
+        del self._pending[eid]
+        self._set(eid, exp, OUTPUT_CONFIRMED, self.hass.loop.time() - exp.sent)
+        if not self._pending:
+            self.stop()
+        self._on_change([(eid, OUTPUT_CONFIRMED)])
+
+    def _rearm(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._pending:
+            nxt = min(exp.next_at for exp in self._pending.values())
+            self._handle = self.hass.loop.call_at(nxt, self._fire)
+
+    @callback
+    def _fire(self) -> None:
+        self._handle = None
+        now = self.hass.loop.time()
+        retry: list[OutputCall] = []
+        changes: list[tuple[str, str]] = []
+        for eid, exp in list(self._pending.items()):
+            if exp.next_at > now + _EPS:
+                continue
+            if now - exp.sent >= CONFIRM_DEADLINE_S - _EPS:
+                del self._pending[eid]
+                self._set(eid, exp, OUTPUT_FAILED)
+                changes.append((eid, OUTPUT_FAILED))
+                continue
+            exp.attempts += 1
+            exp.backoff = min(exp.backoff * 2, RETRY_MAX_S)
+            exp.next_at = min(now + exp.backoff, exp.sent + CONFIRM_DEADLINE_S)
+            self._set(eid, exp, OUTPUT_PENDING)
+            retry.append(exp.call)
+
+        if retry:
+            _LOGGER.debug("Retrying unconfirmed outputs: %s", ", ".join(c.entity_id for c in retry))
+            self.hass.async_create_task(self._dispatcher.async_dispatch(retry, record=False))
+        if changes:
+            self._resubscribe()
+        self._rearm()
+        if changes:
+            self._on_change(changes)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Mapping, Optional
+
+from homeassistant.core import State
+
+_LOGGER = logging.getLogger(__name__)
+
+# (neuer State, alter State oder None) -> Sensor gilt als ausgelöst/offen
+Predicate = Callable[[State, Optional[State]], bool]
+
+# Rate-of-change: kürzere Abstände zählen als 1 s, damit Burst-Meldungen
+# (mehrere Updates pro Sekunde) nicht zu beliebig großen Raten führen
+RATE_MIN_DT = 1.0
+
+_KEYS = ("attribute", "state_in", "above", "below", "rate")
+
+
+def state_on(new: State, old: State | None = None) -> bool:
+    return new.state == "on"
+
+
+def _number(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_spec(raw: Any) -> dict[str, Any]:
+    # prüft und vereinheitlicht eine Regel; wirft ValueError bei Unsinn
+    if not isinstance(raw, Mapping):
+        raise ValueError("predicate must be a mapping")
+    unknown = set(raw) - set(_KEYS)
+    if unknown:
+        raise ValueError(f"unknown keys: {', '.join(sorted(unknown))}")
+
+    spec: dict[str, Any] = {}
+    attribute = str(raw.get("attribute") or "").strip()
+    if attribute:
+        spec["attribute"] = attribute
+    if raw.get("state_in") is not None:
+        values = raw["state_in"]
+        values = [values] if isinstance(values, (str, int, float)) else list(values)
+        if not values:
+            raise ValueError("state_in is empty")
+        spec["state_in"] = sorted({str(v) for v in values})
+    for key in ("above", "below", "rate"):
+        if raw.get(key) is not None:
+            value = _number(raw[key])
+            if value is None:
+                raise ValueError(f"{key} must be a number")
+            spec[key] = value
+    if "rate" in spec and spec["rate"] <= 0:
+        raise ValueError("rate must be > 0")
+    if not set(spec) - {"attribute"}:
+        raise ValueError("no condition given")
+    return spec
+
+
+def compile_predicate(spec: Mapping[str, Any]) -> Predicate:
+    # einmal pro Options-Änderung: aus der Regel wird eine feste Closure-Kette,
+    # im Hot-Path wird nichts mehr interpretiert
+    attribute = spec.get("attribute")
+    if attribute:
+        def read(st: State) -> Any:
+            return st.attributes.get(attribute)
+    else:
+        def read(st: State) -> Any:
+            return st.state
+
+    checks: list[Predicate] = []
+
+    if "state_in" in spec:
+        values = frozenset(spec["state_in"])
+        checks.append(lambda new, old: str(read(new)) in values)
+
+    if "above" in spec:
+        above = spec["above"]
+
+        def is_above(new: State, old: State | None) -> bool:
+            value = _number(read(new))
+            return value is not None and value > above
+        checks.append(is_above)
+
+    if "below" in spec:
+        below = spec["below"]
+
+        def is_below(new: State, old: State | None) -> bool:
+            value = _number(read(new))
+            return value is not None and value < below
+        checks.append(is_below)
+
+    if "rate" in spec:
+        rate = spec["rate"]
+
+        def is_rate(new: State, old: State | None) -> bool:
+            if old is None:
+                return False  # ohne Vorgänger (Seed/Reconcile) keine Rate
+            value, prev = _number(read(new)), _number(read(old))
+            if value is None or prev is None:
+                return False
+            dt = max(RATE_MIN_DT, (new.last_updated - old.last_updated).total_seconds())
+            return abs(value - prev) / dt >= rate
+        checks.append(is_rate)
+
+    if len(checks) == 1:
+        return checks[0]
+    chain = tuple(checks)
+    return lambda new, old: all(check(new, old) for check in chain)
+
+
+def compile_predicates(raw: Any) -> tuple[dict[str, dict[str, Any]], dict[str, Predicate]]:
+    # entity_id -> Regel; ungültige Einträge werden geloggt und ignoriert
+    specs: dict[str, dict[str, Any]] = {}
+    compiled: dict[str, Predicate] = {}
+    if not isinstance(raw, Mapping):
+        return specs, compiled
+    for entity_id, item in raw.items():
+        eid = str(entity_id).strip()
+        try:
+            spec = normalize_spec(item)
+        except (TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid trigger predicate for %s: %s", eid, err)
+            continue
+        specs[eid] = spec
+        compiled[eid] = compile_predicate(spec)
+    return specs, compiled
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import cProfile
+import logging
+import os
+import pstats
+import time
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DURATION_S = 300
+PROFILE_TOP = 25
+
+# so wie der Loader die Module einträgt (co_filename), daher nicht resolve()
+_ROOT = str(Path(__file__).parent) + os.sep
+
+
+def _collect(profile: cProfile.Profile, path: Path, limit: int) -> dict[str, Any]:
+    # Executor: Statistik bauen, vollständig als .prof ablegen (snakeviz/pstats),
+    # für die Zusammenfassung nur Funktionen dieser Integration
+    stats = pstats.Stats(profile)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stats.dump_stats(path)
+
+    rows = []
+    self_total = 0.0
+    for (filename, lineno, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        if not filename.startswith(_ROOT):
+            continue
+        self_total += tt
+        rows.append({
+            "function": f"{filename[len(_ROOT):]}:{lineno}({func})",
+            "calls": nc,
+            "primitive_calls": cc,
+            "self_ms": round(tt * 1000.0, 3),
+            "cumulative_ms": round(ct * 1000.0, 3),
+            "per_call_us": round(ct / nc * 1e6, 1) if nc else None,
+        })
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return {"functions": len(rows), "self_ms_total": round(self_total * 1000.0, 3), "top": rows[:limit]}
+
+
+# cProfile auf Abruf für die ganze Integration. Ohne laufende Messung ist
+# nichts eingehängt (kein Wrapper, kein Hook) -> kein Overhead im Hot-Path.
+class IntegrationProfiler:
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.last: dict[str, Any] | None = None
+        self._profile: cProfile.Profile | None = None
+        self._started = 0.0
+        self._stop_handle = None
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def start(self, max_duration: float = DEFAULT_PROFILE_DURATION_S) -> None:
+        if self._profile is not None:
+            raise ValueError("Profiling läuft bereits")
+        # builtins=False: C-Aufrufe (json, dict, ...) zählen beim Aufrufer -> weniger Overhead
+        profile = cProfile.Profile(builtins=False)
+        try:
+            profile.enable()
+        except ValueError as err:  # anderer Profiler aktiv (z.B. HA-Integration "profiler")
+            raise ValueError(f"Profiler nicht verfügbar: {err}") from err
+        self._profile = profile
+        self._started = self.hass.loop.time()
+        if max_duration:
+            self._stop_handle = self.hass.loop.call_later(max_duration, self._timed_stop)
+        _LOGGER.info("Profiling started")
+
+    def _timed_stop(self) -> None:
+        self._stop_handle = None
+        self.hass.async_create_task(self.async_stop())
+
+    async def async_stop(self) -> dict[str, Any] | None:
+        profile, self._profile = self._profile, None
+        if profile is None:
+            return None
+        profile.disable()
+        if self._stop_handle is not None:
+            self._stop_handle.cancel()
+            self._stop_handle = None
+
+        duration = self.hass.loop.time() - self._started
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = Path(self.hass.config.path(DOMAIN, "profiles", f"profile-{stamp}.prof"))
+        summary = await self.hass.async_add_executor_job(_collect, profile, path, PROFILE_TOP)
+        summary = {"path": str(path), "stopped": time.time(), "duration_s": round(duration, 3), **summary}
+        self.last = summary
+        _LOGGER.info("Profiling stopped after %.1f s: %s", duration, path)
+        return summary
+
+    def summary(self) -> dict[str, Any]:
+        return {"active": self.active, "last": self.last}
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Mapping
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+Handler = Callable[[Event, int], None]
+
+
+def get_router(hass: HomeAssistant) -> "ZigAlarmEventRouter":
+    data = hass.data.setdefault(DOMAIN, {})
+    router = data.get("router")
+    if router is None:
+        router = data["router"] = ZigAlarmEventRouter(hass)
+    return router
+
+
+# Eine einzige state_changed-Subscription für alle ZigAlarm-Instanzen.
+# Index: entity_id -> ((handler, rolle), ...) — jedes Event geht nur an die
+# Panels, die den Sensor kennen, mit bereits vorberechneter Rolle.
+class ZigAlarmEventRouter:
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._panels: dict[str, tuple[Handler, Mapping[str, int]]] = {}
+        self._index: dict[str, tuple[tuple[Handler, int], ...]] = {}
+        self._unsub: Callable[[], None] | None = None
+
+    # ---------------------- Registration ----------------------
+
+    @callback
+    def async_register(self, key: str, handler: Handler, roles: Mapping[str, int]) -> None:
+        # auch für Updates: nur die betroffenen Entities werden neu indiziert
+        old = self._panels.get(key)
+        old_roles = old[1] if old else {}
+        self._panels[key] = (handler, roles)
+
+        touched = {e for e in roles if old_roles.get(e) != roles[e]}
+        touched |= {e for e in old_roles if e not in roles}
+        if old and old[0] != handler:
+            touched |= set(roles)
+        self._reindex(touched)
+        self._ensure_subscription()
+
+    @callback
+    def async_unregister(self, key: str) -> None:
+        old = self._panels.pop(key, None)
+        if old:
+            self._reindex(set(old[1]))
+        self._ensure_subscription()
+
+    def _reindex(self, entity_ids: set[str]) -> None:
+        for eid in entity_ids:
+            targets = tuple(
+                (handler, roles[eid]) for handler, roles in self._panels.values() if eid in roles
+            )
+            if targets:
+                self._index[eid] = targets
+            else:
+                self._index.pop(eid, None)
+
+    def _ensure_subscription(self) -> None:
+        if self._index and self._unsub is None:
+            self._unsub = self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED, self._async_route, event_filter=self._async_filter
+            )
+        elif not self._index and self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    # ---------------------- Routing ----------------------
+
+    @callback
+    def _async_filter(self, event_data: Mapping[str, Any]) -> bool:
+        return event_data.get("entity_id") in self._index
+
+    @callback
+    def _async_route(self, event: Event) -> None:
+        for handler, role in self._index.get(event.data.get("entity_id"), ()):
+            try:
+                handler(event, role)
+            except Exception:  # noqa: BLE001 - ein Panel darf die anderen nicht blockieren
+                _LOGGER.exception("ZigAlarm handler failed for %s", event.data.get("entity_id"))
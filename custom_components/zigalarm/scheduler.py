@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Mapping
+
+from homeassistant.core import HomeAssistant, callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# Deadline-Arten eines Panels
+DL_ARMING = "arming"
+DL_PENDING = "pending"
+DL_AUTO_STOP = "auto_stop"
+
+DeadlineCallback = Callable[[str, Any], None]
+
+# call_at darf minimal zu früh feuern
+_EPS = 0.001
+
+
+# Absolute Deadlines (Unix-Zeit, damit sie einen Neustart überleben) mit genau
+# einem Loop-Timer für die jeweils nächste. Pro Art gibt es höchstens eine
+# Deadline; `data` ist frei (z. B. das Ziel beim Scharfschalten).
+# Die Uhr läuft über hass.loop.time() plus einem beim Start gemessenen Offset:
+# monoton im Betrieb und mit einer virtuellen Loop-Uhr (Replay) deterministisch.
+class DeadlineScheduler:
+    def __init__(self, hass: HomeAssistant, on_due: DeadlineCallback) -> None:
+        self.hass = hass
+        self._on_due = on_due
+        self._deadlines: dict[str, tuple[float, Any]] = {}
+        self._handle: asyncio.TimerHandle | None = None
+        self._offset = time.time() - hass.loop.time()
+
+    def now(self) -> float:
+        return self.hass.loop.time() + self._offset
+
+    def deadline(self, kind: str) -> float | None:
+        item = self._deadlines.get(kind)
+        return item[0] if item else None
+
+    @callback
+    def schedule(self, kind: str, delay_s: float, data: Any = None) -> float:
+        deadline = self.now() + max(0.0, float(delay_s))
+        self._deadlines[kind] = (deadline, data)
+        self._rearm()
+        return deadline
+
+    @callback
+    def cancel(self, *kinds: str) -> None:
+        changed = False
+        for kind in kinds:
+            changed |= self._deadlines.pop(kind, None) is not None
+        if changed:
+            self._rearm()
+
+    @callback
+    def cancel_all(self) -> None:
+        self._deadlines = {}
+        self._rearm()
+
+    @callback
+    def stop(self) -> None:
+        # nur den Timer stoppen, Deadlines bleiben für die Restore-Daten erhalten
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    # ---------------------- Persistenz ----------------------
+
+    def as_dict(self) -> dict[str, Any]:
+        return {kind: {"deadline": dl, "data": data} for kind, (dl, data) in self._deadlines.items()}
+
+    @callback
+    def restore(self, data: Mapping[str, Any] | None) -> None:
+        # abgelaufene Deadlines feuern direkt im nächsten Loop-Durchlauf
+        for kind, item in (data or {}).items():
+            try:
+                self._deadlines[kind] = (float(item["deadline"]), item.get("data"))
+            except (KeyError, TypeError, ValueError):
+                _LOGGER.debug("Ignoring invalid restored deadline %s: %s", kind, item)
+        self._rearm()
+
+    # ---------------------- Timer ----------------------
+
+    def _rearm(self) -> None:
+        self.stop()
+        if not self._deadlines:
+            return
+        nxt = min(dl for dl, _ in self._deadlines.values())
+        self._handle = self.hass.loop.call_at(nxt - self._offset, self._fire)
+
+    @callback
+    def _fire(self) -> None:
+        self._handle = None
+        now = self.now()
+        due = sorted(
+            ((dl, kind, data) for kind, (dl, data) in self._deadlines.items() if dl <= now + _EPS),
+            key=lambda item: item[0],
+        )
+        for _, kind, _ in due:
+            del self._deadlines[kind]
+        for _, kind, data in due:
+            try:
+                self._on_due(kind, data)
+            except Exception:  # noqa: BLE001 - weitere Deadlines trotzdem bedienen
+                _LOGGER.exception("Deadline handler failed for %s", kind)
+        if self._handle is None:
+            self._rearm()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import DOMAIN
+from .metrics import (
+    SIGNAL_METRICS_UPDATED,
+    STAGES,
+    STAGE_EVENT_TO_HANDLER,
+    STAGE_HANDLER_TO_STATE,
+    STAGE_STATE_TO_OUTPUTS,
+    STAGE_EVENT_TO_OUTPUTS,
+    STAGE_KEYPAD_TO_STATE,
+    LatencyMetrics,
+)
+
+STAGE_LABELS = {
+    STAGE_EVENT_TO_HANDLER: "event → handler",
+    STAGE_HANDLER_TO_STATE: "handler → state",
+    STAGE_STATE_TO_OUTPUTS: "state → outputs",
+    STAGE_EVENT_TO_OUTPUTS: "event → outputs",
+    STAGE_KEYPAD_TO_STATE: "keypad → state",
+}
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
+    name = entry.data.get("name", "ZigAlarm")
+    metrics: LatencyMetrics = hass.data[DOMAIN]["metrics"][entry.entry_id]
+    async_add_entities([ZigAlarmLatencySensor(entry, name, metrics, stage) for stage in STAGES])
+
+
+class ZigAlarmLatencySensor(SensorEntity):
+    # p95 als State, p50/p99/max als Attribute
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, entry: ConfigEntry, name: str, metrics: LatencyMetrics, stage: str):
+        self._metrics = metrics
+        self._stage = stage
+        self._attr_name = f"{name} latency {STAGE_LABELS.get(stage, stage)} p95"
+        self._attr_unique_id = f"{entry.entry_id}_latency_{stage}"
+
+    @property
+    def native_value(self) -> float | None:
+        return self._metrics.histograms[self._stage].summary()["p95"]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        s = self._metrics.histograms[self._stage].summary()
+        return {"p50": s["p50"], "p99": s["p99"], "max": s["max"], "samples": s["count"]}
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_METRICS_UPDATED.format(self._metrics.entry_id),
+                self._handle_update,
+            )
+        )
+
+    @callback
+    def _handle_update(self) -> None:
+        self.async_write_ha_state()
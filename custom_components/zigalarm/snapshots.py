@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import shutil
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from aiohttp import hdrs, web
+
+from homeassistant.components import camera
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN
+
+try:  # optional: ohne Pillow wird statt des Thumbnails das Original ausgeliefert
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+_LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_URL = "/api/zigalarm/snapshot"
+
+# Ring auf Platte pro Instanz; älteste Bilder werden beim Schreiben gelöscht
+SNAPSHOT_RING_SIZE = 60
+SNAPSHOT_TIMEOUT_S = 8.0
+
+THUMB_SIZE = (480, 270)
+THUMB_QUALITY = 75
+THUMB_CACHE_SIZE = 32
+
+CACHE_PRIVATE = "private, max-age=86400"
+
+_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif", "image/webp": ".webp"}
+_CONTENT_TYPES = {ext: ctype for ctype, ext in _EXTENSIONS.items()}
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    id: int
+    camera: str
+    ts: float
+    filename: str
+
+    @property
+    def content_type(self) -> str:
+        return _CONTENT_TYPES.get(Path(self.filename).suffix, "image/jpeg")
+
+
+def _filename(snap_id: int, ts: float, camera_id: str, content_type: str) -> str:
+    return f"{snap_id:08d}_{int(ts)}_{camera_id}{_EXTENSIONS.get(content_type, '.jpg')}"
+
+
+def _parse_filename(name: str) -> Snapshot | None:
+    path = Path(name)
+    if path.suffix not in _CONTENT_TYPES:
+        return None
+    try:
+        snap_id, ts, camera_id = path.stem.split("_", 2)
+        return Snapshot(int(snap_id), camera_id, float(ts), name)
+    except ValueError:
+        return None
+
+
+def _make_thumbnail(raw: bytes) -> bytes | None:
+    # blockiert (Pillow) -> nur im Executor
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(raw)) as img:
+            img.thumbnail(THUMB_SIZE)
+            out = io.BytesIO()
+            img.convert("RGB").save(out, "JPEG", quality=THUMB_QUALITY, optimize=True)
+            return out.getvalue()
+    except (OSError, ValueError) as err:
+        _LOGGER.debug("Thumbnail failed: %s", err)
+        return None
+
+
+# Schnappschüsse beim Auslösen: alle Kameras gleichzeitig, jede mit eigenem
+# Timeout. Dateien landen im Executor in einem begrenzten Ring auf Platte,
+# Thumbnails (Pillow, optional) in einem kleinen LRU im Speicher.
+class SnapshotStore:
+    def __init__(self, hass: HomeAssistant, entry_id: str, size: int = SNAPSHOT_RING_SIZE) -> None:
+        self.hass = hass
+        self.entry_id = entry_id
+        self.size = size
+        self.directory = Path(hass.config.path(DOMAIN, "snapshots", entry_id))
+        self._ring: deque[Snapshot] = deque()
+        self._by_id: dict[int, Snapshot] = {}
+        self._thumbs: OrderedDict[int, bytes] = OrderedDict()
+        self._seq = 0
+
+    # ---------------------- Laden / Entfernen ----------------------
+
+    async def async_load(self) -> None:
+        snaps = await self.hass.async_add_executor_job(self._scan)
+        for snap in snaps[-self.size:]:
+            self._append(snap)
+        self._seq = snaps[-1].id if snaps else 0
+        stale = snaps[:-self.size] if len(snaps) > self.size else []
+        if stale:
+            await self.hass.async_add_executor_job(self._delete, stale)
+
+    def _scan(self) -> list[Snapshot]:
+        if not self.directory.is_dir():
+            return []
+        snaps = [s for s in map(_parse_filename, (p.name for p in self.directory.iterdir())) if s]
+        return sorted(snaps, key=lambda s: s.id)
+
+    async def async_remove(self) -> None:
+        await self.hass.async_add_executor_job(shutil.rmtree, self.directory, True)
+
+    # ---------------------- Aufnahme ----------------------
+
+    async def async_capture(self, cameras: Iterable[str]) -> tuple[list[Snapshot], list[str]]:
+        cameras = list(cameras)
+        started = self.hass.loop.time()
+        images = await asyncio.gather(*(self._grab(cam) for cam in cameras))
+
+        items: list[tuple[Snapshot, bytes]] = []
+        failed: list[str] = []
+        ts = time.time()
+        for cam, image in zip(cameras, images):
+            if image is None:
+                failed.append(cam)
+                continue
+            self._seq += 1
+            snap = Snapshot(self._seq, cam, ts, _filename(self._seq, ts, cam, image.content_type))
+            items.append((snap, image.content))
+        if not items:
+            return [], failed
+
+        evicted: list[Snapshot] = []
+        for snap, _ in items:
+            evicted.extend(self._append(snap))
+        thumbs = await self.hass.async_add_executor_job(self._write, items, evicted)
+        for snap_id, thumb in thumbs.items():
+            self._cache_thumb(snap_id, thumb)
+        _LOGGER.debug("Captured %d snapshots in %.0f ms", len(items), (self.hass.loop.time() - started) * 1000.0)
+        return [snap for snap, _ in items], failed
+
+    async def _grab(self, camera_id: str) -> camera.Image | None:
+        try:
+            async with asyncio.timeout(SNAPSHOT_TIMEOUT_S):
+                return await camera.async_get_image(self.hass, camera_id, timeout=int(SNAPSHOT_TIMEOUT_S))
+        except (HomeAssistantError, TimeoutError) as err:
+            _LOGGER.warning("Snapshot of %s failed: %s", camera_id, err or "timeout")
+            return None
+
+    def _append(self, snap: Snapshot) -> list[Snapshot]:
+        self._ring.append(snap)
+        self._by_id[snap.id] = snap
+        evicted = []
+        while len(self._ring) > self.size:
+            old = self._ring.popleft()
+            self._by_id.pop(old.id, None)
+            self._thumbs.pop(old.id, None)
+            evicted.append(old)
+        return evicted
+
+    def _write(self, items: list[tuple[Snapshot, bytes]], evicted: list[Snapshot]) -> dict[int, bytes]:
+        # Executor: Bilder schreiben, verdrängte löschen, Thumbnails vorberechnen
+        self.directory.mkdir(parents=True, exist_ok=True)
+        thumbs: dict[int, bytes] = {}
+        for snap, raw in items:
+            (self.directory / snap.filename).write_bytes(raw)
+            thumb = _make_thumbnail(raw)
+            if thumb is not None:
+                thumbs[snap.id] = thumb
+        self._delete(evicted)
+        return thumbs
+
+    def _delete(self, snaps: list[Snapshot]) -> None:
+        for snap in snaps:
+            (self.directory / snap.filename).unlink(missing_ok=True)
+
+    # ---------------------- Abfragen ----------------------
+
+    def get(self, snap_id: int) -> Snapshot | None:
+        return self._by_id.get(snap_id)
+
+    def describe(self, snap: Snapshot) -> dict[str, Any]:
+        url = f"{SNAPSHOT_URL}/{self.entry_id}/{snap.id}"
+        return {"id": snap.id, "camera": snap.camera, "ts": snap.ts, "url": url, "thumb_url": f"{url}?thumb=1"}
+
+    def _cache_thumb(self, snap_id: int, thumb: bytes) -> None:
+        self._thumbs[snap_id] = thumb
+        self._thumbs.move_to_end(snap_id)
+        while len(self._thumbs) > THUMB_CACHE_SIZE:
+            self._thumbs.popitem(last=False)
+
+    async def async_read(self, snap: Snapshot, thumb: bool) -> tuple[bytes, str] | None:
+        if thumb:
+            cached = self._thumbs.get(snap.id)
+            if cached is not None:
+                self._thumbs.move_to_end(snap.id)
+                return cached, "image/jpeg"
+        try:
+            raw = await self.hass.async_add_executor_job((self.directory / snap.filename).read_bytes)
+        except OSError:
+            return None
+        if thumb and Image is not None:
+            small = await self.hass.async_add_executor_job(_make_thumbnail, raw)
+            if small is not None and snap.id in self._by_id:
+                self._cache_thumb(snap.id, small)
+                return small, "image/jpeg"
+        return raw, snap.content_type
+
+
+class ZigAlarmSnapshotView(HomeAssistantView):
+    url = SNAPSHOT_URL + "/{entry_id}/{snapshot_id}"
+    name = "zigalarm:snapshot"
+    requires_auth = True
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+
+    async def get(self, request: web.Request, entry_id: str, snapshot_id: str) -> web.Response:
+        store = self.hass.data.get(DOMAIN, {}).get("snapshots", {}).get(entry_id)
+        try:
+            snap = store.get(int(snapshot_id)) if store else None
+        except ValueError:
+            snap = None
+        if snap is None:
+            return web.Response(status=404)
+
+        result = await store.async_read(snap, request.query.get("thumb") == "1")
+        if result is None:
+            return web.Response(status=404)
+        body, content_type = result
+        # Bild-IDs werden nie wiederverwendet -> Browser darf cachen
+        return web.Response(body=body, headers={hdrs.CONTENT_TYPE: content_type, hdrs.CACHE_CONTROL: CACHE_PRIVATE})
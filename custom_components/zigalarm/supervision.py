@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import time
+from typing import Callable, Optional
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_report_event
+
+from .compiled import CompiledConfig
+from .const import ROLE_ALWAYS, ROLE_MOTION, ROLE_PERIMETER
+
+FAULT_UNAVAILABLE = "unavailable"
+FAULT_STALE = "stale"
+
+SUPERVISED_ROLES = ROLE_PERIMETER | ROLE_MOTION | ROLE_ALWAYS
+
+# stale Sensoren werden spätestens in diesem Abstand erneut geprüft
+RECHECK_S = 60.0
+
+_DEAD_STATES = frozenset({STATE_UNAVAILABLE, STATE_UNKNOWN})
+
+FaultChanges = list[tuple[str, Optional[str]]]
+
+
+# Überwacht, ob Sensoren noch melden. Ein Heap mit (Deadline, entity_id) und
+# genau ein Loop-Timer für den frühesten Eintrag. Geprüft wird lazy: läuft ein
+# Eintrag ab, entscheidet last_reported des aktuellen States, ob der Sensor stale
+# ist oder nur neu eingeplant wird. Events kosten damit nur einen Dict-Lookup.
+# Meldet ein stale Sensor wieder (auch mit unverändertem Wert, der nur als
+# state_reported ankommt), wird der Fehler sofort aufgehoben.
+class SensorSupervisor:
+    def __init__(self, hass: HomeAssistant, on_change: Callable[[FaultChanges], None]) -> None:
+        self.hass = hass
+        self._on_change = on_change
+        self.interval = 0.0
+        self._roles: dict[str, int] = {}
+        self._due: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._handle: asyncio.TimerHandle | None = None
+        # state_reported nur für aktuell stale Sensoren abonniert
+        self._reported: frozenset[str] = frozenset()
+        self._unsub_reported: Callable[[], None] | None = None
+
+        self._faults: dict[str, str] = {}
+        self._role_faults: dict[int, int] = {ROLE_PERIMETER: 0, ROLE_MOTION: 0, ROLE_ALWAYS: 0}
+        self._view: dict[str, str] | None = {}
+
+    # ---------------------- Abfragen ----------------------
+
+    @property
+    def faulted(self) -> dict[str, str]:
+        # neues Objekt pro Änderung, damit HA die Attribut-Änderung erkennt
+        if self._view is None:
+            self._view = dict(sorted(self._faults.items()))
+        return self._view
+
+    def faulted_in(self, mask: int) -> list[str]:
+        if not any(count for role, count in self._role_faults.items() if role & mask):
+            return []
+        return sorted(eid for eid in self._faults if self._roles.get(eid, 0) & mask)
+
+    # ---------------------- Konfiguration ----------------------
+
+    @callback
+    def configure(self, cfg: CompiledConfig) -> FaultChanges:
+        # voller Scan: nur beim Start und bei Options-Änderungen
+        self.interval = float(cfg.supervision_interval)
+        self._roles = {eid: role & SUPERVISED_ROLES for eid, role in cfg.roles.items() if role & SUPERVISED_ROLES}
+        changes: FaultChanges = []
+        for eid in [e for e in self._faults if e not in self._roles]:
+            changes.append(self._set_fault(eid, None))
+
+        self._due = {}
+        self._heap = []
+        now = self.hass.loop.time()
+        for eid in self._roles:
+            change = self._check(eid, now, time.time())
+            if change:
+                changes.append(change)
+        self._rearm()
+        self._track_reported()
+        return changes
+
+    @callback
+    def stop(self) -> None:
+        self._cancel_timer()
+        if self._unsub_reported is not None:
+            self._unsub_reported()
+            self._unsub_reported = None
+        self._reported = frozenset()
+
+    # ---------------------- Events ----------------------
+
+    @callback
+    def seen(self, entity_id: str, state: str) -> tuple[str, str | None] | None:
+        # O(1) pro Event: nur Verfügbarkeit, "stale" klärt der Heap lazy
+        if entity_id not in self._roles:
+            return None
+        if state in _DEAD_STATES:
+            if self._faults.get(entity_id) == FAULT_UNAVAILABLE:
+                return None
+            return self._set_fault(entity_id, FAULT_UNAVAILABLE)
+        if entity_id in self._faults:
+            return self._restored(entity_id)
+        return None
+
+    @callback
+    def _on_reported(self, event: Event) -> None:
+        # gleicher Wert erneut gemeldet: kein state_changed, aber der Sensor lebt
+        entity_id = event.data["entity_id"]
+        if self._faults.get(entity_id) == FAULT_STALE:
+            self._on_change([self._restored(entity_id)])
+
+    # ---------------------- Intern ----------------------
+
+    def _set_fault(self, entity_id: str, reason: str | None) -> tuple[str, str | None]:
+        old = self._faults.get(entity_id)
+        role = self._roles.get(entity_id, 0)
+        if reason is None:
+            self._faults.pop(entity_id, None)
+        else:
+            self._faults[entity_id] = reason
+        if (old is None) != (reason is None):
+            delta = 1 if reason is not None else -1
+            for bit in self._role_faults:
+                if role & bit:
+                    self._role_faults[bit] += delta
+        self._view = None
+        return entity_id, reason
+
+    def _restored(self, entity_id: str) -> tuple[str, str | None]:
+        was_stale = self._faults.get(entity_id) == FAULT_STALE
+        change = self._set_fault(entity_id, None)
+        if self.interval:
+            # nächste Prüfung ab jetzt, nicht erst im Recheck-Takt
+            self._push(entity_id, self.hass.loop.time() + self.interval)
+            self._rearm()
+        if was_stale:
+            self._track_reported()
+        return change
+
+    def _track_reported(self) -> None:
+        stale = frozenset(eid for eid, reason in self._faults.items() if reason == FAULT_STALE)
+        if stale == self._reported:
+            return
+        if self._unsub_reported is not None:
+            self._unsub_reported()
+            self._unsub_reported = None
+        self._reported = stale
+        if stale:
+            self._unsub_reported = async_track_state_report_event(self.hass, stale, self._on_reported)
+
+    def _push(self, entity_id: str, deadline: float) -> None:
+        self._due[entity_id] = deadline
+        heapq.heappush(self._heap, (deadline, entity_id))
+
+    def _check(self, entity_id: str, now: float, wall: float) -> tuple[str, str | None] | None:
+        st = self.hass.states.get(entity_id)
+        reason: str | None = None
+        if st is None or st.state in _DEAD_STATES:
+            reason = FAULT_UNAVAILABLE
+            if self.interval:
+                self._push(entity_id, now + min(self.interval, RECHECK_S))
+        elif self.interval:
+            last = getattr(st, "last_reported", None) or st.last_updated
+            age = wall - last.timestamp()
+            if age >= self.interval:
+                reason = FAULT_STALE
+                self._push(entity_id, now + min(self.interval, RECHECK_S))
+            else:
+                self._push(entity_id, now + (self.interval - age))
+
+        if self._faults.get(entity_id) == reason:
+            return None
+        return self._set_fault(entity_id, reason)
+
+    def _cancel_timer(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _rearm(self) -> None:
+        self._cancel_timer()
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)  # veralteter Eintrag
+        if self._heap:
+            self._handle = self.hass.loop.call_at(self._heap[0][0], self._fire)
+
+    @callback
+    def _fire(self) -> None:
+        self._handle = None
+        now = self.hass.loop.time()
+        wall = time.time()
+        changes: FaultChanges = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, eid = heapq.heappop(self._heap)
+            if self._due.get(eid) != deadline:
+                continue
+            del self._due[eid]
+            change = self._check(eid, now, wall)
+            if change:
+                changes.append(change)
+        self._rearm()
+        self._track_reported()
+        if changes:
+            self._on_change(changes)
+
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Iterable, Mapping
+
+from homeassistant.core import HomeAssistant, State
+
+from .outputs import OutputCall, group_calls
+
+TRACE_VERSION = 1
+
+# Satz-Typen (Feld "t"); Zeit "at" = Sekunden seit Trace-Start (Loop-Zeit)
+TR_HEADER = "header"
+TR_EVENT = "ev"         # state_changed eines überwachten Sensors
+TR_COMMAND = "cmd"      # Scharf/Unscharf/Auslösen von außen (Service, UI)
+TR_KEYPAD = "kp"        # Ergebnis der PIN-Prüfung (der Code selbst wird nie geschrieben)
+TR_DEADLINE = "dl"      # abgelaufene Deadline
+TR_OUTPUT = "out"       # gebündelter Ausgangs-Call
+TR_STATE = "st"         # Zustandswechsel
+TR_END = "end"          # Ende der Aufzeichnung
+
+FLUSH_LINES = 256
+FLUSH_INTERVAL_S = 5.0
+DEFAULT_MAX_DURATION_S = 3600
+
+# für Trigger-Bedingungen irrelevant oder geheim
+_SKIP_ATTRIBUTES = frozenset({"friendly_name", "icon", "entity_picture", "device_class"})
+_SECRET_ATTRIBUTES = frozenset({"code", "action_code"})
+
+
+def trace_attributes(attrs: Mapping[str, Any]) -> dict[str, Any]:
+    out = {}
+    for key, value in attrs.items():
+        if key in _SKIP_ATTRIBUTES:
+            continue
+        out[key] = "***" if key in _SECRET_ATTRIBUTES and value not in (None, "") else value
+    return out
+
+
+def read_trace(path: str | Path) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    # blockiert -> im Executor bzw. nur in Tools aufrufen
+    header: dict[str, Any] | None = None
+    records: list[dict[str, Any]] = []
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            if rec.get("t") == TR_HEADER:
+                header = rec
+            else:
+                records.append(rec)
+    if header is None:
+        raise ValueError(f"{path}: no trace header")
+    return header, records
+
+
+def _append_lines(path: Path, lines: list[str]) -> None:
+    # jedes Flush hängt ein eigenes gzip-Member an; gzip.open liest sie am Stück
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "at", encoding="utf-8") as fh:
+        fh.write("\n".join(lines) + "\n")
+
+
+# Zeichnet auf, was ein Panel sieht und tut: Sensor-Events, Befehle,
+# Deadlines, Ausgänge und Zustandswechsel als kompaktes JSONL (gzip).
+# Geschrieben wird gebündelt im Executor; ohne Pfad bleiben die Sätze im
+# Speicher (Replay vergleicht damit).
+class TraceRecorder:
+    def __init__(self, hass: HomeAssistant, path: Path | None = None) -> None:
+        self.hass = hass
+        self.path = path
+        self.records: list[dict[str, Any]] = []
+        self.count = 0
+        self._t0 = hass.loop.time()
+        self._buf: list[str] = []
+        self._lock = asyncio.Lock()
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    def _at(self) -> float:
+        return round(self.hass.loop.time() - self._t0, 3)
+
+    def _add(self, record: dict[str, Any]) -> None:
+        self.count += 1
+        if self.path is None:
+            self.records.append(record)
+            return
+        self._buf.append(json.dumps(record, separators=(",", ":"), default=str))
+        if len(self._buf) >= FLUSH_LINES:
+            self.hass.async_create_task(self.async_flush())
+        elif self._flush_handle is None:
+            self._flush_handle = self.hass.loop.call_later(FLUSH_INTERVAL_S, self._timed_flush)
+
+    def _timed_flush(self) -> None:
+        self._flush_handle = None
+        self.hass.async_create_task(self.async_flush())
+
+    # ---------------------- Sätze ----------------------
+
+    def header(self, **data: Any) -> None:
+        self._add({"t": TR_HEADER, "v": TRACE_VERSION, **data})
+
+    def event(self, entity_id: str, new_state: State) -> None:
+        rec: dict[str, Any] = {"t": TR_EVENT, "at": self._at(), "e": entity_id, "s": new_state.state}
+        attrs = trace_attributes(new_state.attributes)
+        if attrs:
+            rec["a"] = attrs
+        self._add(rec)
+
+    def command(self, name: str) -> None:
+        self._add({"t": TR_COMMAND, "at": self._at(), "c": name})
+
+    def keypad(self, entity_id: str, ok: bool) -> None:
+        self._add({"t": TR_KEYPAD, "at": self._at(), "e": entity_id, "ok": ok})
+
+    def deadline(self, kind: str) -> None:
+        self._add({"t": TR_DEADLINE, "at": self._at(), "k": kind})
+
+    def outputs(self, stages: Iterable[Iterable[OutputCall]]) -> None:
+        at = self._at()
+        for stage in stages:
+            for domain, service, data in group_calls(stage):
+                rec = {"t": TR_OUTPUT, "at": at, "d": domain, "s": service, "e": sorted(data.pop("entity_id"))}
+                if data:
+                    rec["data"] = data
+                self._add(rec)
+
+    def state(self, state: str) -> None:
+        self._add({"t": TR_STATE, "at": self._at(), "s": str(state)})
+
+    # ---------------------- Schreiben ----------------------
+
+    async def async_flush(self) -> None:
+        if self.path is None:
+            return
+        async with self._lock:
+            lines, self._buf = self._buf, []
+            if lines:
+                await self.hass.async_add_executor_job(_append_lines, self.path, lines)
+
+    async def async_close(self) -> dict[str, Any]:
+        self._add({"t": TR_END, "at": self._at()})
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await self.async_flush()
+        return {"path": str(self.path) if self.path else None, "records": self.count, "duration_s": self._at()}
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Callable
+
+from .compiled import CompiledConfig
+from .const import ROLE_MOTION, ROLE_PERIMETER
+
+_READY_MASK = ROLE_PERIMETER | ROLE_MOTION
+
+
+# Offene Perimeter-/Bewegungssensoren, inkrementell aus Event-Deltas gepflegt.
+# Ein voller Scan (seed/reconcile) passiert nur beim Start, beim Scharfschalten
+# und periodisch; jedes Event ist danach O(1).
+class OpenSensorTracker:
+    def __init__(self, cfg: CompiledConfig) -> None:
+        self._cfg = cfg
+        self._open: set[str] = set()
+        self._sorted: list[str] | None = []
+        self.open_perimeter = 0
+        self.open_motion = 0
+
+    # ---------------------- Readiness ----------------------
+
+    @property
+    def ready_home(self) -> bool:
+        return self.open_perimeter == 0
+
+    @property
+    def ready_away(self) -> bool:
+        return not self._open
+
+    @property
+    def open_sensors(self) -> list[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self._open)
+        return self._sorted
+
+    def is_open(self, entity_id: str) -> bool:
+        return entity_id in self._open
+
+    # ---------------------- Updates ----------------------
+
+    def update(self, entity_id: str, is_open: bool) -> bool:
+        role = self._cfg.role(entity_id) & _READY_MASK
+        if not role:
+            return False
+
+        was_open = entity_id in self._open
+        if was_open == is_open:
+            return False
+
+        delta = 1 if is_open else -1
+        if is_open:
+            self._open.add(entity_id)
+        else:
+            self._open.discard(entity_id)
+        if role & ROLE_PERIMETER:
+            self.open_perimeter += delta
+        if role & ROLE_MOTION:
+            self.open_motion += delta
+        self._sorted = None
+        return True
+
+    def seed(self, cfg: CompiledConfig, is_open: Callable[[str], bool]) -> None:
+        self._cfg = cfg
+        self._open = set()
+        self._sorted = None
+        self.open_perimeter = 0
+        self.open_motion = 0
+        for eid in cfg.perimeter | cfg.motion:
+            if is_open(eid):
+                self.update(eid, True)
+
+    def reconcile(self, is_open: Callable[[str], bool]) -> bool:
+        # voller Abgleich gegen hass.states; True wenn Drift korrigiert wurde
+        before = (frozenset(self._open), self.open_perimeter, self.open_motion)
+        self.seed(self._cfg, is_open)
+        return before != (frozenset(self._open), self.open_perimeter, self.open_motion)
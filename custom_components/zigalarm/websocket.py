@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import DOMAIN, SIGNAL_RUNTIME_UPDATED
+
+_MISSING = object()
+
+
+@callback
+def async_register_commands(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, ws_journal)
+    websocket_api.async_register_command(hass, ws_panels)
+    websocket_api.async_register_command(hass, ws_subscribe)
+    websocket_api.async_register_command(hass, ws_get_config)
+
+
+def _resolve_entry_id(hass: HomeAssistant, msg: dict[str, Any]) -> str | None:
+    entry_id = (msg.get("entry_id") or "").strip()
+    if entry_id:
+        return entry_id
+    entity_id = (msg.get("entity_id") or "").strip()
+    return hass.data.get(DOMAIN, {}).get("entity_to_entry", {}).get(entity_id)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "zigalarm/journal",
+        vol.Exclusive("entry_id", "target"): str,
+        vol.Exclusive("entity_id", "target"): str,
+        vol.Optional("before"): vol.Coerce(int),
+        vol.Optional("limit", default=50): vol.All(vol.Coerce(int), vol.Range(min=1, max=500)),
+    }
+)
+@callback
+def ws_journal(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    entry_id = _resolve_entry_id(hass, msg)
+    journal = hass.data.get(DOMAIN, {}).get("journals", {}).get(entry_id or "")
+    if journal is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "ZigAlarm instance not found")
+        return
+    connection.send_result(msg["id"], journal.page(msg.get("before"), msg["limit"]))
+
+
+@websocket_api.websocket_command({vol.Required("type"): "zigalarm/panels"})
+@callback
+def ws_panels(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    # ersetzt den Scan über alle hass.states im Frontend
+    panels = hass.data.get(DOMAIN, {}).get("panels", {})
+    connection.send_result(
+        msg["id"],
+        sorted(
+            (
+                {"entry_id": entry_id, "entity_id": panel.entity_id, "name": panel.name}
+                for entry_id, panel in panels.items()
+                if panel.entity_id
+            ),
+            key=lambda p: p["entity_id"],
+        ),
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "zigalarm/subscribe",
+        vol.Exclusive("entry_id", "target"): str,
+        vol.Exclusive("entity_id", "target"): str,
+    }
+)
+@callback
+def ws_subscribe(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    # erste Nachricht: voller Runtime-Snapshot, danach nur geänderte Felder
+    entry_id = _resolve_entry_id(hass, msg)
+    panel = hass.data.get(DOMAIN, {}).get("panels", {}).get(entry_id or "")
+    if panel is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "ZigAlarm instance not found")
+        return
+
+    last: dict[str, Any] = {}
+
+    @callback
+    def _forward(snapshot: dict[str, Any]) -> None:
+        delta = {k: v for k, v in snapshot.items() if last.get(k, _MISSING) != v}
+        if not delta:
+            return
+        last.update(delta)
+        connection.send_message(websocket_api.event_message(msg["id"], delta))
+
+    connection.subscriptions[msg["id"]] = async_dispatcher_connect(
+        hass, SIGNAL_RUNTIME_UPDATED.format(entry_id), _forward
+    )
+    connection.send_result(msg["id"])
+    _forward(panel.runtime_snapshot())
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "zigalarm/get_config",
+        vol.Exclusive("entry_id", "target"): str,
+        vol.Exclusive("entity_id", "target"): str,
+        vol.Optional("version"): str,
+    }
+)
+@callback
+def ws_get_config(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    # mit bekannter Version: nur "unchanged" statt der ganzen Konfiguration
+    entry_id = _resolve_entry_id(hass, msg)
+    panel = hass.data.get(DOMAIN, {}).get("panels", {}).get(entry_id or "")
+    if panel is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "ZigAlarm instance not found")
+        return
+
+    cfg = panel.compiled
+    result: dict[str, Any] = {"entry_id": entry_id, "entity_id": panel.entity_id, "version": cfg.version}
+    if msg.get("version") == cfg.version:
+        result["unchanged"] = True
+    else:
+        result["config"] = dict(cfg.public)
+    connection.send_result(msg["id"], result)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from custom_components.zigalarm.const import ROLE_MOTION, ROLE_PERIMETER
+from custom_components.zigalarm.correlator import AlarmCorrelator, parse_rules
+
+ARMED_HOME = ROLE_PERIMETER
+ARMED_AWAY = ROLE_PERIMETER | ROLE_MOTION
+
+
+def _perimeter_then_motion() -> AlarmCorrelator:
+    return AlarmCorrelator(parse_rules([{"type": "sequence", "first": "perimeter", "then": "motion", "window": 60}]))
+
+
+def test_sequence_rule_ignored_when_motion_not_armed():
+    # armed_home: Bewegung zählt nicht, die Regel könnte nie greifen
+    correlator = _perimeter_then_motion()
+    assert not correlator.requires_confirmation(ROLE_PERIMETER, ARMED_HOME)
+    assert correlator.observe("binary_sensor.door", ROLE_PERIMETER, 0.0, ARMED_HOME) is None
+
+
+def test_sequence_rule_confirms_when_armed_away():
+    correlator = _perimeter_then_motion()
+    assert correlator.requires_confirmation(ROLE_PERIMETER, ARMED_AWAY)
+    assert correlator.requires_confirmation(ROLE_MOTION, ARMED_AWAY)
+    assert correlator.observe("binary_sensor.door", ROLE_PERIMETER, 0.0, ARMED_AWAY) is None
+    rule = correlator.observe("binary_sensor.hall", ROLE_MOTION, 10.0, ARMED_AWAY)
+    assert rule is not None and rule.first == ROLE_PERIMETER
+
+
+def test_sequence_rule_expires_outside_window():
+    correlator = _perimeter_then_motion()
+    correlator.observe("binary_sensor.door", ROLE_PERIMETER, 0.0, ARMED_AWAY)
+    assert correlator.observe("binary_sensor.hall", ROLE_MOTION, 61.0, ARMED_AWAY) is None
+
+
+def test_count_rule_only_covers_its_roles():
+    correlator = AlarmCorrelator(parse_rules([{"type": "count", "roles": "motion", "count": 2, "window": 30}]))
+    assert not correlator.requires_confirmation(ROLE_PERIMETER, ARMED_AWAY)
+    assert correlator.requires_confirmation(ROLE_MOTION, ARMED_AWAY)
+    assert correlator.observe("binary_sensor.a", ROLE_MOTION, 0.0, ARMED_AWAY) is None
+    assert correlator.observe("binary_sensor.a", ROLE_MOTION, 1.0, ARMED_AWAY) is None
+    assert correlator.observe("binary_sensor.b", ROLE_MOTION, 2.0, ARMED_AWAY) is not None
+
+
+def test_parse_rules_skips_invalid_entries():
+    rules = parse_rules([
+        {"type": "count", "roles": ["motion"], "count": 2, "window": 30},
+        {"type": "count", "roles": "garage"},
+        {"type": "sequence", "first": "perimeter"},
+        {"type": "unknown"},
+        {"window": 0},
+        "nonsense",
+    ])
+    assert len(rules) == 1
+    assert rules[0].as_dict() == {"type": "count", "roles": ["motion"], "count": 2, "window": 30.0}
+
+
+def test_count_rule_forgets_sensors_outside_window():
+    correlator = AlarmCorrelator(parse_rules([{"type": "count", "roles": "motion", "count": 2, "window": 30}]))
+    assert correlator.observe("binary_sensor.a", ROLE_MOTION, 0.0, ARMED_AWAY) is None
+    assert correlator.observe("binary_sensor.b", ROLE_MOTION, 31.0, ARMED_AWAY) is None
+    assert correlator.observe("binary_sensor.a", ROLE_MOTION, 40.0, ARMED_AWAY) is not None
+
+
+def test_reset_clears_windows():
+    correlator = _perimeter_then_motion()
+    correlator.observe("binary_sensor.door", ROLE_PERIMETER, 0.0, ARMED_AWAY)
+    correlator.reset()
+    assert correlator.observe("binary_sensor.hall", ROLE_MOTION, 1.0, ARMED_AWAY) is None
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from custom_components.zigalarm.flap import (
+    ACCEPT,
+    DEBOUNCED,
+    QUARANTINE_STARTED,
+    QUARANTINED,
+    FlapGuard,
+)
+
+EID = "binary_sensor.door"
+
+
+def _toggle(guard: FlapGuard, count: int, start: float = 0.0, step: float = 1.0) -> list[int]:
+    return [guard.check(EID, start + i * step, bool(i % 2 == 0)) for i in range(count)]
+
+
+def test_quarantine_after_threshold_within_window():
+    guard = FlapGuard(threshold=5, window=60, quarantine=600, debounce=0)
+    verdicts = _toggle(guard, 5)
+    assert verdicts[:4] == [ACCEPT] * 4
+    assert verdicts[4] == QUARANTINE_STARTED
+    assert guard.is_quarantined(EID)
+    assert guard.quarantined == [EID]
+    assert guard.next_release() == 4.0 + 600
+
+
+def test_slow_changes_do_not_quarantine():
+    guard = FlapGuard(threshold=5, window=60, quarantine=600, debounce=0)
+    assert set(_toggle(guard, 20, step=30.0)) == {ACCEPT}
+    assert not guard.is_quarantined(EID)
+
+
+def test_attribute_updates_do_not_count():
+    # linkquality/battery: gleicher State, kein echter Wechsel
+    guard = FlapGuard(threshold=3, window=60, quarantine=600, debounce=0)
+    for i in range(10):
+        assert guard.check(EID, float(i), False, changed=False) == ACCEPT
+    assert not guard.is_quarantined(EID)
+
+
+def test_events_extend_quarantine_until_quiet():
+    guard = FlapGuard(threshold=3, window=60, quarantine=100, debounce=0)
+    _toggle(guard, 3)
+    assert guard.check(EID, 50.0, True) == QUARANTINED
+    assert guard.next_release() == 150.0
+    # Attribut-Update verlängert nicht
+    assert guard.check(EID, 60.0, True, changed=False) == QUARANTINED
+    assert guard.next_release() == 150.0
+
+    assert guard.release_expired(149.0) == []
+    assert guard.release_expired(150.0) == [EID]
+    assert not guard.is_quarantined(EID)
+    assert guard.quarantined == []
+    assert guard.check(EID, 151.0, True) == ACCEPT
+
+
+def test_exempt_sensor_never_quarantined_or_debounced():
+    guard = FlapGuard(threshold=3, window=60, quarantine=600, debounce=5)
+    for i in range(10):
+        assert guard.check("binary_sensor.smoke", float(i), True, exempt=True) == ACCEPT
+    assert not guard.is_quarantined("binary_sensor.smoke")
+
+
+def test_debounce_drops_repeated_on():
+    guard = FlapGuard(threshold=0, window=60, quarantine=600, debounce=2)
+    assert guard.check(EID, 0.0, True) == ACCEPT
+    assert guard.check(EID, 0.5, False) == ACCEPT
+    assert guard.check(EID, 1.0, True) == DEBOUNCED
+    assert guard.check(EID, 4.0, True) == ACCEPT
+
+
+def test_prune_drops_removed_sensors():
+    guard = FlapGuard(threshold=3, window=60, quarantine=600, debounce=0)
+    _toggle(guard, 3)
+    guard.check("binary_sensor.other", 0.0, True)
+    assert guard.prune(["binary_sensor.other"]) == [EID]
+    assert guard.quarantined == []
+    assert guard.next_release() is None
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from custom_components.zigalarm.keypad import (
+    KEYPAD_ALLOW,
+    KEYPAD_ARM_AWAY,
+    KEYPAD_ARM_HOME,
+    KEYPAD_DISARM,
+    KEYPAD_NO_CODE,
+    KEYPAD_NO_PIN,
+    KEYPAD_VERIFY,
+    KeypadLockout,
+    PinVerifier,
+    hash_pin,
+    keypad_triage,
+    verify_pin_hash,
+)
+
+
+def test_keypad_disarm_refused_without_pin():
+    pins = PinVerifier(None, "")
+    assert not pins.required
+    assert pins.triage(KEYPAD_DISARM, "1234") == KEYPAD_NO_PIN
+    assert pins.triage(KEYPAD_DISARM, None) == KEYPAD_NO_PIN
+    assert pins.triage(KEYPAD_ARM_HOME, None) == KEYPAD_ALLOW
+    assert pins.triage(KEYPAD_ARM_AWAY, "1234") == KEYPAD_ALLOW
+
+
+def test_keypad_disarm_verified_with_pin():
+    pins = PinVerifier(None, hash_pin("1234", iterations=1000))
+    assert pins.required
+    assert pins.triage(KEYPAD_DISARM, "1234") == KEYPAD_VERIFY
+    pins.configure("")
+    assert pins.triage(KEYPAD_DISARM, "1234") == KEYPAD_NO_PIN
+
+
+def test_codeless_arm_is_no_pin_attempt():
+    # Scharfschalten ohne Code braucht keine PIN-Prüfung und zählt nie als Fehlversuch
+    assert keypad_triage(KEYPAD_ARM_HOME, None, True) == KEYPAD_ALLOW
+    assert keypad_triage(KEYPAD_ARM_AWAY, None, True) == KEYPAD_ALLOW
+    assert keypad_triage(KEYPAD_ARM_AWAY, "1111", True) == KEYPAD_VERIFY
+    assert keypad_triage(KEYPAD_DISARM, None, True) == KEYPAD_NO_CODE
+
+
+def test_lockout_after_repeated_failures():
+    lockout = KeypadLockout(threshold=3, base=30.0, maximum=900.0)
+    assert lockout.failure("event.keypad", 0.0) is None
+    assert lockout.failure("event.keypad", 1.0) is None
+    until = lockout.failure("event.keypad", 2.0)
+    assert until is not None and until > 2.0
+    assert lockout.locked_until("event.keypad", 3.0) == until
+    lockout.success("event.keypad")
+    assert lockout.locked_until("event.keypad", 3.0) is None
+
+
+def test_pin_hash_roundtrip():
+    stored = hash_pin("1234", iterations=1000)
+    assert verify_pin_hash("1234", stored)
+    assert not verify_pin_hash("4321", stored)
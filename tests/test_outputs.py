@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import async_mock_service
+
+from custom_components.zigalarm import outputs
+from custom_components.zigalarm.outputs import (
+    OUTPUT_CONFIRMED,
+    OUTPUT_FAILED,
+    OUTPUT_PENDING,
+    OutputCall,
+    OutputDispatcher,
+    OutputSupervisor,
+    group_calls,
+)
+
+SIREN = "siren.hall"
+LIGHT = "light.porch"
+
+
+def _supervisor(hass: HomeAssistant) -> tuple[OutputDispatcher, OutputSupervisor, list]:
+    changes: list = []
+    dispatcher = OutputDispatcher(hass)
+    return dispatcher, OutputSupervisor(hass, dispatcher, changes.extend), changes
+
+
+def test_group_calls_batches_per_service_and_data():
+    grouped = group_calls([
+        OutputCall("light", "turn_on", "light.a", {"brightness": 255}),
+        OutputCall("light", "turn_on", "light.b", {"brightness": 255}),
+        OutputCall("light", "turn_on", "light.c", {"brightness": 10}),
+        OutputCall("light", "turn_on", "light.a", {"brightness": 255}),
+    ])
+    assert grouped == [
+        ("light", "turn_on", {"brightness": 255, "entity_id": ["light.a", "light.b"]}),
+        ("light", "turn_on", {"brightness": 10, "entity_id": ["light.c"]}),
+    ]
+
+
+async def test_output_confirmed_by_state_change(hass: HomeAssistant) -> None:
+    calls = async_mock_service(hass, "siren", "turn_on")
+    hass.states.async_set(SIREN, "off")
+    dispatcher, supervisor, changes = _supervisor(hass)
+    call = OutputCall("siren", "turn_on", SIREN)
+
+    supervisor.watch([call])
+    assert supervisor.status[SIREN]["state"] == OUTPUT_PENDING
+    result = await dispatcher.async_dispatch([call])
+    await hass.async_block_till_done()
+    assert len(calls) == 1
+    assert result.calls == 1 and result.targets == 1 and result.errors == 0
+
+    hass.states.async_set(SIREN, "on")
+    await hass.async_block_till_done()
+    assert supervisor.status[SIREN]["state"] == OUTPUT_CONFIRMED
+    assert changes[-1] == (SIREN, OUTPUT_CONFIRMED)
+    supervisor.stop()
+
+
+async def test_already_on_is_confirmed_immediately(hass: HomeAssistant) -> None:
+    hass.states.async_set(LIGHT, "on")
+    _dispatcher, supervisor, changes = _supervisor(hass)
+    supervisor.watch([OutputCall("light", "turn_on", LIGHT)])
+    assert supervisor.status[LIGHT]["state"] == OUTPUT_CONFIRMED
+    assert changes == [(LIGHT, OUTPUT_CONFIRMED)]
+    supervisor.stop()
+
+
+async def test_unconfirmed_output_is_retried_then_failed(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(outputs, "RETRY_BASE_S", 0.05)
+    monkeypatch.setattr(outputs, "RETRY_MAX_S", 0.1)
+    monkeypatch.setattr(outputs, "CONFIRM_DEADLINE_S", 0.3)
+    calls = async_mock_service(hass, "siren", "turn_on")
+    hass.states.async_set(SIREN, "off")
+    dispatcher, supervisor, changes = _supervisor(hass)
+    call = OutputCall("siren", "turn_on", SIREN)
+
+    supervisor.watch([call])
+    first = await dispatcher.async_dispatch([call])
+    await asyncio.sleep(0.1)
+    await hass.async_block_till_done()
+    assert len(calls) >= 2
+    assert supervisor.status[SIREN]["attempts"] >= 2
+    # Retries überschreiben nicht den letzten Alarm-Dispatch
+    assert dispatcher.last_result is first
+
+    await asyncio.sleep(0.35)
+    await hass.async_block_till_done()
+    assert supervisor.status[SIREN]["state"] == OUTPUT_FAILED
+    assert changes[-1] == (SIREN, OUTPUT_FAILED)
+    supervisor.stop()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from homeassistant.core import State
+from homeassistant.util import dt as dt_util
+
+from custom_components.zigalarm.predicates import (
+    compile_predicate,
+    compile_predicates,
+    normalize_spec,
+    state_on,
+)
+
+EID = "sensor.probe"
+
+
+def _state(value, attributes=None, seconds: float = 0.0) -> State:
+    at = dt_util.utcnow() + timedelta(seconds=seconds)
+    return State(EID, str(value), attributes or {}, last_changed=at, last_updated=at)
+
+
+def test_state_on_default():
+    assert state_on(_state("on"))
+    assert not state_on(_state("off"))
+    assert not state_on(_state("unavailable"))
+
+
+def test_state_in_and_attribute():
+    pred = compile_predicate(normalize_spec({"attribute": "action", "state_in": ["open", "tilt"]}))
+    assert pred(_state("x", {"action": "tilt"}), None)
+    assert not pred(_state("x", {"action": "closed"}), None)
+    assert not pred(_state("x"), None)
+
+
+def test_threshold_chain_requires_all_conditions():
+    pred = compile_predicate(normalize_spec({"above": 10, "below": 20}))
+    assert pred(_state(15), None)
+    assert not pred(_state(25), None)
+    assert not pred(_state(5), None)
+    assert not pred(_state("unknown"), None)
+
+
+def test_rate_needs_previous_state():
+    pred = compile_predicate(normalize_spec({"rate": 2}))
+    old = _state(10)
+    assert not pred(_state(30, seconds=5), None)
+    # 20 in 5 s = 4/s
+    assert pred(_state(30, seconds=5), old)
+    # 5 in 5 s = 1/s
+    assert not pred(_state(15, seconds=5), old)
+    # Burst: Abstand zählt mindestens 1 s
+    assert not pred(_state(11, seconds=0.01), old)
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        {},
+        {"attribute": "x"},
+        {"above": "hot"},
+        {"rate": 0},
+        {"state_in": []},
+        {"colour": "red"},
+        "on",
+    ],
+)
+def test_normalize_spec_rejects_invalid(raw):
+    with pytest.raises(ValueError):
+        normalize_spec(raw)
+
+
+def test_compile_predicates_skips_invalid_entries():
+    specs, compiled = compile_predicates({
+        " sensor.temp ": {"above": "30"},
+        "sensor.bad": {"rate": -1},
+    })
+    assert specs == {"sensor.temp": {"above": 30.0}}
+    assert set(compiled) == {"sensor.temp"}
+    assert compile_predicates(None) == ({}, {})
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.zigalarm.scheduler import DL_ARMING, DL_AUTO_STOP, DL_PENDING, DeadlineScheduler
+
+
+def _collector() -> tuple[list[tuple[str, Any]], asyncio.Event, Callable[[str, Any], None]]:
+    fired: list[tuple[str, Any]] = []
+    done = asyncio.Event()
+
+    def on_due(kind: str, data: Any) -> None:
+        fired.append((kind, data))
+        done.set()
+
+    return fired, done, on_due
+
+
+async def test_restore_keeps_absolute_deadline(hass: HomeAssistant) -> None:
+    fired, _done, on_due = _collector()
+    before = DeadlineScheduler(hass, on_due)
+    deadline = before.schedule(DL_PENDING, 30)
+    saved = before.as_dict()
+    before.stop()
+
+    # "Neustart": neue Instanz aus den Restore-Daten
+    after = DeadlineScheduler(hass, on_due)
+    after.restore(saved)
+    assert after.deadline(DL_PENDING) == deadline
+    after.stop()
+    assert fired == []
+
+
+async def test_restore_fires_expired_deadline_with_data(hass: HomeAssistant) -> None:
+    fired, done, on_due = _collector()
+    scheduler = DeadlineScheduler(hass, on_due)
+    scheduler.restore({DL_ARMING: {"deadline": scheduler.now() - 5, "data": "armed_away"}})
+    await asyncio.wait_for(done.wait(), 1)
+    assert fired == [(DL_ARMING, "armed_away")]
+    assert scheduler.deadline(DL_ARMING) is None
+
+
+async def test_restore_ignores_invalid_entries(hass: HomeAssistant) -> None:
+    _fired, _done, on_due = _collector()
+    scheduler = DeadlineScheduler(hass, on_due)
+    scheduler.restore({DL_PENDING: {"data": 1}, DL_AUTO_STOP: {"deadline": "soon"}})
+    assert scheduler.as_dict() == {}
+
+
+async def test_due_deadlines_fire_in_order(hass: HomeAssistant) -> None:
+    fired, _done, on_due = _collector()
+    scheduler = DeadlineScheduler(hass, on_due)
+    now = scheduler.now()
+    scheduler.restore({
+        DL_AUTO_STOP: {"deadline": now - 1},
+        DL_PENDING: {"deadline": now - 2},
+    })
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert [kind for kind, _ in fired] == [DL_PENDING, DL_AUTO_STOP]
+
+
+async def test_cancel_all_stops_timer(hass: HomeAssistant) -> None:
+    fired, _done, on_due = _collector()
+    scheduler = DeadlineScheduler(hass, on_due)
+    scheduler.schedule(DL_PENDING, 0)
+    scheduler.cancel_all()
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert fired == []
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.zigalarm.compiled import CompiledConfig, compile_options
+from custom_components.zigalarm.const import (
+    OPT_MOTION,
+    OPT_PERIMETER,
+    OPT_SUPERVISION_INTERVAL,
+    ROLE_MOTION,
+    ROLE_PERIMETER,
+)
+from custom_components.zigalarm.supervision import FAULT_STALE, FAULT_UNAVAILABLE, SensorSupervisor
+
+DOOR = "binary_sensor.door"
+PIR = "binary_sensor.pir"
+
+
+def _supervisor(hass: HomeAssistant, interval: int = 0) -> tuple[SensorSupervisor, list, CompiledConfig]:
+    changes: list = []
+    supervisor = SensorSupervisor(hass, changes.extend)
+    cfg = compile_options({OPT_PERIMETER: [DOOR], OPT_MOTION: [PIR], OPT_SUPERVISION_INTERVAL: interval})
+    return supervisor, changes, cfg
+
+
+async def test_unavailable_fault_and_restore(hass: HomeAssistant) -> None:
+    hass.states.async_set(DOOR, "off")
+    hass.states.async_set(PIR, "unavailable")
+    supervisor, _changes, cfg = _supervisor(hass)
+    assert supervisor.configure(cfg) == [(PIR, FAULT_UNAVAILABLE)]
+    assert supervisor.faulted == {PIR: FAULT_UNAVAILABLE}
+    assert supervisor.faulted_in(ROLE_MOTION) == [PIR]
+    assert supervisor.faulted_in(ROLE_PERIMETER) == []
+
+    assert supervisor.seen(PIR, "unavailable") is None
+    assert supervisor.seen(PIR, "off") == (PIR, None)
+    assert supervisor.faulted == {}
+    assert supervisor.faulted_in(ROLE_MOTION) == []
+
+    assert supervisor.seen(DOOR, "unknown") == (DOOR, FAULT_UNAVAILABLE)
+    supervisor.stop()
+
+
+async def test_stale_sensor_restored_by_same_value_report(hass: HomeAssistant) -> None:
+    # letzte Meldung vor 2 min, Intervall 60 s -> stale
+    hass.states.async_set(DOOR, "off", timestamp=time.time() - 120)
+    hass.states.async_set(PIR, "off")
+    supervisor, changes, cfg = _supervisor(hass, interval=60)
+    assert supervisor.configure(cfg) == [(DOOR, FAULT_STALE)]
+    assert supervisor.faulted_in(ROLE_PERIMETER) == [DOOR]
+
+    # gleicher Wert erneut gemeldet: nur state_reported, kein state_changed
+    hass.states.async_set(DOOR, "off")
+    await hass.async_block_till_done()
+    assert changes == [(DOOR, None)]
+    assert supervisor.faulted == {}
+    supervisor.stop()
+
+
+async def test_removed_sensor_fault_cleared_on_configure(hass: HomeAssistant) -> None:
+    hass.states.async_set(DOOR, "off")
+    hass.states.async_set(PIR, "unavailable")
+    supervisor, _changes, cfg = _supervisor(hass)
+    supervisor.configure(cfg)
+    assert supervisor.configure(compile_options({OPT_PERIMETER: [DOOR]})) == [(PIR, None)]
+    assert supervisor.faulted == {}
+    assert supervisor.seen(PIR, "unavailable") is None
+    supervisor.stop()
@@ -272,4 +272,6 @@ class ZigAlarmCardEditor extends HTMLElement {
   }
 }
 
-customElements.define("zigalarm-card-editor", ZigAlarmCardEditor);
+if (!customElements.get("zigalarm-card-editor")) {
+  customElements.define("zigalarm-card-editor", ZigAlarmCardEditor);
+}
@@ -2,6 +2,9 @@
   ZigAlarm Lovelace Card (Dashboard / Overview)
   - shows alarm state + actions
   - optional camera popup on trigger (no Browser Mod required)
+    shows the backend's trigger snapshots; live streams only on demand per camera
+    with a sensor -> camera map (camera_map) only the tripped sensors' cameras,
+    streamed while the popup is visible
   Config:
     type: custom:zigalarm-card
     alarm_entity: alarm_control_panel.zigalarm   # or "entity"
@@ -27,11 +30,24 @@ class ZigAlarmCard extends HTMLElement {
     this._popup = null;          // native <dialog>
     this._popupOpenedFor = null; // alarm state that opened it ("triggered")
     this._helpers = null;
+    this._blobUrls = [];         // Object-URLs der Schnappschüsse (beim Schließen freigeben)
+    this._tileObserver = null;   // mountet Live-Streams erst, wenn die Kachel sichtbar ist
 
     this._renderSkeleton();
   }
 
   // ---- HA card API ----
+  // Editor erst laden, wenn jemand ihn öffnet (liegt neben dieser Datei)
+  static async getConfigElement() {
+    await import(new URL("./zigalarm-card-editor.js", import.meta.url));
+    return document.createElement("zigalarm-card-editor");
+  }
+
+  static getStubConfig(hass) {
+    const eid = Object.keys((hass && hass.states) || {}).find((e) => e.startsWith("alarm_control_panel.")) || "";
+    return { entity: eid };
+  }
+
   setConfig(config) {
     if (!config) throw new Error("Config fehlt");
 
@@ -55,14 +71,93 @@ class ZigAlarmCard extends HTMLElement {
       popup_title: config.popup_title || "Alarm-Kameras",
     };
 
+    const changed = this._config.alarm_entity !== alarmEntity;
     this._config.alarm_entity = alarmEntity;
 
+    if (changed && this._liveMode) this._resubscribe();
     this._update();
   }
 
   set hass(hass) {
     this._hass = hass;
 
+    // Live-Modus: gerendert wird nur bei Deltas aus zigalarm/subscribe
+    if (this._liveMode === undefined) this._startLive();
+    else if (this._liveMode === false) this._refresh();
+    this._updatePopupHass();
+  }
+
+  connectedCallback() {
+    if (this._hass && this._liveMode === undefined) this._startLive();
+  }
+
+  disconnectedCallback() {
+    this._stopLive();
+    this._stopCountdown();
+    this._liveMode = undefined;
+  }
+
+  getCardSize() {
+    return 3;
+  }
+
+  // ---- live subscription ----
+  async _startLive() {
+    this._liveMode = true;
+    await this._resubscribe();
+  }
+
+  async _resubscribe() {
+    this._stopLive();
+    this._live = {};
+    const token = (this._liveToken = (this._liveToken || 0) + 1);
+    try {
+      const unsub = await this._hass.connection.subscribeMessage(
+        (delta) => this._onLive(delta),
+        { type: "zigalarm/subscribe", entity_id: this._config.alarm_entity }
+      );
+      if (token !== this._liveToken) unsub();
+      else this._unsubLive = unsub;
+    } catch (e) {
+      // Backend ohne Subscription (oder Entität unbekannt): alter Pfad über hass-Updates
+      if (token !== this._liveToken) return;
+      this._liveMode = false;
+      this._refresh();
+    }
+  }
+
+  _stopLive() {
+    if (this._unsubLive) {
+      this._unsubLive();
+      this._unsubLive = null;
+    }
+  }
+
+  _onLive(delta) {
+    this._live = { ...this._live, ...delta };
+    this._refresh();
+  }
+
+  _stopCountdown() {
+    if (this._countdownTimer) {
+      clearInterval(this._countdownTimer);
+      this._countdownTimer = null;
+    }
+  }
+
+  _startCountdown(el, until, label) {
+    this._stopCountdown();
+    if (!el || !until) return;
+    const tick = () => {
+      const left = Math.max(0, Math.ceil(until - Date.now() / 1000));
+      el.textContent = `${label}: ${left} s`;
+      if (left <= 0) this._stopCountdown();
+    };
+    tick();
+    this._countdownTimer = setInterval(tick, 1000);
+  }
+
+  _refresh() {
     // detect state transitions for popup
     const st = this._st();
     const newState = st ? String(st.state || "") : null;
@@ -75,17 +170,54 @@ class ZigAlarmCard extends HTMLElement {
     }
 
     this._update();
-    this._updatePopupHass();
-  }
-
-  getCardSize() {
-    return 3;
+    if (st) this._updateEvidence(st.attributes);
   }
 
   // ---- internals ----
   _st() {
     if (!this._hass) return null;
-    return this._hass.states[this._config.alarm_entity] || null;
+    const st = this._hass.states[this._config.alarm_entity] || null;
+    const live = this._liveMode && this._live && this._live.state ? this._live : null;
+    if (!st && !live) return null;
+    const attrs = (st && st.attributes) || {};
+    const cfg = this._configFor(live ? live.config_version : attrs.config_version) || {};
+    // Runtime-Felder aus der Subscription haben Vorrang vor hass.states
+    return {
+      ...(st || {}),
+      state: live ? live.state : st.state,
+      attributes: { ...attrs, ...cfg, ...(live || {}) },
+    };
+  }
+
+  // Konfiguration über zigalarm/get_config, gecacht bis sich config_version ändert
+  _configFor(version) {
+    const c = this._configCache;
+    if (c && c.entity === this._config.alarm_entity
+      && (version == null || c.version === version || c.requested === version)) return c.config;
+    this._fetchConfig(version);
+    return c && c.entity === this._config.alarm_entity ? c.config : null;
+  }
+
+  async _fetchConfig(version) {
+    if (!this._hass) return;
+    const entity = this._config.alarm_entity;
+    const key = `${entity}|${version}`;
+    if (this._configFetching === key) return;
+    this._configFetching = key;
+    const cached = this._configCache && this._configCache.entity === entity ? this._configCache : null;
+    try {
+      const req = { type: "zigalarm/get_config", entity_id: entity };
+      if (cached && cached.config) req.version = cached.version;
+      const res = await this._hass.callWS(req);
+      const config = res.unchanged ? cached.config : res.config;
+      this._configCache = { entity, version: res.version, requested: version, config };
+    } catch (e) {
+      // ältere Backends liefern die Konfiguration noch als Attribute
+      this._configCache = { entity, version, requested: version, config: null };
+    } finally {
+      this._configFetching = null;
+    }
+    this._refresh();
   }
 
   _renderSkeleton() {
@@ -300,6 +432,20 @@ class ZigAlarmCard extends HTMLElement {
     return (this._config.cameras || []).map((x) => String(x)).filter(Boolean);
   }
 
+  // Popup: mit Zuordnung nur die Kameras der ausgelösten Sensoren (live),
+  // sonst alle Kameras als Schnappschuss mit Live-Knopf
+  _getPopupCameras(attrs) {
+    const all = this._getCameras(attrs);
+    const trig = Array.isArray(attrs && attrs.trigger_cameras)
+      ? attrs.trigger_cameras.map((x) => String(x)).filter(Boolean)
+      : [];
+    if (trig.length) {
+      const cams = this._config.use_panel_cameras ? trig : all.filter((c) => trig.includes(c));
+      if (cams.length) return { cams, live: true };
+    }
+    return { cams: all, live: false };
+  }
+
   async _buildCameraCardElement(cams) {
     const helpers = await this._getHelpers();
     if (!helpers || !cams || cams.length === 0) return null;
@@ -345,7 +491,7 @@ class ZigAlarmCard extends HTMLElement {
       trigName = trigEid;
     }
 
-    const cams = this._getCameras(attrs);
+    const { cams, live } = this._getPopupCameras(attrs);
 
     // Popup logic
     if (!this._popup) {
@@ -366,10 +512,14 @@ class ZigAlarmCard extends HTMLElement {
       dlg.querySelector(".dlg-close").addEventListener("click", () => dlg.close());
       dlg.addEventListener("close", () => {
         this._popupOpenedFor = null;
+        // Streams abbauen: Karten aushängen beendet deren Verbindung
+        this._stopTileObserver();
+        this._popupLive = false;
         const box = dlg.querySelector(".dlg-cards");
         box.innerHTML = "";
         const infoBox = dlg.querySelector(".dlg-info");
         infoBox.innerHTML = "";
+        this._revokeEvidence();
       });
 
       document.body.appendChild(dlg);
@@ -395,11 +545,11 @@ class ZigAlarmCard extends HTMLElement {
     box.innerHTML = "";
 
     if (cams.length > 0) {
-      const camCard = await this._buildCameraCardElement(cams);
-      if (camCard) {
-        box.appendChild(camCard);
-        camCard.hass = this._hass;
-      }
+      // Schnappschüsse statt Live-Streams; Stream nur auf Knopfdruck pro Kamera
+      this._renderEvidence(box, cams);
+      this._popupLive = live;
+      if (live) this._observeTiles(box.querySelectorAll(".evidence"));
+      this._updateEvidence(attrs);
     } else {
       box.innerHTML = `<div style="text-align:center; padding:20px; color:#aaa;">Keine Kameras konfiguriert</div>`;
     }
@@ -409,6 +559,114 @@ class ZigAlarmCard extends HTMLElement {
     }
   }
 
+  _renderEvidence(box, cams) {
+    this._revokeEvidence();
+    this._stopTileObserver();
+    box.innerHTML = "";
+    for (const cam of cams) box.appendChild(this._evidenceTile(cam));
+  }
+
+  _evidenceTile(cam) {
+    const st = this._hass && this._hass.states[cam];
+    const name = (st && st.attributes.friendly_name) || cam;
+    const tile = document.createElement("div");
+    tile.className = "evidence";
+    tile.dataset.cam = cam;
+    tile.style.cssText = "border:1px solid rgba(255,255,255,.12); border-radius:12px; overflow:hidden;";
+    tile.innerHTML = `
+      <div style="display:flex; justify-content:space-between; align-items:center; padding:8px 12px;">
+        <span class="ev-name"></span>
+        <button class="ev-live" type="button" style="background:none; border:1px solid rgba(255,255,255,.3); color:#fff; border-radius:8px; padding:4px 10px; cursor:pointer;">Live</button>
+      </div>
+      <div class="ev-body" style="min-height:120px; display:flex; align-items:center; justify-content:center; color:#aaa;">Schnappschuss wird geladen…</div>
+    `;
+    tile.querySelector(".ev-name").textContent = name;
+    tile.querySelector(".ev-live").addEventListener("click", () => this._openLiveTile(tile, cam));
+    return tile;
+  }
+
+  _observeTiles(tiles) {
+    if (!tiles.length) return;
+    if (typeof IntersectionObserver === "undefined") {
+      tiles.forEach((t) => this._openLiveTile(t, t.dataset.cam));
+      return;
+    }
+    if (!this._tileObserver) {
+      // geschlossener Dialog = nicht sichtbar -> erst nach showModal() mounten
+      this._tileObserver = new IntersectionObserver((entries) => {
+        for (const e of entries) {
+          if (!e.isIntersecting) continue;
+          this._tileObserver.unobserve(e.target);
+          this._openLiveTile(e.target, e.target.dataset.cam);
+        }
+      });
+    }
+    tiles.forEach((t) => this._tileObserver.observe(t));
+  }
+
+  _stopTileObserver() {
+    if (this._tileObserver) {
+      this._tileObserver.disconnect();
+      this._tileObserver = null;
+    }
+  }
+
+  _updateEvidence(attrs) {
+    if (!this._popup || !this._popup.open) return;
+    if (this._popupLive) {
+      // weitere Sensoren ausgelöst: deren Kameras nachreichen
+      const box = this._popup.querySelector(".dlg-cards");
+      const have = new Set([...box.querySelectorAll(".evidence")].map((t) => t.dataset.cam));
+      const { cams, live } = this._getPopupCameras(attrs);
+      const added = live ? cams.filter((c) => !have.has(c)).map((c) => box.appendChild(this._evidenceTile(c))) : [];
+      this._observeTiles(added);
+    }
+    const snaps = Array.isArray(attrs && attrs.last_snapshots) ? attrs.last_snapshots : [];
+    for (const snap of snaps) {
+      const tile = [...this._popup.querySelectorAll(".evidence")].find((t) => t.dataset.cam === snap.camera);
+      if (tile && !tile._live && tile._snapId !== snap.id) this._loadThumb(tile, snap);
+    }
+  }
+
+  async _loadThumb(tile, snap) {
+    tile._snapId = snap.id;
+    try {
+      const res = await this._hass.fetchWithAuth(snap.thumb_url);
+      if (!res.ok) return;
+      const blob = await res.blob();
+      if (tile._snapId !== snap.id || tile._live || !tile.isConnected) return;
+      const url = URL.createObjectURL(blob);
+      this._blobUrls.push(url);
+      const body = tile.querySelector(".ev-body");
+      body.innerHTML = "";
+      const img = document.createElement("img");
+      img.src = url;
+      img.alt = snap.camera;
+      img.title = new Date(snap.ts * 1000).toLocaleTimeString();
+      img.style.cssText = "width:100%; display:block;";
+      body.appendChild(img);
+    } catch (e) {
+      // Bild nicht (mehr) verfügbar: Platzhalter bleibt, Live-Stream geht weiterhin
+    }
+  }
+
+  async _openLiveTile(tile, cam) {
+    if (tile._live) return;
+    tile._live = true;
+    const card = await this._buildCameraCardElement([cam]);
+    if (!card || !tile.isConnected) return;
+    const body = tile.querySelector(".ev-body");
+    body.innerHTML = "";
+    body.appendChild(card);
+    card.hass = this._hass;
+    tile.querySelector(".ev-live").remove();
+  }
+
+  _revokeEvidence() {
+    for (const url of this._blobUrls) URL.revokeObjectURL(url);
+    this._blobUrls = [];
+  }
+
   _closeCameraPopup() {
     if (this._popup && this._popup.open) {
       try { this._popup.close(); } catch (e) { this._popup.removeAttribute("open"); }
@@ -416,8 +674,11 @@ class ZigAlarmCard extends HTMLElement {
   }
 
   _updatePopupHass() {
+    this._root.querySelectorAll(".inlineCams > *").forEach((el) => {
+      try { el.hass = this._hass; } catch (e) { }
+    });
     if (!this._popup || !this._popup.open) return;
-    const cards = this._popup.querySelectorAll(".dlg-cards > *");
+    const cards = this._popup.querySelectorAll(".dlg-cards > *:not(.evidence), .ev-body > *:not(img)");
     cards.forEach((el) => {
       try { el.hass = this._hass; } catch (e) { }
     });
@@ -474,9 +735,12 @@ class ZigAlarmCard extends HTMLElement {
     const state = this._stateLabel(st.state);
     const attrs = st.attributes || {};
     const openSensors = Array.isArray(attrs.open_sensors) ? attrs.open_sensors : [];
+    const quarantined = Array.isArray(attrs.quarantined_sensors) ? attrs.quarantined_sensors : [];
+    const faulted = Object.entries(attrs.faulted_sensors || {});
     const lastTrig = attrs.last_trigger_entity || "-";
     const readyHome = attrs.ready_to_arm_home;
     const readyAway = attrs.ready_to_arm_away;
+    const until = st.state === "pending" ? attrs.pending_until : st.state === "arming" ? attrs.arming_until : null;
 
     // Toggle Flashing Class
     if (state === "triggered") {
@@ -543,11 +807,14 @@ class ZigAlarmCard extends HTMLElement {
           <div class="dot"></div> <span>Bereit für Away</span>
         </div>
         ${lastTrig !== "-" ? `<div class="last-trig">Letzter: ${lastTrig}</div>` : ''}
+        ${until ? `<div class="last-trig" id="countdown"></div>` : ''}
       </div>
 
       <div class="box">
         <h4>Offene Sensoren</h4>
         ${openSensors.length ? `<ul class="list">${openSensors.map((e) => `<li>${e}</li>`).join("")}</ul>` : `<div class="muted-ok">Alles geschlossen</div>`}
+        ${quarantined.length ? `<h4>Quarantäne (gebrückt)</h4><ul class="list">${quarantined.map((e) => `<li>${e}</li>`).join("")}</ul>` : ``}
+        ${faulted.length ? `<h4>Gestört</h4><ul class="list">${faulted.map(([e, r]) => `<li>${e} (${r === "stale" ? "meldet sich nicht" : "nicht erreichbar"})</li>`).join("")}</ul>` : ``}
       </div>
     </div>
 
@@ -564,6 +831,12 @@ class ZigAlarmCard extends HTMLElement {
     <div class="footer-card">Powered by <a href="https://openkairo.de" target="_blank">OPENKAIRO</a></div>
     `;
 
+    this._startCountdown(
+      content.querySelector("#countdown"),
+      until,
+      st.state === "pending" ? "Eingangsverzögerung" : "Ausgangsverzögerung"
+    );
+
     // Re-attach listeners
     content.querySelector("#btnHome")?.addEventListener("click", () => this._armHome());
     content.querySelector("#btnAway")?.addEventListener("click", () => this._armAway());